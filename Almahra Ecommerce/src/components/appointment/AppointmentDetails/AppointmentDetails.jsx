@@ -1,5 +1,6 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import PhoneInput from '../../common/PhoneInput/PhoneInput';
+import appointmentService, { APPOINTMENT_TYPE_VALUES } from '../../../services/appointmentService';
 import './AppointmentDetails.css';
 
 const AppointmentDetails = ({ appointmentData, onSubmit, onBack }) => {
@@ -85,7 +86,28 @@ const AppointmentDetails = ({ appointmentData, onSubmit, onBack }) => {
     return isFriday(formData.date) ? fridaySlots : regularSlots;
   };
 
-  const timeSlots = getTimeSlots();
+  // Free start times per day of the selected month; the fixed lists above are
+  // only used if availability can't be loaded
+  const [availability, setAvailability] = useState(null);
+  const selectedMonth = formData.date ? formData.date.slice(0, 7) : '';
+
+  useEffect(() => {
+    if (!selectedMonth) return;
+    let ignore = false;
+    appointmentService
+      .getAvailability(selectedMonth, APPOINTMENT_TYPE_VALUES[appointmentData.type] || 'consultation')
+      .then((data) => {
+        if (!ignore) setAvailability(data.days);
+      })
+      .catch(() => {
+        if (!ignore) setAvailability(null);
+      });
+    return () => {
+      ignore = true;
+    };
+  }, [selectedMonth, appointmentData.type]);
+
+  const timeSlots = availability?.[formData.date] ?? getTimeSlots();
 
   // Get minimum date (today)
   const getMinDate = () => {
@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAppointments } from '../../context/AppointmentContext';
 import emailService from '../../services/emailService';
+import { APPOINTMENT_TYPE_VALUES } from '../../services/appointmentService';
 import AppointmentType from '../../components/appointment/AppointmentType/AppointmentType';
 import AppointmentDetails from '../../components/appointment/AppointmentDetails/AppointmentDetails';
 import AppointmentConfirmation from '../../components/appointment/AppointmentConfirmation/AppointmentConfirmation';
@@ -52,17 +53,9 @@ const AppointmentPage = () => {
 
   const handleConfirm = async () => {
     try {
-      // Map frontend appointment type to backend enum values
-      const typeMapping = {
-        'Eye Test': 'eye_exam',
-        'Consultation': 'consultation',
-        'Lens Fitting': 'contact_lens',
-        'Frame Selection': 'frame_fitting'
-      };
-
       // Prepare appointment data for backend
       const appointmentPayload = {
-        appointmentType: typeMapping[appointmentData.type] || 'consultation',
+        appointmentType: APPOINTMENT_TYPE_VALUES[appointmentData.type] || 'consultation',
         date: appointmentData.date,
         timeSlot: appointmentData.time,
         notes: appointmentData.personalInfo.notes || '',
@@ -14,7 +14,7 @@ const adminService = {
     }
   },
 
-  // Get sales analytics
+  // Get sales analytics (granularity: day/week/month, group_by: brand/category/frame_type, start_date, end_date or days)
   getSalesAnalytics: async (params = {}) => {
     try {
       const response = await api.get('/admin/analytics', { params });
@@ -24,6 +24,86 @@ const adminService = {
     }
   },
 
+  // Get the monthly cohort retention matrix (months)
+  getCohortRetention: async (params = {}) => {
+    try {
+      const response = await api.get('/admin/analytics/cohorts', { params });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // Get customers ranked by lifetime value (page, per_page, sort, cohort)
+  getCustomerLifetimes: async (params = {}) => {
+    try {
+      const response = await api.get('/admin/analytics/customers', { params });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // ============ EMAIL LOG ============
+
+  // Search the email delivery log (status, recipient, template, start_date, end_date, cursor)
+  getEmailLogs: async (params = {}) => {
+    try {
+      const response = await api.get('/admin/email-logs', { params });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // ============ EMAIL CAMPAIGNS ============
+
+  getCampaigns: async (params = {}) => {
+    try {
+      const response = await api.get('/admin/campaigns', { params });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // Create a draft campaign (name, subject, template, content, audience, rate_limit, concurrency)
+  createCampaign: async (campaignData) => {
+    try {
+      const response = await api.post('/admin/campaigns', campaignData);
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  getCampaign: async (campaignId) => {
+    try {
+      const response = await api.get(`/admin/campaigns/${campaignId}`);
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  startCampaign: async (campaignId) => {
+    try {
+      const response = await api.post(`/admin/campaigns/${campaignId}/start`);
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  pauseCampaign: async (campaignId) => {
+    try {
+      const response = await api.post(`/admin/campaigns/${campaignId}/pause`);
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
   // ============ ORDER MANAGEMENT ============
   
   // Get all orders (admin view)
@@ -36,6 +116,16 @@ const adminService = {
     }
   },
 
+  // Search orders (order_number prefix, email, product, status, start_date, end_date, cursor)
+  searchOrders: async (params = {}) => {
+    try {
+      const response = await api.get('/admin/orders/search', { params });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
   // Update order status
   updateOrderStatus: async (orderId, status) => {
     try {
@@ -48,6 +138,20 @@ const adminService = {
     }
   },
 
+  // Move many orders to one status; reports updated, unchanged, rejected and not_found ids
+  bulkUpdateOrderStatus: async (orderIds, status, details = {}) => {
+    try {
+      const response = await api.post('/admin/orders/bulk-status', {
+        order_ids: orderIds,
+        status,
+        ...details,
+      });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
   // Get order details (admin view)
   getOrderDetails: async (orderId) => {
     try {
@@ -90,6 +194,36 @@ const adminService = {
     }
   },
 
+  // Update price/stock/flags of many products; each row has an id or sku
+  bulkUpdateProducts: async (products) => {
+    try {
+      const response = await api.patch('/admin/products/bulk', { products });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // Get products at or below their low stock threshold (page, per_page, threshold)
+  getLowStockProducts: async (params = {}) => {
+    try {
+      const response = await api.get('/admin/products/low-stock', { params });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // Get sales velocity and days-until-stockout forecasts (page, per_page, sort, order)
+  getProductForecasts: async (params = {}) => {
+    try {
+      const response = await api.get('/admin/products/forecast', { params });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
   // Delete product
   deleteProduct: async (productId) => {
     try {
@@ -1,6 +1,26 @@
 import api from './api';
 
+// Booking page appointment types -> backend AppointmentType values
+export const APPOINTMENT_TYPE_VALUES = {
+  'Eye Test': 'eye_exam',
+  'Consultation': 'consultation',
+  'Lens Fitting': 'contact_lens',
+  'Frame Selection': 'frame_fitting'
+};
+
 const appointmentService = {
+  // Free start times for each day of a month (month: 'YYYY-MM')
+  getAvailability: async (month, appointmentType) => {
+    try {
+      const response = await api.get('/appointments/availability', {
+        params: { month, type: appointmentType }
+      });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to fetch availability' };
+    }
+  },
+
   // Create a new appointment (supports both authenticated users and guests)
   createAppointment: async (appointmentData) => {
     try {
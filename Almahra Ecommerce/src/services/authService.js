@@ -53,7 +53,10 @@ const authService = {
   // Logout user
   logout: async () => {
     try {
-      await api.post("/auth/logout");
+      // Revoke the refresh token too, so it can't mint new access tokens
+      await api.post("/auth/logout", {
+        refresh_token: localStorage.getItem("refresh_token"),
+      });
 
       // Clear local storage
       localStorage.removeItem("token");
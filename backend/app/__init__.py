@@ -32,10 +32,57 @@ def create_app(config_class=Config):
                   ],
                   supports_credentials=True,
                   allow_headers=["Content-Type", "Authorization"],
+                  expose_headers=["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After"],
                   methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     mail.init_app(app)
     jwt.init_app(app)
     
+    # Pooled SMTP connections shared by the email service
+    from app.services.mail_transport import init_mail_transport
+    init_mail_transport(app)
+    
+    # Buffered email delivery log
+    from app.services.email_log import init_email_log
+    init_email_log(app)
+    
+    # Stripe client: configured once, pooled, with retries and a circuit breaker
+    from app.services.payment_gateway import init_payment_gateway
+    init_payment_gateway(app)
+    
+    # Worker that applies queued Stripe webhook events
+    from app.services.stripe_events import init_stripe_event_worker
+    init_stripe_event_worker(app)
+    
+    # Daily dashboard rollups, updated on every flush that touches orders or users
+    from app.services.rollups import init_rollups
+    init_rollups(app)
+    
+    # Low-stock set, updated on every flush that changes product stock
+    from app.services.low_stock import init_low_stock
+    init_low_stock(app)
+    
+    # Per-process principal cache behind admin_required and get_current_user
+    from app.services.user_cache import init_user_cache
+    init_user_cache(app)
+    
+    # Bounded bcrypt thread pool for login and password changes
+    from app.services.password_hasher import init_password_hasher
+    init_password_hasher(app)
+    
+    # Revoked JWTs: Bloom filter per worker, synced through Redis
+    from app.services.redis_client import init_redis
+    from app.services.token_blocklist import init_token_blocklist, is_token_revoked
+    init_redis(app)
+    init_token_blocklist(app)
+    
+    # Per-route rate limits (shared through Redis when REDIS_URL is set)
+    from app.services.rate_limiter import init_rate_limiter
+    init_rate_limiter(app)
+    
+    # Appointment opening hours, slot grid and capacity
+    from app.services.appointment_calendar import init_appointment_calendar
+    init_appointment_calendar(app)
+    
     # JWT error handlers - return 401 for proper HTTP semantics
     @jwt.invalid_token_loader
     def invalid_token_callback(error_string):
@@ -57,9 +104,13 @@ def create_app(config_class=Config):
         app.logger.error(f"Revoked token - Header: {jwt_header}, Payload: {jwt_payload}")
         return {'error': 'Token has been revoked'}, 401
     
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload)
+    
     # Import models so Flask-Migrate can detect them
     with app.app_context():
-        from app.models import user, product, order
+        from app.models import user, product, order, email_log, email_campaign, stripe_event, checkout_intent, job_watermark, rollups, customer_metrics, low_stock, product_forecast, revoked_token, appointment_day
     
     # Register blueprints
     from app.routes.auth import auth_bp
@@ -68,6 +119,7 @@ def create_app(config_class=Config):
     from app.routes.orders import orders_bp
     from app.routes.admin import admin_bp
     from app.routes.admin_orders import admin_orders_bp
+    from app.routes.admin_campaigns import admin_campaigns_bp
     from app.routes.users import users_bp
     from app.routes.payments import payments_bp
     from app.routes.appointments import appointments_bp
@@ -80,12 +132,17 @@ def create_app(config_class=Config):
     app.register_blueprint(orders_bp, url_prefix='/api/orders')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(admin_orders_bp, url_prefix='/api/admin/orders')
+    app.register_blueprint(admin_campaigns_bp, url_prefix='/api/admin/campaigns')
     app.register_blueprint(users_bp, url_prefix='/api/users')
     app.register_blueprint(payments_bp, url_prefix='/api/payments')
     app.register_blueprint(appointments_bp, url_prefix='/api/appointments')
     app.register_blueprint(contact_bp, url_prefix='/api/contact')
     # app.register_blueprint(ar_bp, url_prefix='/api/ar')  # Temporarily disabled
     
+    # Flask CLI commands (flask campaigns / stripe-events / payments ...)
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -0,0 +1,201 @@
+"""Flask CLI commands for background jobs (run with ``flask <group> <command>``)"""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+campaigns_cli = AppGroup('campaigns', help='Bulk email campaigns')
+
+
+@campaigns_cli.command('run')
+@click.argument('campaign_id', type=int)
+def run_campaign_command(campaign_id):
+    """Send a campaign in the foreground, resuming from its checkpoint"""
+    from app.services.campaign_service import claim_campaign, run_campaign
+
+    runner_id = claim_campaign(campaign_id, current_app.config.get('CAMPAIGN_STALE_AFTER', 300))
+    if not runner_id:
+        raise click.ClickException(f'Campaign {campaign_id} is missing, finished or running elsewhere')
+
+    run_campaign(current_app._get_current_object(), campaign_id, runner_id)
+    click.echo(f'Campaign {campaign_id} finished')
+
+
+@campaigns_cli.command('resume')
+def resume_campaigns_command():
+    """Take over RUNNING campaigns whose runner stopped heartbeating"""
+    from app.models.email_campaign import EmailCampaign, CampaignStatus
+    from app.services.campaign_service import claim_campaign, run_campaign
+
+    stale_after = current_app.config.get('CAMPAIGN_STALE_AFTER', 300)
+    campaign_ids = [c.id for c in EmailCampaign.query.filter_by(status=CampaignStatus.RUNNING).all()]
+
+    resumed = 0
+    for campaign_id in campaign_ids:
+        runner_id = claim_campaign(campaign_id, stale_after)
+        if runner_id:
+            click.echo(f'Resuming campaign {campaign_id}')
+            run_campaign(current_app._get_current_object(), campaign_id, runner_id)
+            resumed += 1
+    click.echo(f'Resumed {resumed} campaign(s)')
+
+
+stripe_events_cli = AppGroup('stripe-events', help='Stripe webhook inbox')
+
+
+@stripe_events_cli.command('process')
+def process_stripe_events_command():
+    """Apply every webhook event that is due, then exit"""
+    from app.services.stripe_events import drain_events
+
+    processed = drain_events(current_app.config.get('STRIPE_EVENT_BATCH_SIZE', 100),
+                             current_app.config.get('STRIPE_EVENT_MAX_ATTEMPTS', 5),
+                             current_app.config.get('STRIPE_EVENT_RETRY_BACKOFF', 30))
+    click.echo(f'Applied {processed} event(s)')
+
+
+payments_cli = AppGroup('payments', help='Stripe payments')
+
+
+@payments_cli.command('sweep-intents')
+@click.option('--max-age', type=int, default=None, help='Seconds since last use (default PAYMENT_INTENT_ABANDON_AFTER)')
+def sweep_intents_command(max_age):
+    """Cancel checkout PaymentIntents that have been abandoned"""
+    from app.services.checkout_intents import sweep_abandoned_intents
+
+    max_age = max_age or current_app.config.get('PAYMENT_INTENT_ABANDON_AFTER', 86400)
+    cancelled, removed = sweep_abandoned_intents(max_age)
+    click.echo(f'Cancelled {cancelled} of {removed} abandoned payment intent(s)')
+
+
+@payments_cli.command('reconcile')
+@click.option('--since', type=click.DateTime(), default=None, help='Start here instead of at the saved watermark')
+@click.option('--window-hours', type=int, default=None, help='Orders per batch (default RECONCILE_WINDOW_HOURS)')
+@click.option('--dry-run', is_flag=True, help='Report what would change without writing')
+def reconcile_command(since, window_hours, dry_run):
+    """Correct order payment statuses that disagree with Stripe"""
+    from datetime import timedelta
+    from app.services.payment_reconciliation import reconcile_payments
+
+    totals = reconcile_payments(since=since, window=timedelta(hours=window_hours) if window_hours else None,
+                                dry_run=dry_run)
+    click.echo(f"{'Would correct' if dry_run else 'Corrected'} {totals['corrected']} of {totals['checked']} "
+               f"order(s) in {totals['windows']} window(s); {totals['missing']} without a PaymentIntent, "
+               f"{totals['discrepancies']} flagged for review")
+
+
+rollups_cli = AppGroup('rollups', help='Dashboard rollup tables')
+
+
+@rollups_cli.command('backfill')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Rebuild from this day (default: everything)')
+def backfill_rollups_command(since):
+    """Rebuild the daily rollups from orders and users"""
+    from app.services.rollups import backfill_rollups
+
+    backfill_rollups(since.date() if since else None)
+    click.echo(f"Rebuilt rollups {'from ' + since.date().isoformat() if since else 'for all days'}")
+
+
+@rollups_cli.command('refresh-customers')
+@click.option('--full', is_flag=True, help='Recompute every customer instead of only those with changed orders')
+def refresh_customers_command(full):
+    """Update customer lifetime value and the cohort retention matrix"""
+    from app.services.customer_metrics import refresh_customer_metrics
+
+    stats = refresh_customer_metrics(full=full)
+    click.echo(f"Refreshed {stats['customers']} customer(s) across {stats['cohorts']} cohort(s)")
+
+
+orders_cli = AppGroup('orders', help='Orders')
+
+
+@orders_cli.command('export')
+@click.option('--format', 'export_format', type=click.Choice(['csv', 'ndjson']), default='csv')
+@click.option('--since', type=click.DateTime(), default=None, help='Orders created at or after this time')
+@click.option('--until', type=click.DateTime(), default=None, help='Orders created before this time')
+@click.option('--status', default=None, help='Only orders with this status')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='File to write (default stdout)')
+def export_orders_command(export_format, since, until, status, output):
+    """Stream orders with their items to a file"""
+    from app.models import OrderStatus
+    from app.services.order_export import generate_export
+
+    filters = {'start': since, 'end': until}
+    if status:
+        try:
+            filters['status'] = OrderStatus(status.upper())
+        except ValueError:
+            raise click.BadParameter(f'Unknown order status: {status}', param_hint='--status')
+
+    for chunk in generate_export(export_format, **filters):
+        output.write(chunk)
+
+
+stock_cli = AppGroup('stock', help='Product stock')
+
+
+@stock_cli.command('sync-low-stock')
+def sync_low_stock_command():
+    """Re-check every product against its low stock threshold"""
+    from app.services.low_stock import rebuild_low_stock
+
+    members, entered = rebuild_low_stock()
+    click.echo(f"{members} product(s) at or below threshold, {entered} newly added")
+
+
+@stock_cli.command('send-low-stock-digest')
+def send_low_stock_digest_command():
+    """Email the pending low stock digest now"""
+    from app.services.low_stock import DigestNotSent, send_low_stock_digest
+
+    try:
+        click.echo(f"Sent low stock digest for {send_low_stock_digest()} product(s)")
+    except DigestNotSent as e:
+        raise click.ClickException(str(e))
+
+
+@stock_cli.command('forecast')
+def forecast_command():
+    """Recompute sales velocity and days-until-stockout for every active product"""
+    from app.services.stock_forecast import refresh_forecasts
+
+    click.echo(f"Forecast {refresh_forecasts()} product(s)")
+
+
+auth_cli = AppGroup('auth', help='Authentication')
+
+
+@auth_cli.command('cleanup-revoked')
+def cleanup_revoked_command():
+    """Delete revoked token rows that have expired and rebuild the shared Bloom filter"""
+    from app.services.token_blocklist import cleanup_revoked_tokens
+
+    click.echo(f"Deleted {cleanup_revoked_tokens()} expired revocation(s)")
+
+
+appointments_cli = AppGroup('appointments', help='Appointments')
+
+
+@appointments_cli.command('rebuild-calendar')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='First day to rebuild (default today)')
+def rebuild_calendar_command(since):
+    """Recompute slot occupancy from the appointments table"""
+    from app.services.appointment_calendar import rebuild_calendar
+
+    days, counted, skipped = rebuild_calendar(since.date() if since else None)
+    click.echo(f"Rebuilt {days} day(s) from {counted} appointment(s)")
+    if skipped:
+        click.echo(f"Skipped {skipped} appointment(s) with a time off the slot grid")
+
+
+def register_commands(app):
+    app.cli.add_command(campaigns_cli)
+    app.cli.add_command(stripe_events_cli)
+    app.cli.add_command(payments_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(orders_cli)
+    app.cli.add_command(stock_cli)
+    app.cli.add_command(auth_cli)
+    app.cli.add_command(appointments_cli)
@@ -0,0 +1,11 @@
+from datetime import datetime
+from app import db
+
+class AppointmentDay(db.Model):
+    """Slot occupancy for one day, as thermometer-coded bitmaps (see services.appointment_calendar)"""
+    __tablename__ = 'appointment_days'
+
+    day = db.Column(db.Date, primary_key=True)
+    slot_minutes = db.Column(db.Integer, nullable=False)  # Grid the bitmaps were built on
+    layers = db.Column(db.JSON, nullable=False, default=list)  # Bit i of layers[k]: more than k bookings in slot i
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,16 @@
+from datetime import datetime
+from app import db
+
+class CheckoutIntent(db.Model):
+    """A user's open Stripe PaymentIntent, reused while the cart is unchanged"""
+    __tablename__ = 'checkout_intents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False, index=True)
+    payment_intent_id = db.Column(db.String(255), unique=True, nullable=False)
+    client_secret = db.Column(db.String(255), nullable=False)
+    cart_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of cart contents, amount and currency
+    amount = db.Column(db.Integer, nullable=False)  # Cents
+    currency = db.Column(db.String(3), nullable=False, default='usd')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
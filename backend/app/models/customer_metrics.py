@@ -0,0 +1,43 @@
+from datetime import datetime
+from app import db
+
+class CustomerLifetime(db.Model):
+    """Precomputed lifetime value of one customer"""
+    __tablename__ = 'customer_lifetimes'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    cohort_month = db.Column(db.Date, nullable=False, index=True)  # Month of the first counted order
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    total_spent = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    first_order_at = db.Column(db.DateTime, nullable=False)
+    last_order_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'cohort_month': self.cohort_month.strftime('%Y-%m'),
+            'order_count': self.order_count,
+            'total_spent': float(self.total_spent),
+            'average_order_value': float(self.total_spent) / self.order_count if self.order_count else 0,
+            'first_order_at': self.first_order_at.isoformat(),
+            'last_order_at': self.last_order_at.isoformat()
+        }
+
+class CustomerActiveMonth(db.Model):
+    """A month in which a customer placed at least one counted order"""
+    __tablename__ = 'customer_active_months'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # First day of the month
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+class CohortRetention(db.Model):
+    """One cell of the cohort retention matrix"""
+    __tablename__ = 'cohort_retention'
+
+    cohort_month = db.Column(db.Date, primary_key=True)
+    months_since = db.Column(db.Integer, primary_key=True)  # 0 = the acquisition month
+    customers = db.Column(db.Integer, nullable=False, default=0)  # Cohort members who ordered that month
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
@@ -0,0 +1,74 @@
+from datetime import datetime
+import enum
+import json
+from app import db
+
+class CampaignStatus(enum.Enum):
+    DRAFT = 'DRAFT'
+    RUNNING = 'RUNNING'
+    PAUSED = 'PAUSED'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+
+class CampaignAudience(enum.Enum):
+    CUSTOMERS = 'CUSTOMERS'
+    ALL_USERS = 'ALL_USERS'
+
+class EmailCampaign(db.Model):
+    """Bulk email to the customer base, with a resumable progress checkpoint"""
+    __tablename__ = 'email_campaigns'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    template = db.Column(db.String(50), nullable=False, default='campaign')
+    content = db.Column(db.Text, nullable=True)  # JSON context for the template
+    audience = db.Column(db.Enum(CampaignAudience), nullable=False, default=CampaignAudience.CUSTOMERS)
+    verified_only = db.Column(db.Boolean, default=False)
+
+    # Throughput limits
+    rate_limit = db.Column(db.Float, nullable=False, default=10.0)  # Messages per second
+    concurrency = db.Column(db.Integer, nullable=False, default=2)  # Parallel SMTP sessions
+
+    # Progress; last_user_id is the checkpoint a crashed run resumes from
+    status = db.Column(db.Enum(CampaignStatus), nullable=False, default=CampaignStatus.DRAFT)
+    last_user_id = db.Column(db.Integer, nullable=False, default=0)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    runner_id = db.Column(db.String(32), nullable=True)  # Token of the runner holding the claim
+
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def set_content(self, content):
+        self.content = json.dumps(content or {})
+
+    def get_content(self):
+        return json.loads(self.content) if self.content else {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'subject': self.subject,
+            'template': self.template,
+            'content': self.get_content(),
+            'audience': self.audience.value,
+            'verified_only': self.verified_only,
+            'rate_limit': self.rate_limit,
+            'concurrency': self.concurrency,
+            'status': self.status.value,
+            'last_user_id': self.last_user_id,
+            'sent_count': self.sent_count,
+            'failed_count': self.failed_count,
+            'error': self.error,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
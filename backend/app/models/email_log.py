@@ -0,0 +1,41 @@
+from datetime import datetime
+import enum
+from app import db
+
+class EmailStatus(enum.Enum):
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+
+class EmailLog(db.Model):
+    """Append-only record of every email send attempt"""
+    __tablename__ = 'email_logs'
+    __table_args__ = (
+        db.Index('ix_email_logs_status_id', 'status', 'id'),
+        db.Index('ix_email_logs_recipient_id', 'recipient', 'id'),
+        db.Index('ix_email_logs_template_id', 'template', 'id'),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    template = db.Column(db.String(50), nullable=True)
+    subject = db.Column(db.String(255), nullable=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=True, index=True)
+    appointment_id = db.Column(db.Integer, db.ForeignKey('appointments.id'), nullable=True, index=True)
+    status = db.Column(db.Enum(EmailStatus), nullable=False)
+    latency_ms = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recipient': self.recipient,
+            'template': self.template,
+            'subject': self.subject,
+            'order_id': self.order_id,
+            'appointment_id': self.appointment_id,
+            'status': self.status.value,
+            'latency_ms': self.latency_ms,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
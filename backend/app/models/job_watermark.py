@@ -0,0 +1,31 @@
+from datetime import datetime
+from app import db
+
+class JobWatermark(db.Model):
+    """How far a resumable batch job has got, so the next run continues from there"""
+    __tablename__ = 'job_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    position = db.Column(db.DateTime, nullable=True)  # Everything before this has been processed
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def get_position(cls, name):
+        watermark = cls.query.get(name)
+        return watermark.position if watermark else None
+
+    @classmethod
+    def set_position(cls, name, position):
+        """Stage the new position; committed with the caller's transaction"""
+        watermark = cls.query.get(name)
+        if watermark is None:
+            watermark = cls(name=name)
+            db.session.add(watermark)
+        watermark.position = position
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'position': self.position.isoformat() if self.position else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
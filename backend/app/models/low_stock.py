@@ -0,0 +1,26 @@
+from datetime import datetime
+from app import db
+
+class LowStockProduct(db.Model):
+    """An active, inventory-tracked product at or below its low stock threshold"""
+    __tablename__ = 'low_stock_products'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    stock_quantity = db.Column(db.Integer, nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)
+    since = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # When it crossed the threshold
+    alerted_at = db.Column(db.DateTime, index=True)  # Null until included in a digest
+    claimed_at = db.Column(db.DateTime, nullable=True)  # Set while a digest including it is being sent
+
+    __table_args__ = (
+        db.Index('ix_low_stock_products_stock', 'stock_quantity', 'product_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'stock_quantity': self.stock_quantity,
+            'threshold': self.threshold,
+            'since': self.since.isoformat() if self.since else None,
+            'alerted_at': self.alerted_at.isoformat() if self.alerted_at else None
+        }
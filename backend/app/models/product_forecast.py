@@ -0,0 +1,25 @@
+from datetime import datetime
+from app import db
+
+class ProductForecast(db.Model):
+    """Latest sales velocity and stockout forecast for an active product"""
+    __tablename__ = 'product_forecasts'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    velocity = db.Column(db.Float, nullable=False, default=0, index=True)  # Exponentially weighted units per day
+    units_30d = db.Column(db.Integer, nullable=False, default=0, index=True)
+    stock_quantity = db.Column(db.Integer, nullable=False, default=0, index=True)  # Stock when computed
+    days_until_stockout = db.Column(db.Float, index=True)  # Null when not selling or not tracked
+    stockout_date = db.Column(db.Date)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'velocity': self.velocity,
+            'units_30d': self.units_30d,
+            'stock_quantity': self.stock_quantity,
+            'days_until_stockout': self.days_until_stockout,
+            'stockout_date': self.stockout_date.isoformat() if self.stockout_date else None,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -0,0 +1,12 @@
+from datetime import datetime
+from app import db
+
+class RevokedToken(db.Model):
+    """A revoked JWT (by jti), or a user-wide cutoff keyed ``user:<id>``"""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(64), primary_key=True)
+    token_type = db.Column(db.String(10), nullable=False)  # access, refresh, or all for a user-wide cutoff
+    user_id = db.Column(db.Integer, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Cutoff for user-wide rows
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # Safe to delete after this
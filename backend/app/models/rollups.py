@@ -0,0 +1,26 @@
+from app import db
+
+class DailyOrderStats(db.Model):
+    """Orders created on a day, by their current status"""
+    __tablename__ = 'daily_order_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)  # OrderStatus name, as stored on orders
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)  # Sum of total_amount
+
+class DailyCustomerStats(db.Model):
+    """Customer accounts created on a day"""
+    __tablename__ = 'daily_customer_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    new_customers = db.Column(db.Integer, nullable=False, default=0)
+
+class DailyProductSales(db.Model):
+    """Units and revenue per product from delivered orders created on a day"""
+    __tablename__ = 'daily_product_sales'
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)  # Sum of item total_price
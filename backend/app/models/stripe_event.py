@@ -0,0 +1,40 @@
+from datetime import datetime
+import json
+from app import db
+
+class StripeEvent(db.Model):
+    """Inbox of verified Stripe webhook events, applied by a background worker"""
+    __tablename__ = 'stripe_events'
+    __table_args__ = (
+        db.Index('ix_stripe_events_pending', 'processed_at', 'stripe_created', 'id'),
+        db.Index('ix_stripe_events_intent', 'payment_intent_id', 'stripe_created', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(255), unique=True, nullable=False, index=True)  # Stripe retries reuse this
+    event_type = db.Column(db.String(100), nullable=False)
+    payment_intent_id = db.Column(db.String(255), nullable=True)
+    payload = db.Column(db.Text, nullable=False)
+    stripe_created = db.Column(db.Integer, nullable=False, default=0)  # Unix time Stripe created the event
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)  # Backoff after a failed attempt
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def get_object(self):
+        return json.loads(self.payload)['data']['object']
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'event_type': self.event_type,
+            'payment_intent_id': self.payment_intent_id,
+            'attempts': self.attempts,
+            'error': self.error,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'received_at': self.received_at.isoformat() if self.received_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
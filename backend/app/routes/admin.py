@@ -6,17 +6,95 @@ from app.models import (
     db, User, Product, Order, OrderItem, Review, 
     Category, Brand, OrderStatus, PaymentStatus, UserRole
 )
+from app.models.email_log import EmailLog, EmailStatus
+from app.models.customer_metrics import CustomerLifetime
+from app.models.low_stock import LowStockProduct
+from app.models.product_forecast import ProductForecast
 from app.utils.auth import admin_required, super_admin_required
 from app.utils.validators import (
     validate_json, validate_required_fields, validate_product_data,
     validate_pagination_params
 )
-from app.services.email_service import send_order_shipped_email
+from app.services.order_workflow import transition_order, queue_status_emails, InvalidTransition
+from app.services.rollups import dashboard_rollup_metrics
+from app.services.response_cache import get_dashboard_cache
+from app.services.email_log import keyset_page
+from app.services.sales_analytics import sales_analytics, GRANULARITIES, GROUP_BY_OPTIONS
+from app.services.customer_metrics import cohort_matrix, lifetime_ordering
+from app.services.stock_forecast import SORT_OPTIONS as FORECAST_SORT_OPTIONS
+from app.services.product_bulk import bulk_update_products as apply_product_updates, BulkUpdateError, SkuConflict
+from app.services.user_search import list_users, UserSearchError
 
 admin_bp = Blueprint('admin', __name__)
 
 # Dashboard and Analytics
 
+def _recent_orders(limit=10):
+    """Latest orders with their first item name and item count, in one query"""
+    item_count = db.session.query(
+        func.count(OrderItem.id)
+    ).filter(OrderItem.order_id == Order.id).correlate(Order).scalar_subquery()
+    first_item_name = db.session.query(
+        OrderItem.product_name
+    ).filter(OrderItem.order_id == Order.id).order_by(OrderItem.id).limit(1).correlate(Order).scalar_subquery()
+    
+    rows = db.session.query(
+        Order.id, Order.order_number, Order.customer_email, Order.total_amount,
+        Order.status, Order.created_at,
+        first_item_name.label('first_item_name'), item_count.label('item_count')
+    ).order_by(Order.created_at.desc()).limit(limit).all()
+    
+    recent_orders = []
+    for row in rows:
+        product_name = row.first_item_name or "N/A"
+        if row.first_item_name and row.item_count > 1:
+            product_name += f" (+{row.item_count - 1} more)"
+        
+        recent_orders.append({
+            'id': row.id,
+            'order_number': row.order_number,
+            'customer': row.customer_email,
+            'product': product_name,
+            'amount': f"₹{float(row.total_amount):,.0f}",
+            'status': row.status.value,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        })
+    return recent_orders
+
+def _build_dashboard(days):
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+    
+    # Sales, order and customer figures come from the daily rollups, so the
+    # cost does not grow with the number of orders in the window
+    rollup = dashboard_rollup_metrics(days)
+    total_revenue = rollup['total_revenue']  # Delivered orders only
+    total_orders = rollup['total_orders']
+    
+    # Product metrics
+    total_products = Product.query.filter_by(is_active=True).count()
+    low_stock_products = LowStockProduct.query.count()  # Materialized set, kept current on every stock change
+    
+    return {
+        'metrics': {
+            'total_revenue': total_revenue,
+            'total_orders': total_orders,
+            'total_products': total_products,
+            'low_stock_products': low_stock_products,
+            'total_customers': rollup['total_customers'],
+            'new_customers': rollup['new_customers'],
+            'pending_orders': rollup['pending_orders'],
+            'average_order_value': total_revenue / total_orders if total_orders > 0 else 0
+        },
+        'recent_orders': _recent_orders(),
+        'top_products': rollup['top_products'],
+        'date_range': {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'days': days
+        }
+    }
+
 @admin_bp.route('/dashboard', methods=['GET'])
 @admin_required
 def get_dashboard():
@@ -24,127 +102,132 @@ def get_dashboard():
     try:
         # Get date range for analytics
         days = request.args.get('days', 30, type=int)
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Sales metrics - only count delivered orders for revenue
-        revenue_query = db.session.query(
-            func.sum(Order.total_amount)
-        ).filter(
-            and_(
-                Order.created_at >= start_date,
-                Order.status == OrderStatus.DELIVERED
-            )
-        ).first()
-        
-        total_revenue = float(revenue_query[0]) if revenue_query[0] else 0
-        
-        # Total orders count - all orders in date range
-        total_orders = Order.query.filter(
-            Order.created_at >= start_date
-        ).count()
-        
-        # Product metrics
-        total_products = Product.query.filter_by(is_active=True).count()
-        low_stock_products = Product.query.filter(
-            and_(
-                Product.is_active == True,
-                Product.track_inventory == True,
-                Product.stock_quantity <= Product.low_stock_threshold
-            )
-        ).count()
-        
-        # User metrics
-        total_customers = User.query.filter_by(role=UserRole.CUSTOMER).count()
-        new_customers = User.query.filter(
-            and_(
-                User.role == UserRole.CUSTOMER,
-                User.created_at >= start_date
-            )
-        ).count()
-        
-        # Pending orders
-        pending_orders = Order.query.filter(
-            Order.status.in_([OrderStatus.PENDING, OrderStatus.CONFIRMED])
-        ).count()
-        
-        # Recent orders
-        recent_orders = Order.query.order_by(
-            Order.created_at.desc()
-        ).limit(10).all()
-        
-        # Format recent orders for dashboard display
-        formatted_recent_orders = []
-        for order in recent_orders:
-            # Get first product name from order items
-            product_name = "N/A"
-            if order.items:
-                first_item = order.items[0] if hasattr(order.items, '__iter__') else order.items.first()
-                if first_item:
-                    product_name = first_item.product_name
-                    if len(list(order.items)) > 1:
-                        product_name += f" (+{len(list(order.items)) - 1} more)"
-            
-            formatted_recent_orders.append({
-                'id': order.id,
-                'order_number': order.order_number,
-                'customer': order.customer_email,
-                'product': product_name,
-                'amount': f"₹{float(order.total_amount):,.0f}",
-                'status': order.status.value,
-                'created_at': order.created_at.isoformat() if order.created_at else None
-            })
-        
-        # Top selling products - only count delivered orders
-        top_products = db.session.query(
-            Product.name,
-            func.sum(OrderItem.quantity).label('total_sold'),
-            func.sum(OrderItem.total_price).label('total_revenue')
-        ).join(
-            OrderItem, Product.id == OrderItem.product_id
-        ).join(
-            Order, OrderItem.order_id == Order.id
-        ).filter(
-            and_(
-                Order.created_at >= start_date,
-                Order.status == OrderStatus.DELIVERED
-            )
-        ).group_by(
-            Product.id, Product.name
-        ).order_by(
-            func.sum(OrderItem.quantity).desc()
-        ).limit(5).all()
+        
+        # Admins' auto-refreshing dashboards share one computation per few seconds
+        dashboard = get_dashboard_cache().get_or_compute(('dashboard', days), lambda: _build_dashboard(days))
+        return jsonify(dashboard), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching dashboard data: {str(e)}")
+        return jsonify({'error': 'Failed to fetch dashboard data'}), 500
+
+@admin_bp.route('/analytics', methods=['GET'])
+@admin_required
+def get_sales_analytics():
+    """Get sales analytics by day, week or month (admin only)"""
+    try:
+        granularity = request.args.get('granularity', 'day')
+        group_by = request.args.get('group_by') or None
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"}), 400
+        if group_by and group_by not in GROUP_BY_OPTIONS:
+            return jsonify({'error': f"group_by must be one of: {', '.join(GROUP_BY_OPTIONS)}"}), 400
+        
+        # Either an explicit start_date/end_date (YYYY-MM-DD) or the last `days` days
+        try:
+            end = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() \
+                if request.args.get('end_date') else datetime.utcnow().date()
+            start = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() \
+                if request.args.get('start_date') else end - timedelta(days=request.args.get('days', 30, type=int) - 1)
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+        if start > end:
+            return jsonify({'error': 'start_date must not be after end_date'}), 400
+        if (end - start).days > current_app.config.get('ANALYTICS_MAX_DAYS', 1096):
+            return jsonify({'error': 'Date range is too long'}), 400
+        
+        analytics = get_dashboard_cache().get_or_compute(
+            ('analytics', start, end, granularity, group_by),
+            lambda: sales_analytics(start, end, granularity, group_by)
+        )
+        return jsonify({
+            **analytics,
+            'granularity': granularity,
+            'group_by': group_by,
+            'date_range': {
+                'start_date': start.isoformat(),
+                'end_date': end.isoformat()
+            }
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching sales analytics: {str(e)}")
+        return jsonify({'error': 'Failed to fetch sales analytics'}), 500
+
+# Customer Analytics
+
+@admin_bp.route('/analytics/cohorts', methods=['GET'])
+@admin_required
+def get_cohort_retention():
+    """Get the monthly cohort retention matrix (admin only)"""
+    try:
+        months = request.args.get('months', 12, type=int)
+        if months < 1 or months > 120:
+            return jsonify({'error': 'months must be between 1 and 120'}), 400
+        
+        today = datetime.utcnow().date().replace(day=1)
+        first = today.year * 12 + today.month - 1 - (months - 1)
+        since_month = today.replace(year=first // 12, month=first % 12 + 1)
+        
+        return jsonify({
+            'cohorts': cohort_matrix(since_month),
+            'months': months
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching cohort retention: {str(e)}")
+        return jsonify({'error': 'Failed to fetch cohort retention'}), 500
+
+@admin_bp.route('/analytics/customers', methods=['GET'])
+@admin_required
+def get_customer_lifetimes():
+    """Get customers ranked by lifetime value (admin only)"""
+    try:
+        page = request.args.get('page', 1)
+        per_page = request.args.get('per_page', 20)
+        sort = request.args.get('sort', 'total_spent')
+        cohort = request.args.get('cohort', '').strip()  # YYYY-MM
+        
+        page, per_page, pagination_errors = validate_pagination_params(page, per_page, 100)
+        if pagination_errors:
+            return jsonify({'errors': pagination_errors}), 400
+        
+        try:
+            ordering = lifetime_ordering(sort)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = db.session.query(CustomerLifetime, User).join(User, User.id == CustomerLifetime.user_id)
+        if cohort:
+            try:
+                query = query.filter(CustomerLifetime.cohort_month == datetime.strptime(cohort, '%Y-%m').date())
+            except ValueError:
+                return jsonify({'error': 'cohort must be in YYYY-MM format'}), 400
+        
+        pagination = query.order_by(*ordering).paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
-            'metrics': {
-                'total_revenue': total_revenue,
-                'total_orders': total_orders,
-                'total_products': total_products,
-                'low_stock_products': low_stock_products,
-                'total_customers': total_customers,
-                'new_customers': new_customers,
-                'pending_orders': pending_orders,
-                'average_order_value': total_revenue / total_orders if total_orders > 0 else 0
-            },
-            'recent_orders': formatted_recent_orders,
-            'top_products': [
+            'customers': [
                 {
-                    'name': product[0],
-                    'total_sold': product[1],
-                    'total_revenue': float(product[2])
+                    **lifetime.to_dict(),
+                    'email': user.email,
+                    'name': f"{user.first_name} {user.last_name}"
                 }
-                for product in top_products
+                for lifetime, user in pagination.items
             ],
-            'date_range': {
-                'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat(),
-                'days': days
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
             }
         }), 200
     
     except Exception as e:
-        current_app.logger.error(f"Error fetching dashboard data: {str(e)}")
-        return jsonify({'error': 'Failed to fetch dashboard data'}), 500
+        current_app.logger.error(f"Error fetching customer lifetimes: {str(e)}")
+        return jsonify({'error': 'Failed to fetch customer lifetimes'}), 500
 
 # Order Management
 
@@ -236,56 +319,20 @@ def update_order_status(order_id):
                 'valid_statuses': [s.value for s in OrderStatus]
             }), 400
         
-        old_status = order.status
-        order.status = new_status
-        
-        # Handle stock reduction when order is confirmed
-        if new_status == OrderStatus.CONFIRMED and old_status != OrderStatus.CONFIRMED:
-            for item in order.items:
-                product = Product.query.get(item.product_id)
-                if product and product.track_inventory:
-                    if product.stock_quantity >= item.quantity:
-                        product.stock_quantity -= item.quantity
-                        current_app.logger.info(f"Reduced stock for product {product.id} by {item.quantity}")
-                    else:
-                        # Log warning but don't block the order
-                        current_app.logger.warning(f"Insufficient stock for product {product.id}: requested {item.quantity}, available {product.stock_quantity}")
-        
-        # Handle stock restoration when order is cancelled or returned
-        elif new_status in [OrderStatus.CANCELLED, OrderStatus.RETURNED] and old_status == OrderStatus.CONFIRMED:
-            for item in order.items:
-                product = Product.query.get(item.product_id)
-                if product and product.track_inventory:
-                    product.stock_quantity += item.quantity
-                    current_app.logger.info(f"Restored stock for product {product.id} by {item.quantity}")
-        
-        # Handle shipping information
-        if new_status == OrderStatus.SHIPPED:
-            order.shipped_at = datetime.utcnow()
-            if 'tracking_number' in data:
-                order.tracking_number = data['tracking_number']
-            if 'shipping_method' in data:
-                order.shipping_method = data['shipping_method']
-        
-        elif new_status == OrderStatus.DELIVERED:
-            order.delivered_at = datetime.utcnow()
-            if not order.shipped_at:
-                order.shipped_at = datetime.utcnow()
-        
-        # Add admin notes if provided
-        if 'notes' in data:
-            timestamp = datetime.utcnow().isoformat()
-            new_note = f"[{timestamp}] Status changed from {old_status.value} to {new_status.value}. {data['notes']}"
-            order.admin_notes = f"{order.admin_notes}\n{new_note}" if order.admin_notes else new_note
+        try:
+            changed = transition_order(
+                order, new_status,
+                tracking_number=data.get('tracking_number'),
+                shipping_method=data.get('shipping_method'),
+                notes=data.get('notes')
+            )
+        except InvalidTransition as e:
+            return jsonify({'error': str(e)}), 400
         
         db.session.commit()
         
-        # Send notification email if order shipped
-        if new_status == OrderStatus.SHIPPED and old_status != OrderStatus.SHIPPED:
-            try:
-                send_order_shipped_email(order.customer_email, order)
-            except Exception as e:
-                current_app.logger.error(f"Failed to send shipping notification: {str(e)}")
+        if changed:
+            queue_status_emails([order.id], new_status)
         
         return jsonify({
             'message': 'Order status updated successfully',
@@ -479,66 +526,250 @@ def update_product(product_id):
         current_app.logger.error(f"Error updating product: {str(e)}")
         return jsonify({'error': 'Failed to update product'}), 500
 
+@admin_bp.route('/products/low-stock', methods=['GET'])
+@admin_required
+def get_low_stock_products():
+    """Products at or below their low stock threshold, lowest stock first"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        threshold = request.args.get('threshold', type=int)
+        
+        # Validate pagination
+        page, per_page, pagination_errors = validate_pagination_params(page, per_page, 100)
+        if pagination_errors:
+            return jsonify({'errors': pagination_errors}), 400
+        
+        query = db.session.query(LowStockProduct, Product.name, Product.sku).join(
+            Product, Product.id == LowStockProduct.product_id
+        )
+        # Optionally narrow to products at or below a stock level
+        if threshold is not None:
+            query = query.filter(LowStockProduct.stock_quantity <= threshold)
+        
+        pagination = query.order_by(
+            LowStockProduct.stock_quantity, LowStockProduct.product_id
+        ).paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'products': [
+                {**entry.to_dict(), 'name': name, 'sku': sku}
+                for entry, name, sku in pagination.items
+            ],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching low stock products: {str(e)}")
+        return jsonify({'error': 'Failed to fetch low stock products'}), 500
+
+@admin_bp.route('/products/forecast', methods=['GET'])
+@admin_required
+def get_product_forecasts():
+    """Sales velocity and days-until-stockout per product, from the last forecast run"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        sort = request.args.get('sort', 'days_until_stockout')
+        order = request.args.get('order', 'asc')
+        
+        # Validate pagination
+        page, per_page, pagination_errors = validate_pagination_params(page, per_page, 100)
+        if pagination_errors:
+            return jsonify({'errors': pagination_errors}), 400
+        
+        if sort not in FORECAST_SORT_OPTIONS:
+            return jsonify({'error': f'sort must be one of: {", ".join(FORECAST_SORT_OPTIONS)}'}), 400
+        if order not in ('asc', 'desc'):
+            return jsonify({'error': 'order must be asc or desc'}), 400
+        
+        column = getattr(ProductForecast, sort)
+        # Products that aren't selling have no stockout date and sort last either way
+        ordering = (column.asc() if order == 'asc' else column.desc()).nulls_last()
+        
+        pagination = db.session.query(ProductForecast, Product.name, Product.sku).join(
+            Product, Product.id == ProductForecast.product_id
+        ).order_by(ordering, ProductForecast.product_id).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'products': [
+                {**forecast.to_dict(), 'name': name, 'sku': sku}
+                for forecast, name, sku in pagination.items
+            ],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching product forecasts: {str(e)}")
+        return jsonify({'error': 'Failed to fetch product forecasts'}), 500
+
+@admin_bp.route('/products/bulk', methods=['PATCH'])
+@admin_required
+@validate_json
+def bulk_update_products():
+    """Update price, stock and flags of many products, addressed by id or SKU"""
+    try:
+        data = request.get_json()
+        rows = data.get('products') if isinstance(data, dict) else data
+        
+        limit = current_app.config.get('BULK_PRODUCT_UPDATE_LIMIT', 1000)
+        if isinstance(rows, list) and len(rows) > limit:
+            return jsonify({'error': f'At most {limit} products can be updated at once'}), 400
+        
+        try:
+            updated, not_found = apply_product_updates(rows)
+        except SkuConflict as e:
+            return jsonify({'errors': e.errors}), 409
+        except BulkUpdateError as e:
+            return jsonify({'errors': e.errors}), 400
+        
+        db.session.commit()
+        get_dashboard_cache().invalidate()
+        
+        return jsonify({
+            'message': f'{len(updated)} products updated',
+            'updated': updated,
+            'not_found': not_found
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error bulk updating products: {str(e)}")
+        return jsonify({'error': 'Failed to update products'}), 500
+
 # User Management
 
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
 def get_all_users():
-    """Get all users with pagination"""
+    """Get all users (newest first, cursor paginated)"""
     try:
-        page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor', '').strip()
         search = request.args.get('search', '').strip()
         role = request.args.get('role', '').strip()
         
         # Validate pagination
-        page, per_page, pagination_errors = validate_pagination_params(page, per_page, 100)
+        _, per_page, pagination_errors = validate_pagination_params(1, per_page, 100)
         if pagination_errors:
             return jsonify({'errors': pagination_errors}), 400
         
-        # Build query
-        query = User.query
-        
-        # Apply search filter
-        if search:
-            query = query.filter(
-                or_(
-                    User.email.ilike(f'%{search}%'),
-                    User.first_name.ilike(f'%{search}%'),
-                    User.last_name.ilike(f'%{search}%'),
-                    User.phone.ilike(f'%{search}%')
-                )
-            )
-        
         # Apply role filter
+        role_enum = None
         if role:
             try:
                 role_enum = UserRole(role)
-                query = query.filter_by(role=role_enum)
             except ValueError:
                 return jsonify({'error': 'Invalid user role'}), 400
         
-        # Execute query with pagination
-        users_pagination = query.order_by(User.created_at.desc()).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Indexed search and keyset pagination on (created_at, id)
+        try:
+            rows, next_cursor, total = list_users(
+                db.session.connection(), User.__table__, per_page=per_page,
+                term=search or None, role=role_enum, cursor=cursor or None
+            )
+        except UserSearchError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        ids = [row.id for row in rows]
+        users_by_id = {user.id: user for user in User.query.filter(User.id.in_(ids)).all()} if ids else {}
         
-        users = users_pagination.items
+        pagination = {
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+        if total is not None:
+            # Only computed for the first page; an estimate on large tables
+            pagination['total'], pagination['total_is_estimate'] = total
         
         return jsonify({
-            'users': [user.to_dict() for user in users],
+            'users': [users_by_id[user_id].to_dict() for user_id in ids if user_id in users_by_id],
+            'pagination': pagination
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching users: {str(e)}")
+        return jsonify({'error': 'Failed to fetch users'}), 500
+
+# Email Log
+
+@admin_bp.route('/email-logs', methods=['GET'])
+@admin_required
+def get_email_logs():
+    """Search the email delivery log (newest first, cursor paginated)"""
+    try:
+        per_page = request.args.get('per_page', 50, type=int)
+        cursor = request.args.get('cursor', type=int)
+        status = request.args.get('status', '').strip()
+        recipient = request.args.get('recipient', '').strip().lower()
+        template = request.args.get('template', '').strip()
+        order_id = request.args.get('order_id', type=int)
+        appointment_id = request.args.get('appointment_id', type=int)
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        
+        # Validate pagination
+        _, per_page, pagination_errors = validate_pagination_params(1, per_page, 200)
+        if pagination_errors:
+            return jsonify({'errors': pagination_errors}), 400
+        
+        query = EmailLog.query
+        
+        # Every filter below is backed by an index on email_logs
+        if status:
+            try:
+                query = query.filter(EmailLog.status == EmailStatus(status.upper()))
+            except ValueError:
+                return jsonify({'error': 'Invalid email status'}), 400
+        
+        if recipient:
+            query = query.filter(EmailLog.recipient == recipient)
+        
+        if template:
+            query = query.filter(EmailLog.template == template)
+        
+        if order_id:
+            query = query.filter(EmailLog.order_id == order_id)
+        
+        if appointment_id:
+            query = query.filter(EmailLog.appointment_id == appointment_id)
+        
+        try:
+            if start_date:
+                query = query.filter(EmailLog.created_at >= datetime.fromisoformat(start_date))
+            if end_date:
+                query = query.filter(EmailLog.created_at < datetime.fromisoformat(end_date))
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use ISO 8601'}), 400
+        
+        logs, next_cursor = keyset_page(query, per_page, cursor)
+        
+        return jsonify({
+            'emails': [log.to_dict() for log in logs],
             'pagination': {
-                'page': page,
                 'per_page': per_page,
-                'total': users_pagination.total,
-                'pages': users_pagination.pages,
-                'has_next': users_pagination.has_next,
-                'has_prev': users_pagination.has_prev
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
             }
         }), 200
     
     except Exception as e:
-        current_app.logger.error(f"Error fetching users: {str(e)}")
-        return jsonify({'error': 'Failed to fetch users'}), 500
\ No newline at end of file
+        current_app.logger.error(f"Error fetching email logs: {str(e)}")
+        return jsonify({'error': 'Failed to fetch email logs'}), 500
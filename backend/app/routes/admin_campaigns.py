@@ -0,0 +1,191 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import db
+from app.models.email_campaign import EmailCampaign, CampaignStatus, CampaignAudience
+from app.utils.auth import admin_required
+from app.utils.validators import validate_pagination_params, validate_json
+from app.services.campaign_service import (
+    RESERVED_CONTENT_KEYS,
+    claim_campaign,
+    is_campaign_template,
+    start_campaign_in_background
+)
+
+admin_campaigns_bp = Blueprint('admin_campaigns', __name__)
+
+@admin_campaigns_bp.route('', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_campaigns():
+    """Get all email campaigns (admin only)"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+
+        page, per_page, pagination_errors = validate_pagination_params(page, per_page, 100)
+        if pagination_errors:
+            return jsonify({'errors': pagination_errors}), 400
+
+        campaigns_pagination = EmailCampaign.query.order_by(EmailCampaign.id.desc()).paginate(
+            page=page,
+            per_page=per_page,
+            error_out=False
+        )
+
+        return jsonify({
+            'campaigns': [campaign.to_dict() for campaign in campaigns_pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': campaigns_pagination.total,
+                'pages': campaigns_pagination.pages,
+                'has_next': campaigns_pagination.has_next,
+                'has_prev': campaigns_pagination.has_prev
+            }
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching campaigns: {str(e)}")
+        return jsonify({'error': 'Failed to fetch campaigns'}), 500
+
+@admin_campaigns_bp.route('', methods=['POST'])
+@jwt_required()
+@admin_required
+@validate_json
+def create_campaign():
+    """Create a draft email campaign (admin only)"""
+    try:
+        data = request.get_json()
+
+        name = (data.get('name') or '').strip()
+        subject = (data.get('subject') or '').strip()
+        if not name or not subject:
+            return jsonify({'error': 'Name and subject are required'}), 400
+
+        template = (data.get('template') or 'campaign').strip()
+        if not is_campaign_template(template):
+            return jsonify({'error': f'Unknown campaign template: {template}'}), 400
+
+        try:
+            audience = CampaignAudience((data.get('audience') or 'CUSTOMERS').upper())
+        except ValueError:
+            return jsonify({'error': 'Invalid audience'}), 400
+
+        try:
+            rate_limit = float(data.get('rate_limit', current_app.config.get('CAMPAIGN_RATE_LIMIT', 10)))
+            concurrency = int(data.get('concurrency', current_app.config.get('CAMPAIGN_CONCURRENCY', 2)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'rate_limit and concurrency must be numbers'}), 400
+
+        if rate_limit <= 0 or not 1 <= concurrency <= current_app.config.get('MAIL_POOL_SIZE', 4):
+            return jsonify({
+                'error': 'rate_limit must be positive and concurrency between 1 and MAIL_POOL_SIZE'
+            }), 400
+
+        content = data.get('content') or {}
+        if not isinstance(content, dict):
+            return jsonify({'error': 'Content must be an object'}), 400
+
+        reserved = sorted(RESERVED_CONTENT_KEYS.intersection(content))
+        if reserved:
+            return jsonify({'error': f"Content cannot set reserved keys: {', '.join(reserved)}"}), 400
+
+        campaign = EmailCampaign(
+            name=name,
+            subject=subject,
+            template=template,
+            audience=audience,
+            verified_only=bool(data.get('verified_only', False)),
+            rate_limit=rate_limit,
+            concurrency=concurrency,
+            created_by=int(get_jwt_identity())
+        )
+        campaign.set_content(content)
+
+        db.session.add(campaign)
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Campaign created successfully',
+            'campaign': campaign.to_dict()
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error creating campaign: {str(e)}")
+        return jsonify({'error': 'Failed to create campaign'}), 500
+
+@admin_campaigns_bp.route('/<int:campaign_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_campaign(campaign_id):
+    """Get campaign progress (admin only)"""
+    try:
+        campaign = EmailCampaign.query.get(campaign_id)
+
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
+
+        return jsonify({'campaign': campaign.to_dict()}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching campaign {campaign_id}: {str(e)}")
+        return jsonify({'error': 'Failed to fetch campaign'}), 500
+
+@admin_campaigns_bp.route('/<int:campaign_id>/start', methods=['POST'])
+@jwt_required()
+@admin_required
+def start_campaign(campaign_id):
+    """Start or resume sending a campaign (admin only)"""
+    try:
+        campaign = EmailCampaign.query.get(campaign_id)
+
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
+
+        runner_id = claim_campaign(campaign_id, current_app.config.get('CAMPAIGN_STALE_AFTER', 300))
+        if not runner_id:
+            return jsonify({'error': f'Campaign cannot be started while {campaign.status.value}'}), 409
+
+        start_campaign_in_background(current_app._get_current_object(), campaign_id, runner_id)
+
+        db.session.refresh(campaign)
+        return jsonify({
+            'message': 'Campaign started',
+            'campaign': campaign.to_dict()
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error starting campaign {campaign_id}: {str(e)}")
+        return jsonify({'error': 'Failed to start campaign'}), 500
+
+@admin_campaigns_bp.route('/<int:campaign_id>/pause', methods=['POST'])
+@jwt_required()
+@admin_required
+def pause_campaign(campaign_id):
+    """Pause a running campaign after its current batch (admin only)"""
+    try:
+        campaign = EmailCampaign.query.get(campaign_id)
+
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
+
+        paused = EmailCampaign.query.filter_by(
+            id=campaign_id, status=CampaignStatus.RUNNING
+        ).update({'status': CampaignStatus.PAUSED}, synchronize_session=False)
+        db.session.commit()
+
+        if not paused:
+            return jsonify({'error': 'Campaign is not running'}), 409
+
+        db.session.refresh(campaign)
+        return jsonify({
+            'message': 'Campaign paused',
+            'campaign': campaign.to_dict()
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error pausing campaign {campaign_id}: {str(e)}")
+        return jsonify({'error': 'Failed to pause campaign'}), 500
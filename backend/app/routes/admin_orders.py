@@ -1,14 +1,13 @@
-from flask import Blueprint, request, jsonify, current_app
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required
 from app.models import db, Order, OrderStatus
 from app.utils.auth import admin_required
 from app.utils.validators import validate_pagination_params, validate_json
-from app.services.email_service import (
-    send_order_confirmation_email,
-    send_order_shipped_email,
-    send_order_out_for_delivery_email,
-    send_order_delivered_email,
-    send_order_cancelled_email
+from app.services.order_export import generate_export, FORMATS as EXPORT_FORMATS
+from app.services.order_search import search_orders as find_orders, SearchError
+from app.services.order_workflow import (
+    bulk_transition, transition_order, queue_status_emails, InvalidTransition
 )
 
 admin_orders_bp = Blueprint('admin_orders', __name__)
@@ -64,6 +63,103 @@ def get_all_orders():
         current_app.logger.error(f"Error fetching all orders: {str(e)}")
         return jsonify({'error': 'Failed to fetch orders'}), 500
 
+@admin_orders_bp.route('/search', methods=['GET'])
+@jwt_required()
+@admin_required
+def search_orders():
+    """Search orders by number, email, product, status and date (admin only, cursor paginated)"""
+    try:
+        per_page = request.args.get('per_page', 20, type=int)
+        status = request.args.get('status', '').strip()
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        
+        # Validate pagination
+        _, per_page, pagination_errors = validate_pagination_params(1, per_page, 100)
+        if pagination_errors:
+            return jsonify({'errors': pagination_errors}), 400
+        
+        filters = {
+            'order_number': request.args.get('order_number', '').strip(),
+            'email': request.args.get('email', '').strip(),
+            'product': request.args.get('product', '').strip(),
+            'cursor': request.args.get('cursor', '').strip()
+        }
+        if status:
+            try:
+                filters['status'] = OrderStatus(status.upper())
+            except ValueError:
+                return jsonify({'error': 'Invalid order status'}), 400
+        
+        try:
+            if start_date:
+                filters['start'] = datetime.fromisoformat(start_date)
+            if end_date:
+                filters['end'] = datetime.fromisoformat(end_date)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use ISO 8601'}), 400
+        
+        try:
+            orders, next_cursor = find_orders(per_page=per_page, **filters)
+        except SearchError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'orders': [order.to_dict() for order in orders],
+            'pagination': {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            }
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error searching orders: {str(e)}")
+        return jsonify({'error': 'Failed to search orders'}), 500
+
+@admin_orders_bp.route('/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_orders():
+    """Stream orders with their items as CSV or NDJSON (admin only)"""
+    try:
+        export_format = request.args.get('format', 'csv').strip().lower()
+        status = request.args.get('status', '').strip()
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        filters = {}
+        if status:
+            try:
+                filters['status'] = OrderStatus(status.upper())
+            except ValueError:
+                return jsonify({'error': 'Invalid order status'}), 400
+        
+        try:
+            if start_date:
+                filters['start'] = datetime.fromisoformat(start_date)
+            if end_date:
+                filters['end'] = datetime.fromisoformat(end_date)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use ISO 8601'}), 400
+        
+        filename = f"orders-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+        return Response(
+            stream_with_context(generate_export(export_format, **filters)),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'X-Accel-Buffering': 'no'  # Let proxies pass chunks through as they are produced
+            }
+        )
+    
+    except Exception as e:
+        current_app.logger.error(f"Error exporting orders: {str(e)}")
+        return jsonify({'error': 'Failed to export orders'}), 500
+
 @admin_orders_bp.route('/<int:order_id>', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -87,26 +183,13 @@ def get_order_details(order_id):
 @admin_required
 def update_order_status(order_id):
     """Update order status (admin only)"""
-    current_app.logger.error(f"!!!!! UPDATE_ORDER_STATUS FUNCTION ENTERED - ORDER ID: {order_id} !!!!!")
-    print(f"========== UPDATE ORDER STATUS CALLED FOR ORDER {order_id} ==========", flush=True)
-    print(f"Request method: {request.method}", flush=True)
-    print(f"Request content type: {request.content_type}", flush=True)
-    print(f"Request data: {request.data}", flush=True)
-    
     try:
-        # Try to get JSON data
         data = request.get_json(force=True, silent=True)
-        print(f"Parsed data: {data}")
         
         if not data:
-            current_app.logger.error(f"No data received. request.data: {request.data}")
-            current_app.logger.error(f"Content-Type: {request.content_type}")
             return jsonify({'error': 'No data provided'}), 400
         
-        current_app.logger.info(f"Updating order {order_id} with data: {data}")
-        
         if 'status' not in data:
-            current_app.logger.error(f"'status' field missing from data: {data}")
             return jsonify({'error': 'Status is required'}), 400
         
         order = Order.query.get(order_id)
@@ -115,50 +198,97 @@ def update_order_status(order_id):
             return jsonify({'error': 'Order not found'}), 404
         
         try:
-            status_upper = data['status'].upper()
-            current_app.logger.info(f"Attempting to set status to: {status_upper}")
-            new_status = OrderStatus(status_upper)
-            old_status = order.status
-            order.status = new_status
-            db.session.commit()
-            
-            current_app.logger.info(f"Order {order_id} status updated successfully to {new_status}")
-            
-            # Send email notification based on status change
-            if order.customer_email and new_status != old_status:
-                try:
-                    if new_status == OrderStatus.CONFIRMED:
-                        send_order_confirmation_email(order.customer_email, order)
-                        current_app.logger.info(f"Order confirmation email sent to {order.customer_email}")
-                    elif new_status == OrderStatus.SHIPPED:
-                        send_order_shipped_email(order.customer_email, order)
-                        current_app.logger.info(f"Order shipped email sent to {order.customer_email}")
-                    elif new_status == OrderStatus.OUT_FOR_DELIVERY:
-                        send_order_out_for_delivery_email(order.customer_email, order)
-                        current_app.logger.info(f"Order out for delivery email sent to {order.customer_email}")
-                    elif new_status == OrderStatus.DELIVERED:
-                        send_order_delivered_email(order.customer_email, order)
-                        current_app.logger.info(f"Order delivered email sent to {order.customer_email}")
-                    elif new_status == OrderStatus.CANCELLED:
-                        send_order_cancelled_email(order.customer_email, order)
-                        current_app.logger.info(f"Order cancelled email sent to {order.customer_email}")
-                except Exception as e:
-                    current_app.logger.error(f"Failed to send order status email: {str(e)}")
-            
-            return jsonify({
-                'message': 'Order status updated successfully',
-                'order': order.to_dict(include_items=True)
-            }), 200
-        except ValueError as ve:
-            current_app.logger.error(f"Invalid status value: {data['status']} (uppercase: {data['status'].upper()}). Valid values: {[s.value for s in OrderStatus]}")
+            new_status = OrderStatus(data['status'].upper())
+        except ValueError:
             return jsonify({
                 'error': f'Invalid order status: {data["status"]}',
                 'valid_statuses': [s.value for s in OrderStatus]
             }), 400
+        
+        try:
+            changed = transition_order(
+                order, new_status,
+                tracking_number=data.get('tracking_number'),
+                shipping_method=data.get('shipping_method'),
+                notes=data.get('notes')
+            )
+        except InvalidTransition as e:
+            return jsonify({'error': str(e)}), 400
+        
+        db.session.commit()
+        current_app.logger.info(f"Order {order_id} status updated successfully to {new_status}")
+        
+        if changed:
+            queue_status_emails([order.id], new_status)
+        
+        return jsonify({
+            'message': 'Order status updated successfully',
+            'order': order.to_dict(include_items=True)
+        }), 200
     
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error updating order {order_id} status: {str(e)}")
-        import traceback
-        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': 'Failed to update order status'}), 500
+
+@admin_orders_bp.route('/bulk-status', methods=['POST'])
+@jwt_required()
+@admin_required
+def bulk_update_order_status():
+    """Move many orders to one status in a single transaction (admin only)
+    
+    Orders the state machine won't move are reported under ``rejected`` and
+    left alone; the others are updated together. Customer emails are sent
+    in the background after the commit.
+    """
+    try:
+        data = request.get_json(force=True, silent=True)
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        order_ids = data.get('order_ids')
+        if not isinstance(order_ids, list) or not order_ids:
+            return jsonify({'error': 'order_ids must be a non-empty list'}), 400
+        
+        try:
+            order_ids = sorted({int(order_id) for order_id in order_ids})
+        except (TypeError, ValueError):
+            return jsonify({'error': 'order_ids must be integers'}), 400
+        
+        limit = current_app.config.get('BULK_ORDER_STATUS_LIMIT', 500)
+        if len(order_ids) > limit:
+            return jsonify({'error': f'At most {limit} orders can be updated at once'}), 400
+        
+        if 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        try:
+            new_status = OrderStatus(str(data['status']).upper())
+        except ValueError:
+            return jsonify({
+                'error': f'Invalid order status: {data["status"]}',
+                'valid_statuses': [s.value for s in OrderStatus]
+            }), 400
+        
+        summary = bulk_transition(
+            order_ids, new_status,
+            tracking_number=data.get('tracking_number'),
+            shipping_method=data.get('shipping_method'),
+            notes=data.get('notes')
+        )
+        db.session.commit()
+        current_app.logger.info(f"Bulk status update to {new_status}: {len(summary['updated'])} orders changed")
+        
+        queue_status_emails(summary['updated'], new_status)
+        
+        return jsonify({
+            'message': f"{len(summary['updated'])} orders updated",
+            'status': new_status.value,
+            **summary
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error in bulk order status update: {str(e)}")
         return jsonify({'error': 'Failed to update order status'}), 500
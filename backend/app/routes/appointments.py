@@ -3,16 +3,67 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import db, Appointment, AppointmentType, AppointmentStatus, User
 from app.utils.auth import admin_required
 from app.utils.validators import validate_json, validate_required_fields
+from app.utils.rate_limit import rate_limit
 from app.services.email_service import (
     send_appointment_confirmed_email,
     send_appointment_completed_email,
     send_appointment_cancelled_email
 )
+from app.services.appointment_calendar import (
+    InvalidSlot,
+    SlotUnavailable,
+    apply_booking_change,
+    booking_of,
+    day_availability,
+    get_calendar,
+    month_availability,
+    normalize_time
+)
 from datetime import datetime, date
 
 appointments_bp = Blueprint('appointments', __name__)
 
+
+def slot_taken_response(day, appointment_type):
+    """409 listing the times still free that day (rolls back the session)"""
+    db.session.rollback()
+    return jsonify({
+        'error': 'That time slot is no longer available',
+        'available_times': day_availability(day, appointment_type)
+    }), 409
+
+
+@appointments_bp.route('/availability', methods=['GET'])
+def get_availability():
+    """Free start times for every day of a month (month=YYYY-MM, type=appointment type)"""
+    try:
+        calendar = get_calendar()
+        month = request.args.get('month') or calendar.now().strftime('%Y-%m')
+        try:
+            first = datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid month. Use YYYY-MM'}), 400
+        
+        try:
+            appointment_type = AppointmentType(request.args.get('type', ''))
+        except ValueError:
+            return jsonify({'error': f"Invalid appointment type. Must be one of: {', '.join([t.value for t in AppointmentType])}"}), 400
+        
+        return jsonify({
+            'month': first.strftime('%Y-%m'),
+            'appointment_type': appointment_type.value,
+            'slot_minutes': calendar.slot_minutes,
+            'duration_minutes': calendar.slots_for(appointment_type) * calendar.slot_minutes,
+            'days': month_availability(first.year, first.month, appointment_type)
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error fetching appointment availability: {str(e)}")
+        return jsonify({'error': 'Failed to fetch availability'}), 500
+
+
 @appointments_bp.route('', methods=['POST'])
+@rate_limit('appointments')
 @jwt_required(optional=True)
 @validate_json
 def create_appointment():
@@ -51,6 +102,11 @@ def create_appointment():
         except ValueError:
             return jsonify({'error': f"Invalid appointment type. Must be one of: {', '.join([t.value for t in AppointmentType])}"}), 400
         
+        try:
+            appointment_time = normalize_time(data['appointment_time'])
+        except InvalidSlot as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Create appointment
         appointment = Appointment(
             user_id=user_id,
@@ -59,11 +115,20 @@ def create_appointment():
             guest_phone=data.get('guest_phone'),
             appointment_type=appointment_type,
             appointment_date=appointment_date,
-            appointment_time=data['appointment_time'],
+            appointment_time=appointment_time,
             notes=data.get('notes', ''),
             status=AppointmentStatus.CONFIRMED
         )
         
+        # Take a place in the calendar; the day stays locked until commit
+        try:
+            apply_booking_change(appointment)
+        except InvalidSlot as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        except SlotUnavailable:
+            return slot_taken_response(appointment_date, appointment_type)
+        
         db.session.add(appointment)
         db.session.commit()
         
@@ -141,6 +206,7 @@ def update_appointment(appointment_id):
             return jsonify({'error': 'Appointment not found'}), 404
         
         data = request.get_json()
+        before = booking_of(appointment)
         
         # Update allowed fields
         if 'appointment_date' in data:
@@ -150,7 +216,11 @@ def update_appointment(appointment_id):
                 return jsonify({'error': 'Invalid date format'}), 400
         
         if 'appointment_time' in data:
-            appointment.appointment_time = data['appointment_time']
+            try:
+                appointment.appointment_time = normalize_time(data['appointment_time'])
+            except InvalidSlot as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 400
         
         if 'notes' in data:
             appointment.notes = data['notes']
@@ -161,6 +231,14 @@ def update_appointment(appointment_id):
             except ValueError:
                 return jsonify({'error': 'Invalid status'}), 400
         
+        try:
+            apply_booking_change(appointment, before)
+        except InvalidSlot as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        except SlotUnavailable:
+            return slot_taken_response(appointment.appointment_date, appointment.appointment_type)
+        
         db.session.commit()
         
         return jsonify({
@@ -185,7 +263,9 @@ def cancel_appointment(appointment_id):
         if not appointment:
             return jsonify({'error': 'Appointment not found'}), 404
         
+        before = booking_of(appointment)
         appointment.status = AppointmentStatus.CANCELLED
+        apply_booking_change(appointment, before)
         db.session.commit()
         
         # Send appointment cancellation email
@@ -244,11 +324,14 @@ def update_appointment_status(appointment_id):
         if 'status' not in data:
             return jsonify({'error': 'Status is required'}), 400
         
+        before = booking_of(appointment)
         try:
             appointment.status = AppointmentStatus(data['status'])
         except ValueError:
             return jsonify({'error': f"Invalid status. Must be one of: {', '.join([s.value for s in AppointmentStatus])}"}), 400
         
+        # Staff may confirm past or over-capacity appointments
+        apply_booking_change(appointment, before, enforce=False)
         db.session.commit()
         
         # Send email notifications based on status change
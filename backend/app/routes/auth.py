@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, jwt_required, get_jwt, get_jwt_identity
 from app.models import db, User, UserRole
 from app.utils.auth import (
     validate_password_strength, 
@@ -11,7 +11,11 @@ from app.utils.auth import (
     handle_auth_errors
 )
 from app.utils.validators import validate_json, validate_email, validate_required_fields
+from app.utils.rate_limit import rate_limit
 from app.services.email_service import send_verification_email, send_password_reset_email
+from app.services.user_cache import token_claims
+from app.services.token_blocklist import revoke_tokens, revoke_user_tokens
+from app.services.password_hasher import hash_password, verify_user_password
 from datetime import datetime, timedelta
 import traceback
 from sqlalchemy.exc import IntegrityError
@@ -56,6 +60,7 @@ def register():
     
     # Sanitize user data
     sanitized_data = sanitize_user_data(data)
+    password_hash = hash_password(data['password'])
     
     try:
         # Create new user
@@ -67,7 +72,7 @@ def register():
             role=UserRole.CUSTOMER,
             verification_token=generate_verification_token()
         )
-        user.set_password(data['password'])
+        user.password_hash = password_hash
         
         db.session.add(user)
         db.session.commit()
@@ -79,7 +84,7 @@ def register():
             current_app.logger.error(f"Failed to send verification email: {str(e)}")
         
         # Create access token - identity must be a string
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
         refresh_token = create_refresh_token(identity=str(user.id))
         
         return jsonify({
@@ -102,6 +107,7 @@ def register():
         return jsonify({'error': 'Registration failed', 'details': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('login')
 @validate_json
 @handle_auth_errors
 def login():
@@ -121,18 +127,14 @@ def login():
     # Find user by email
     user = User.query.filter_by(email=email).first()
     
-    # Debug logging
-    current_app.logger.info(f"Login attempt - Email: {email}, User found: {user is not None}")
-    if user:
-        password_check = user.check_password(password)
-        current_app.logger.info(f"Password check result: {password_check}")
-        current_app.logger.info(f"User role: {user.role}")
-    
-    if not user or not user.check_password(password):
+    if not user or not verify_user_password(user, password):
         return jsonify({'error': 'Invalid email or password'}), 401
     
+    if db.session.is_modified(user):
+        db.session.commit()  # Password rehashed at the current cost
+    
     # Create tokens - identity must be a string
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
     refresh_token = create_refresh_token(identity=str(user.id))
     
     return jsonify({
@@ -153,12 +155,31 @@ def refresh():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    new_access_token = create_access_token(identity=str(current_user_id))
+    new_access_token = create_access_token(identity=str(current_user_id), additional_claims=token_claims(user))
     
     return jsonify({
         'access_token': new_access_token
     }), 200
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoke the presented token, and the refresh token if one is sent"""
+    payloads = [get_jwt()]
+    
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            payload = decode_token(refresh_token)
+            if payload['sub'] == payloads[0]['sub']:
+                payloads.append(payload)
+        except Exception:
+            pass  # Expired or already revoked: nothing left to revoke
+    
+    revoke_tokens(payloads)
+    
+    return jsonify({'message': 'Logged out successfully'}), 200
+
 @auth_bp.route('/verify-email', methods=['POST'])
 @validate_json
 def verify_email():
@@ -244,6 +265,7 @@ def forgot_password():
 
 @auth_bp.route('/reset-password', methods=['POST'])
 @validate_json
+@handle_auth_errors
 def reset_password():
     """Reset password with token"""
     data = request.get_json()
@@ -270,16 +292,18 @@ def reset_password():
         return jsonify(format_validation_errors(password_errors)), 400
     
     # Update password
-    user.set_password(data['new_password'])
+    user.password_hash = hash_password(data['new_password'])
     user.reset_password_token = None
     user.reset_password_expires = None
-    db.session.commit()
+    # Commits, and signs out every session holding an older token
+    revoke_user_tokens(user.id)
     
     return jsonify({'message': 'Password reset successfully'}), 200
 
 @auth_bp.route('/change-password', methods=['POST'])
 @jwt_required()
 @validate_json
+@handle_auth_errors
 def change_password():
     """Change user password (authenticated)"""
     data = request.get_json()
@@ -296,7 +320,7 @@ def change_password():
         return jsonify({'error': 'User not found'}), 404
     
     # Verify current password
-    if not user.check_password(data['current_password']):
+    if not verify_user_password(user, data['current_password']):
         return jsonify({'error': 'Current password is incorrect'}), 400
     
     # Validate new password
@@ -304,11 +328,15 @@ def change_password():
     if password_errors:
         return jsonify(format_validation_errors(password_errors)), 400
     
-    # Update password
-    user.set_password(data['new_password'])
-    db.session.commit()
+    # Update password; other sessions are signed out and this one gets fresh tokens
+    user.password_hash = hash_password(data['new_password'])
+    revoke_user_tokens(user.id)
     
-    return jsonify({'message': 'Password changed successfully'}), 200
+    return jsonify({
+        'message': 'Password changed successfully',
+        'access_token': create_access_token(identity=str(user.id), additional_claims=token_claims(user)),
+        'refresh_token': create_refresh_token(identity=str(user.id))
+    }), 200
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
@@ -323,6 +351,7 @@ def get_profile():
     return jsonify({'user': user.to_dict()}), 200
 
 @auth_bp.route('/check-email', methods=['POST'])
+@rate_limit('check_email')
 @validate_json
 def check_email():
     """Check if email is available"""
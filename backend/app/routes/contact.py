@@ -1,12 +1,14 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.models import db
 from app.utils.validators import validate_json, validate_required_fields
+from app.utils.rate_limit import rate_limit
 from app.services.email_service import send_email
 from datetime import datetime
 
 contact_bp = Blueprint('contact', __name__)
 
 @contact_bp.route('', methods=['POST'])
+@rate_limit('contact')
 @validate_json
 def submit_contact_form():
     """Handle contact form submission"""
@@ -87,7 +89,7 @@ def submit_contact_form():
             </html>
             """
             
-            send_email(support_email, admin_subject, admin_html)
+            send_email(support_email, admin_subject, admin_html, template='contact_notification')
             current_app.logger.info(f"Contact form notification sent to {support_email}")
             
             # Confirmation email to customer
@@ -134,7 +136,7 @@ def submit_contact_form():
             </html>
             """
             
-            send_email(email, customer_subject, customer_html)
+            send_email(email, customer_subject, customer_html, template='contact_confirmation')
             current_app.logger.info(f"Contact form confirmation sent to {email}")
             
         except Exception as e:
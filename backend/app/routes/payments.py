@@ -5,18 +5,13 @@ from app.models import db, Order, OrderItem, CartItem, OrderStatus, PaymentStatu
 from app.utils.auth import token_required, get_current_user
 from app.utils.validators import validate_json, validate_required_fields, validate_order_data
 from app.services.email_service import send_order_confirmation_email
+from app.services.stripe_events import record_stripe_event, notify_stripe_event_worker
+from app.services.payment_gateway import get_payment_gateway, PaymentGatewayUnavailable
+from app.services.checkout_intents import get_or_create_payment_intent, release_payment_intent
 import json
 
 payments_bp = Blueprint('payments', __name__)
 
-# Initialize Stripe
-stripe.api_key = None  # Will be set from config
-
-@payments_bp.before_app_request
-def setup_stripe():
-    """Initialize Stripe with API key"""
-    stripe.api_key = current_app.config.get('STRIPE_SECRET_KEY')
-
 @payments_bp.route('/create-payment-intent', methods=['POST'])
 @jwt_required()
 @validate_json
@@ -42,21 +37,17 @@ def create_payment_intent():
         # Convert to cents if needed
         amount_cents = int(amount * 100) if amount < 1000 else int(amount)
         
-        # Create payment intent
-        intent = stripe.PaymentIntent.create(
-            amount=amount_cents,
-            currency=currency,
-            metadata={
-                'user_id': current_user_id,
-                'integration_check': 'accept_a_payment'
-            }
-        )
+        # Reuse the user's open intent while the cart is unchanged
+        payment_intent_id, client_secret = get_or_create_payment_intent(current_user_id, amount_cents, currency)
         
         return jsonify({
-            'client_secret': intent.client_secret,
-            'payment_intent_id': intent.id
+            'client_secret': client_secret,
+            'payment_intent_id': payment_intent_id
         }), 200
     
+    except PaymentGatewayUnavailable as e:
+        current_app.logger.error(f"Stripe unavailable: {str(e)}")
+        return jsonify({'error': 'Payment service is temporarily unavailable, please try again shortly'}), 503
     except stripe.error.StripeError as e:
         current_app.logger.error(f"Stripe error: {str(e)}")
         return jsonify({'error': 'Payment processing error'}), 400
@@ -83,7 +74,10 @@ def confirm_payment():
         
         # Verify payment intent with Stripe
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = get_payment_gateway().retrieve_payment_intent(payment_intent_id)
+        except PaymentGatewayUnavailable as e:
+            current_app.logger.error(f"Stripe unavailable: {str(e)}")
+            return jsonify({'error': 'Payment service is temporarily unavailable, please try again shortly'}), 503
         except stripe.error.StripeError as e:
             return jsonify({'error': 'Invalid payment intent'}), 400
         
@@ -150,6 +144,9 @@ def confirm_payment():
         for cart_item in cart_items:
             db.session.delete(cart_item)
         
+        # The intent is spent; the next checkout starts a new one
+        release_payment_intent(payment_intent_id)
+        
         db.session.commit()
         
         # Send order confirmation email
@@ -187,41 +184,17 @@ def stripe_webhook():
         return jsonify({'error': 'Invalid signature'}), 400
     
     try:
-        # Handle the event
-        if event['type'] == 'payment_intent.succeeded':
-            payment_intent = event['data']['object']
-            current_app.logger.info(f"Payment succeeded: {payment_intent['id']}")
-            
-            # Update order payment status if needed
-            order = Order.query.filter_by(payment_intent_id=payment_intent['id']).first()
-            if order and order.payment_status != PaymentStatus.COMPLETED:
-                order.payment_status = PaymentStatus.COMPLETED
-                order.status = OrderStatus.CONFIRMED
-                db.session.commit()
-        
-        elif event['type'] == 'payment_intent.payment_failed':
-            payment_intent = event['data']['object']
-            current_app.logger.info(f"Payment failed: {payment_intent['id']}")
-            
-            # Update order payment status
-            order = Order.query.filter_by(payment_intent_id=payment_intent['id']).first()
-            if order:
-                order.payment_status = PaymentStatus.FAILED
-                order.status = OrderStatus.CANCELLED
-                db.session.commit()
-        
-        elif event['type'] == 'charge.dispute.created':
-            dispute = event['data']['object']
-            current_app.logger.warning(f"Dispute created: {dispute['id']}")
-            # Handle dispute logic here
-        
-        else:
-            current_app.logger.info(f"Unhandled event type: {event['type']}")
+        # Store and acknowledge; the event worker applies it off the request path
+        if not record_stripe_event(event, payload):
+            current_app.logger.info(f"Duplicate Stripe event ignored: {event['id']}")
+            return jsonify({'status': 'duplicate'}), 200
         
+        notify_stripe_event_worker()
         return jsonify({'status': 'success'}), 200
     
     except Exception as e:
-        current_app.logger.error(f"Error handling webhook: {str(e)}")
+        db.session.rollback()
+        current_app.logger.error(f"Error storing webhook event: {str(e)}")
         return jsonify({'error': 'Webhook handler failed'}), 500
 
 @payments_bp.route('/refund', methods=['POST'])
@@ -266,7 +239,7 @@ def create_refund():
             amount_cents = int(amount * 100) if amount < 1000 else int(amount)
             refund_data['amount'] = amount_cents
         
-        refund = stripe.Refund.create(**refund_data)
+        refund = get_payment_gateway().create_refund(**refund_data)
         
         # Update order status
         if amount and amount < order.total_amount:
@@ -285,6 +258,9 @@ def create_refund():
             'amount_refunded': refund.amount / 100  # Convert back to dollars
         }), 200
     
+    except PaymentGatewayUnavailable as e:
+        current_app.logger.error(f"Stripe unavailable: {str(e)}")
+        return jsonify({'error': 'Payment service is temporarily unavailable, please try again shortly'}), 503
     except stripe.error.StripeError as e:
         current_app.logger.error(f"Stripe refund error: {str(e)}")
         return jsonify({'error': 'Refund processing failed'}), 400
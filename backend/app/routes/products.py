@@ -3,6 +3,7 @@ from sqlalchemy import or_, and_, func
 from app.models import db, Product, Category, Brand, ProductImage, Review
 from app.utils.validators import validate_pagination_params, sanitize_search_query
 from app.utils.auth import admin_required, get_current_user
+from app.utils.rate_limit import rate_limit
 from datetime import datetime
 import json
 
@@ -458,6 +459,7 @@ def get_featured_products():
         return jsonify({'error': 'Failed to fetch featured products'}), 500
 
 @products_bp.route('/search-suggestions', methods=['GET'])
+@rate_limit('search_suggestions')
 def get_search_suggestions():
     """Get search suggestions based on query"""
     try:
@@ -0,0 +1,367 @@
+"""Appointment slot availability.
+
+The day is split into ``APPOINTMENT_SLOT_MINUTES`` slots counted from
+midnight, so on a 30 minute grid slot 19 starts at 09:30. An appointment
+starts on a slot and takes ``APPOINTMENT_DURATIONS[type]`` minutes, rounded
+up to whole slots. Up to ``APPOINTMENT_STAFF_CAPACITY`` appointments may
+overlap, within ``APPOINTMENT_OPENING_HOURS`` (per weekday, shop time in
+``APPOINTMENT_TIMEZONE``). Cancelled appointments take no place.
+
+Occupancy is kept per day in ``appointment_days`` as thermometer-coded
+bitmaps: bit i of ``layers[k]`` is set when slot i has more than k bookings,
+so ``layers[capacity - 1]`` is the set of full slots. A booking adds one to
+each slot it covers and a cancellation takes one away, a few integer ANDs
+and ORs. The start times free for a type are the open, not-full slots
+ANDed with themselves shifted once per extra slot the type needs. A month
+of availability is then one query for at most 31 rows.
+
+Every change to an appointment's date, time, type or status goes through
+``apply_booking_change`` in the same transaction. It locks the affected day
+rows (``SELECT ... FOR UPDATE``, in date order) before checking capacity, so
+two requests can't both take the last place in a slot. ``flask appointments
+rebuild-calendar`` recomputes the bitmaps from the appointments table; run
+it after upgrading and after changing the grid or durations.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+TIME_FORMATS = ('%I:%M %p', '%H:%M')
+
+
+class InvalidSlot(ValueError):
+    """Off the slot grid, outside opening hours, or not bookable yet/any more"""
+
+
+class SlotUnavailable(ValueError):
+    """Every place at the requested time is taken"""
+
+
+@dataclass(frozen=True)
+class Booking:
+    day: date
+    start: int  # Slot index from midnight
+    slots: int
+
+    @property
+    def mask(self):
+        return ((1 << self.slots) - 1) << self.start
+
+
+def _trim(layers):
+    while layers and not layers[-1]:
+        layers.pop()
+    return layers
+
+
+def add_booking(layers, mask, capacity=None):
+    """Layers with one more booking in every slot of ``mask``.
+
+    Raises SlotUnavailable if any of them already holds ``capacity``
+    bookings; without a capacity nothing is refused (used for rebuilds).
+    """
+    layers = list(layers)
+    if capacity is not None:
+        layers += [0] * (capacity - len(layers))
+        if layers[capacity - 1] & mask:
+            raise SlotUnavailable()
+    carry = mask
+    for k in range(len(layers)):
+        carry, layers[k] = carry & layers[k], layers[k] | carry
+    if carry:
+        layers.append(carry)
+    return _trim(layers)
+
+
+def remove_booking(layers, mask):
+    """Layers with one booking fewer in every slot of ``mask``"""
+    layers = list(layers)
+    for k in reversed(range(len(layers))):
+        hit = mask & layers[k]
+        layers[k] &= ~hit
+        mask &= ~hit
+    return _trim(layers)
+
+
+def free_starts(open_mask, layers, capacity, slots):
+    """Start slots where ``slots`` consecutive open slots all have a free place"""
+    full = layers[capacity - 1] if len(layers) >= capacity else 0
+    free = open_mask & ~full
+    starts = free
+    for shift in range(1, slots):
+        starts &= free >> shift
+    return starts
+
+
+def slot_indexes(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Calendar:
+    def __init__(self, opening_hours, slot_minutes=30, durations=None, capacity=1,
+                 booking_days=92, timezone='UTC'):
+        self.slot_minutes = slot_minutes
+        self.durations = durations or {}
+        self.capacity = capacity
+        self.booking_days = booking_days
+        self.timezone = ZoneInfo(timezone)
+        self.opening = [self._hours_mask(opening_hours.get(name)) for name in WEEKDAYS]
+
+    def _hours_mask(self, spec):
+        """``"09:30-13:00, 16:00-23:00"`` -> mask of the slots wholly inside; empty = closed"""
+        mask = 0
+        for part in filter(None, (part.strip() for part in (spec or '').split(','))):
+            opens, closes = (self.minutes(value.strip()) for value in part.split('-'))
+            first, last = math.ceil(opens / self.slot_minutes), closes // self.slot_minutes
+            if last > first:
+                mask |= ((1 << (last - first)) - 1) << first
+        return mask
+
+    @staticmethod
+    def minutes(value):
+        for fmt in TIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value.strip().upper(), fmt)
+            except ValueError:
+                continue
+            return parsed.hour * 60 + parsed.minute
+        raise InvalidSlot(f"Invalid time '{value}'. Use e.g. 09:30 AM")
+
+    def slot_of(self, value):
+        minutes = self.minutes(value)
+        if minutes % self.slot_minutes:
+            raise InvalidSlot(f"Appointments start every {self.slot_minutes} minutes")
+        return minutes // self.slot_minutes
+
+    def label(self, slot):
+        minutes = slot * self.slot_minutes
+        return time(minutes // 60, minutes % 60).strftime('%I:%M %p')
+
+    def slots_for(self, appointment_type):
+        minutes = self.durations.get(appointment_type.name, self.slot_minutes)
+        return max(1, math.ceil(minutes / self.slot_minutes))
+
+    def open_mask(self, day):
+        return self.opening[day.weekday()]
+
+    def booking(self, day, value, appointment_type):
+        return Booking(day, self.slot_of(value), self.slots_for(appointment_type))
+
+    def now(self):
+        """Naive shop-local time"""
+        return datetime.now(self.timezone).replace(tzinfo=None)
+
+    def bookable_mask(self, day, now):
+        """Open slots that can still be booked on ``day`` (empty outside the booking window)"""
+        today = now.date()
+        if day < today or day > today + timedelta(days=self.booking_days):
+            return 0
+        mask = self.open_mask(day)
+        if day == today:
+            # Only slots that haven't started
+            mask &= ~((1 << ((now.hour * 60 + now.minute) // self.slot_minutes + 1)) - 1)
+        return mask
+
+    def validate(self, booking, now):
+        today = now.date()
+        if booking.day < today or booking.day > today + timedelta(days=self.booking_days):
+            raise InvalidSlot(f"Appointments can be booked up to {self.booking_days} days ahead")
+        bookable = self.bookable_mask(booking.day, now)
+        if bookable & booking.mask != booking.mask:
+            raise InvalidSlot('That time is outside opening hours or has already passed')
+
+    def available_labels(self, day, layers, appointment_type, now):
+        starts = free_starts(self.bookable_mask(day, now), layers, self.capacity, self.slots_for(appointment_type))
+        return [self.label(slot) for slot in slot_indexes(starts)]
+
+
+def init_appointment_calendar(app):
+    config = app.config
+    app.extensions['appointment_calendar'] = Calendar(
+        config.get('APPOINTMENT_OPENING_HOURS', {}),
+        slot_minutes=config.get('APPOINTMENT_SLOT_MINUTES', 30),
+        durations=config.get('APPOINTMENT_DURATIONS', {}),
+        capacity=config.get('APPOINTMENT_STAFF_CAPACITY', 1),
+        booking_days=config.get('APPOINTMENT_BOOKING_DAYS', 92),
+        timezone=config.get('APPOINTMENT_TIMEZONE', 'UTC')
+    )
+    return app.extensions['appointment_calendar']
+
+
+def get_calendar():
+    calendar = current_app.extensions.get('appointment_calendar')
+    if calendar is None:
+        calendar = init_appointment_calendar(current_app._get_current_object())
+    return calendar
+
+
+def normalize_time(value):
+    """An ``appointment_time`` on the slot grid, in the booking page's format (09:30 AM)"""
+    calendar = get_calendar()
+    return calendar.label(calendar.slot_of(value))
+
+
+def booking_of(appointment):
+    """The places an appointment takes, or None (cancelled, or a legacy time off the grid)"""
+    from app.models import AppointmentStatus
+
+    if appointment.status == AppointmentStatus.CANCELLED:
+        return None
+    try:
+        return get_calendar().booking(appointment.appointment_date, appointment.appointment_time,
+                                      appointment.appointment_type)
+    except InvalidSlot:
+        return None
+
+
+def _count_day(day):
+    """Layers for a day computed from its appointments as committed"""
+    from app.models import db, Appointment, AppointmentStatus
+
+    calendar = get_calendar()
+    layers = []
+    rows = db.session.execute(
+        db.select(Appointment.appointment_time, Appointment.appointment_type)
+        .where(Appointment.appointment_date == day, Appointment.status != AppointmentStatus.CANCELLED)
+    ).all()
+    for value, appointment_type in rows:
+        try:
+            layers = add_booking(layers, calendar.booking(day, value, appointment_type).mask)
+        except InvalidSlot:
+            continue
+    return layers
+
+
+def _lock_days(days):
+    """Day rows locked for update, created (from the appointments table) where missing"""
+    from sqlalchemy.exc import IntegrityError
+    from app.models import db
+    from app.models.appointment_day import AppointmentDay
+
+    calendar = get_calendar()
+    rows = {}
+    # The caller's pending change must not be counted as already booked
+    with db.session.no_autoflush:
+        for day in sorted(days):
+            row = AppointmentDay.query.filter_by(day=day).with_for_update().first()
+            if row is None:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(AppointmentDay(day=day, slot_minutes=calendar.slot_minutes,
+                                                      layers=_count_day(day)))
+                except IntegrityError:
+                    pass  # Created by a concurrent booking; lock theirs
+                row = AppointmentDay.query.filter_by(day=day).with_for_update().first()
+            elif row.slot_minutes != calendar.slot_minutes:
+                row.slot_minutes, row.layers = calendar.slot_minutes, _count_day(day)
+            rows[day] = row
+    return rows
+
+
+def apply_booking_change(appointment, before=None, enforce=True):
+    """Move an appointment's places from ``before`` (``booking_of`` it before the
+    change; None for a new appointment) to what it is now.
+
+    Raises InvalidSlot or SlotUnavailable; the caller commits or rolls back.
+    With ``enforce=False`` (staff changes) neither hours nor capacity is checked.
+    """
+    calendar = get_calendar()
+    after = booking_of(appointment)
+    if after == before:
+        return
+    if after is not None and enforce:
+        calendar.validate(after, calendar.now())
+
+    rows = _lock_days({booking.day for booking in (before, after) if booking is not None})
+    if before is not None:
+        rows[before.day].layers = remove_booking(rows[before.day].layers, before.mask)
+    if after is not None:
+        rows[after.day].layers = add_booking(rows[after.day].layers, after.mask,
+                                             calendar.capacity if enforce else None)
+
+
+def _stored_layers(row, day):
+    if row is None:
+        return []
+    if row.slot_minutes != get_calendar().slot_minutes:
+        return _count_day(day)  # Built on another grid; not rebuilt yet
+    return row.layers
+
+
+def month_availability(year, month, appointment_type):
+    """Free start times for every day of a month: {'YYYY-MM-DD': ['09:30 AM', ...]}"""
+    from app.models.appointment_day import AppointmentDay
+
+    calendar = get_calendar()
+    first = date(year, month, 1)
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    now = calendar.now()
+
+    rows = {
+        row.day: row for row in
+        AppointmentDay.query.filter(AppointmentDay.day >= first, AppointmentDay.day <= last).all()
+    }
+    availability = {}
+    day = first
+    while day <= last:
+        layers = _stored_layers(rows.get(day), day)
+        availability[day.isoformat()] = calendar.available_labels(day, layers, appointment_type, now)
+        day += timedelta(days=1)
+    return availability
+
+
+def day_availability(day, appointment_type):
+    from app.models import db
+    from app.models.appointment_day import AppointmentDay
+
+    calendar = get_calendar()
+    layers = _stored_layers(db.session.get(AppointmentDay, day), day)
+    return calendar.available_labels(day, layers, appointment_type, calendar.now())
+
+
+def rebuild_calendar(since=None):
+    """Recompute occupancy from ``since`` (default today) from the appointments table.
+
+    Returns (days, appointments counted, appointments skipped for times off the grid).
+    """
+    from app.models import db, Appointment, AppointmentStatus
+    from app.models.appointment_day import AppointmentDay
+
+    calendar = get_calendar()
+    since = since or calendar.now().date()
+
+    # Hold the existing rows so bookings made meanwhile wait for the rebuild
+    AppointmentDay.query.filter(AppointmentDay.day >= since).with_for_update().all()
+
+    layers = defaultdict(list)
+    counted = skipped = 0
+    rows = db.session.execute(
+        db.select(Appointment.appointment_date, Appointment.appointment_time, Appointment.appointment_type)
+        .where(Appointment.appointment_date >= since, Appointment.status != AppointmentStatus.CANCELLED)
+    ).all()
+    for day, value, appointment_type in rows:
+        try:
+            booking = calendar.booking(day, value, appointment_type)
+        except InvalidSlot:
+            skipped += 1
+            continue
+        layers[day] = add_booking(layers[day], booking.mask)
+        counted += 1
+
+    db.session.execute(db.delete(AppointmentDay).where(AppointmentDay.day >= since))
+    now = datetime.utcnow()
+    if layers:
+        db.session.execute(db.insert(AppointmentDay), [
+            {'day': day, 'slot_minutes': calendar.slot_minutes, 'layers': day_layers, 'updated_at': now}
+            for day, day_layers in layers.items()
+        ])
+    db.session.commit()
+    return len(layers), counted, skipped
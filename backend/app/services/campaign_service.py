@@ -0,0 +1,267 @@
+"""Runs bulk email campaigns.
+
+Recipients are read in keyset-ordered batches of ``users.id`` (only the
+columns the template needs), so memory stays flat however large the
+customer base is. Each batch is rendered from the precompiled campaign
+template, split across ``concurrency`` pooled SMTP sessions and throttled to
+``rate_limit`` messages per second. After every batch the campaign row is
+checkpointed with the last user id sent, so a crashed, paused or failed run
+resumes from there; at most one batch can be sent twice.
+
+Every claim stores a fresh ``runner_id``. Checkpoints only apply while the
+row still carries that token, so a runner that was taken over stops at its
+next checkpoint instead of sending alongside its successor. Batches are
+kept small enough at the campaign's rate that checkpoints (which double as
+heartbeats) land well inside ``CAMPAIGN_STALE_AFTER``.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.models.email_log import EmailStatus
+from app.services.email_log import record_email_attempt
+from app.services.email_service import build_message, log_send_error
+from app.services.email_templates import registry
+from app.services.mail_transport import get_mail_transport
+
+
+class Throttle:
+    """Spaces calls evenly to at most ``rate`` per second across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+CAMPAIGN_TEMPLATE_PREFIX = 'campaign'
+RESERVED_CONTENT_KEYS = {'user', 'name'}  # Set by the runner / taken by registry.render
+
+
+def is_campaign_template(name):
+    """Campaign templates only need ``user`` plus the campaign content"""
+    return (name == CAMPAIGN_TEMPLATE_PREFIX or name.startswith(CAMPAIGN_TEMPLATE_PREFIX + '_')) \
+        and registry.has_template(name)
+
+
+def claim_campaign(campaign_id, stale_after):
+    """Atomically mark a campaign RUNNING for a new runner.
+
+    Succeeds for DRAFT, PAUSED and FAILED campaigns, and for RUNNING ones
+    whose runner stopped heartbeating (crashed). Returns the runner token to
+    pass to ``run_campaign``, or None if another runner holds it or it has
+    already completed.
+    """
+    from app.models import db
+    from app.models.email_campaign import EmailCampaign, CampaignStatus
+
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=stale_after)
+    runner_id = uuid.uuid4().hex
+    claimed = EmailCampaign.query.filter(
+        EmailCampaign.id == campaign_id,
+        db.or_(
+            EmailCampaign.status.in_([CampaignStatus.DRAFT, CampaignStatus.PAUSED, CampaignStatus.FAILED]),
+            db.and_(
+                EmailCampaign.status == CampaignStatus.RUNNING,
+                db.or_(EmailCampaign.heartbeat_at.is_(None), EmailCampaign.heartbeat_at < stale_before)
+            )
+        )
+    ).update({
+        'status': CampaignStatus.RUNNING,
+        'runner_id': runner_id,
+        'heartbeat_at': now,
+        'error': None
+    }, synchronize_session=False)
+    db.session.commit()
+    return runner_id if claimed == 1 else None
+
+
+def checkpoint_batch_size(batch_size, rate_limit, stale_after):
+    """Largest batch that is sent within a third of ``stale_after`` at ``rate_limit``"""
+    if not rate_limit or rate_limit <= 0:
+        return batch_size
+    return max(1, min(batch_size, int(rate_limit * stale_after / 3)))
+
+
+def _checkpoint(campaign_id, runner_id, values):
+    """Apply a progress update if this runner still holds the claim"""
+    from app.models import db
+    from app.models.email_campaign import EmailCampaign
+
+    updated = EmailCampaign.query.filter_by(id=campaign_id, runner_id=runner_id).update(
+        values, synchronize_session=False
+    )
+    db.session.commit()
+    return updated == 1
+
+
+def iter_recipient_batches(campaign, batch_size):
+    """Yield batches of (id, email, first_name, last_name) after the checkpoint"""
+    from app.models import db, User, UserRole
+    from app.models.email_campaign import CampaignAudience
+
+    last_id = campaign.last_user_id or 0
+    while True:
+        query = db.session.query(
+            User.id, User.email, User.first_name, User.last_name
+        ).filter(User.id > last_id)
+
+        if campaign.audience == CampaignAudience.CUSTOMERS:
+            query = query.filter(User.role == UserRole.CUSTOMER)
+        if campaign.verified_only:
+            query = query.filter(User.is_verified == True)
+
+        rows = query.order_by(User.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def deliver_slice(app, throttle, emails):
+    """Send one slice of a batch over a single pooled session; returns (sent, failed)"""
+    with app.app_context():
+        messages = []
+        for email in emails:
+            try:
+                messages.append((email, build_message(email['to_email'], email['subject'],
+                                                      email['html_body'], email['text_body'])))
+            except Exception as e:
+                messages.append((email, e))
+
+        def throttled():
+            for _, message in messages:
+                if not isinstance(message, Exception):
+                    throttle.wait()
+                    yield message
+
+        deliverable = [m for m in messages if not isinstance(m[1], Exception)]
+        try:
+            errors = get_mail_transport().send_many(throttled())
+        except Exception as e:
+            errors = [e] * len(deliverable)
+        errors = iter(errors)
+
+        sent = failed = 0
+        for email, message in messages:
+            error = message if isinstance(message, Exception) else next(errors)
+            if error is None:
+                sent += 1
+            else:
+                failed += 1
+                log_send_error(email['to_email'], error)
+            record_email_attempt(email['to_email'],
+                                 EmailStatus.SENT if error is None else EmailStatus.FAILED,
+                                 subject=email['subject'], template=email['template'],
+                                 error=str(error) if error is not None else None)
+        return sent, failed
+
+
+def render_batch(campaign, rows, subject_template, content):
+    """Render one email per recipient; recipients whose render raised are returned apart"""
+    emails, failures = [], []
+    for user in rows:
+        try:
+            html_body, text_body = registry.render(campaign.template, user=user, **content)
+            subject = subject_template.render(user=user, **content)
+        except Exception as e:
+            failures.append((user.email, e))
+            continue
+        emails.append({
+            'to_email': user.email,
+            'subject': subject,
+            'html_body': html_body,
+            'text_body': text_body,
+            'template': campaign.template
+        })
+    return emails, failures
+
+
+def run_campaign(app, campaign_id, runner_id):
+    """Send a claimed campaign until it completes, is paused, fails or is taken over"""
+    from app.models import db
+    from app.models.email_campaign import EmailCampaign, CampaignStatus
+
+    with app.app_context():
+        campaign = EmailCampaign.query.get(campaign_id)
+        if not campaign or campaign.status != CampaignStatus.RUNNING or campaign.runner_id != runner_id:
+            return
+
+        batch_size = checkpoint_batch_size(app.config.get('CAMPAIGN_BATCH_SIZE', 500), campaign.rate_limit,
+                                           app.config.get('CAMPAIGN_STALE_AFTER', 300))
+        concurrency = max(1, campaign.concurrency or 1)
+        subject_template = registry.compile_text(campaign.subject)
+        content = {k: v for k, v in campaign.get_content().items() if k not in RESERVED_CONTENT_KEYS}
+        content.setdefault('message', '')
+        throttle = Throttle(campaign.rate_limit)
+
+        if not campaign.started_at:
+            campaign.started_at = datetime.utcnow()
+            db.session.commit()
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for rows in iter_recipient_batches(campaign, batch_size):
+                    # Let an admin pause, or a takeover stop us, between batches
+                    db.session.refresh(campaign)
+                    if campaign.status != CampaignStatus.RUNNING or campaign.runner_id != runner_id:
+                        current_app.logger.info(f"Campaign {campaign_id} stopped at user {campaign.last_user_id}")
+                        return
+
+                    emails, render_failures = render_batch(campaign, rows, subject_template, content)
+                    for to_email, error in render_failures:
+                        log_send_error(to_email, error)
+
+                    slices = [emails[i::concurrency] for i in range(concurrency)]
+                    results = list(executor.map(lambda s: deliver_slice(app, throttle, s), slices))
+
+                    # Checkpoint: everything up to this user id has been attempted
+                    owned = _checkpoint(campaign_id, runner_id, {
+                        'last_user_id': rows[-1].id,
+                        'sent_count': EmailCampaign.sent_count + sum(sent for sent, _ in results),
+                        'failed_count': EmailCampaign.failed_count + len(render_failures)
+                        + sum(failed for _, failed in results),
+                        'heartbeat_at': datetime.utcnow()
+                    })
+                    if not owned:
+                        current_app.logger.warning(f"Campaign {campaign_id} was taken over by another runner")
+                        return
+
+            if _checkpoint(campaign_id, runner_id, {
+                'status': CampaignStatus.COMPLETED,
+                'completed_at': datetime.utcnow()
+            }):
+                db.session.refresh(campaign)
+                current_app.logger.info(
+                    f"Campaign {campaign_id} completed: {campaign.sent_count} sent, {campaign.failed_count} failed"
+                )
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Campaign {campaign_id} failed: {str(e)}")
+            # FAILED runs can be claimed again and resume from the last checkpoint
+            _checkpoint(campaign_id, runner_id, {'status': CampaignStatus.FAILED, 'error': str(e)})
+        finally:
+            db.session.remove()
+
+
+def start_campaign_in_background(app, campaign_id, runner_id):
+    """Run a claimed campaign on a daemon thread of this process"""
+    thread = threading.Thread(target=run_campaign, args=(app, campaign_id, runner_id),
+                              name=f'email-campaign-{campaign_id}', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,131 @@
+"""Reuse of Stripe PaymentIntents across checkout page loads.
+
+Each user has at most one open PaymentIntent, stored in ``checkout_intents``
+with a fingerprint of their cart, the amount and the currency. Reloading
+checkout with the same cart returns the stored intent without calling
+Stripe. A changed cart updates that intent in place rather than creating a
+new one. Intents left untouched for ``PAYMENT_INTENT_ABANDON_AFTER`` seconds
+are cancelled by ``flask payments sweep-intents``.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import stripe
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.services.payment_gateway import get_payment_gateway
+
+
+def cart_fingerprint(user_id, amount, currency):
+    """SHA-256 of the user's cart lines, the amount in cents and the currency"""
+    from app.models import db, CartItem
+
+    lines = db.session.query(
+        CartItem.product_id, CartItem.product_variant_id, CartItem.prescription_id,
+        CartItem.quantity, CartItem.lens_options, CartItem.frame_adjustments
+    ).filter_by(user_id=user_id).order_by(CartItem.id).all()
+
+    payload = json.dumps([[list(line) for line in lines], amount, currency.lower()],
+                         separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_or_create_payment_intent(user_id, amount, currency='usd'):
+    """Return (payment_intent_id, client_secret) for the user's current cart"""
+    from app import db
+    from app.models.checkout_intent import CheckoutIntent
+
+    gateway = get_payment_gateway()
+    cart_hash = cart_fingerprint(user_id, amount, currency)
+    existing = CheckoutIntent.query.filter_by(user_id=user_id).first()
+
+    if existing and existing.cart_hash == cart_hash:
+        # Still in use, so keep it out of the abandoned-intent sweep
+        existing.updated_at = datetime.utcnow()
+        db.session.commit()
+        return existing.payment_intent_id, existing.client_secret
+
+    if existing:
+        try:
+            intent = gateway.update_payment_intent(existing.payment_intent_id, amount=amount, currency=currency)
+            existing.cart_hash = cart_hash
+            existing.amount = amount
+            existing.currency = currency
+            existing.client_secret = intent.client_secret
+            db.session.commit()
+            return intent.id, intent.client_secret
+        except stripe.error.InvalidRequestError as e:
+            # Already paid, cancelled or expired on Stripe's side; start a fresh one
+            current_app.logger.info(f"Replacing payment intent {existing.payment_intent_id}: {str(e)}")
+            db.session.delete(existing)
+            db.session.commit()
+
+    intent = gateway.create_payment_intent(
+        amount=amount,
+        currency=currency,
+        metadata={
+            'user_id': user_id,
+            'integration_check': 'accept_a_payment'
+        }
+    )
+    db.session.add(CheckoutIntent(
+        user_id=user_id,
+        payment_intent_id=intent.id,
+        client_secret=intent.client_secret,
+        cart_hash=cart_hash,
+        amount=amount,
+        currency=currency
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request for the same user stored its intent first; use that one
+        db.session.rollback()
+        cancel_quietly(intent.id, 'duplicate')
+        winner = CheckoutIntent.query.filter_by(user_id=user_id).first()
+        return winner.payment_intent_id, winner.client_secret
+
+    return intent.id, intent.client_secret
+
+
+def release_payment_intent(payment_intent_id):
+    """Forget an intent once an order has been placed with it"""
+    from app.models.checkout_intent import CheckoutIntent
+
+    CheckoutIntent.query.filter_by(payment_intent_id=payment_intent_id).delete(synchronize_session=False)
+
+
+def cancel_quietly(payment_intent_id, reason='abandoned'):
+    """Cancel an intent, ignoring ones Stripe can no longer cancel; returns True if cancelled"""
+    try:
+        get_payment_gateway().cancel_payment_intent(payment_intent_id, cancellation_reason=reason)
+        return True
+    except stripe.error.InvalidRequestError:
+        return False
+
+
+def sweep_abandoned_intents(max_age, batch_size=100):
+    """Cancel intents untouched for ``max_age`` seconds; returns (cancelled, removed)"""
+    from app import db
+    from app.models.checkout_intent import CheckoutIntent
+
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    cancelled = removed = 0
+    while True:
+        rows = CheckoutIntent.query.filter(
+            CheckoutIntent.updated_at < cutoff
+        ).order_by(CheckoutIntent.id).limit(batch_size).all()
+        if not rows:
+            return cancelled, removed
+
+        for row in rows:
+            if cancel_quietly(row.payment_intent_id):
+                cancelled += 1
+        # Rows are removed even if Stripe refused to cancel (already succeeded or cancelled)
+        CheckoutIntent.query.filter(
+            CheckoutIntent.id.in_([row.id for row in rows])
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(rows)
@@ -0,0 +1,197 @@
+"""Customer lifetime value and monthly cohort retention.
+
+A customer's cohort is the month of their first counted order. Cancelled and
+returned orders don't count, nor do orders whose payment failed or was
+refunded. Three compact tables are maintained:
+
+* ``customer_lifetimes``: one row per customer (orders, spend, first/last order)
+* ``customer_active_months``: one row per customer per month they ordered in
+* ``cohort_retention``: customers and revenue per (cohort, months since)
+
+``flask rollups refresh-customers`` recomputes only the customers with orders
+created or changed since the last run, then rebuilds the matrix rows for the
+cohorts those customers belong to. ``--full`` rebuilds everything.
+"""
+from datetime import date, datetime
+
+from sqlalchemy import and_, delete, insert, or_, select
+
+WATERMARK_NAME = 'customer_metrics'
+
+# Enum names as stored in orders.status / orders.payment_status
+UNCOUNTED_ORDER_STATUSES = ('CANCELLED', 'RETURNED')
+UNCOUNTED_PAYMENT_STATUSES = ('FAILED', 'REFUNDED')
+
+LIFETIME_SORTS = ('total_spent', 'order_count', 'last_order_at', 'first_order_at')
+
+
+def _orders_table(orders):
+    if orders is not None:
+        return orders
+    from app.models import Order
+    return Order.__table__
+
+
+def month_start(column):
+    """SQL expression for the first day of the month of a timestamp column"""
+    from app import db
+
+    if db.engine.dialect.name == 'sqlite':
+        return db.func.date(column, 'start of month')
+    return db.func.date_trunc('month', column)
+
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def months_between(start, end):
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def counted_orders(orders=None):
+    """Filter for the orders that count towards lifetime value and retention"""
+    orders = _orders_table(orders)
+    return and_(
+        orders.c.status.notin_(UNCOUNTED_ORDER_STATUSES),
+        orders.c.payment_status.notin_(UNCOUNTED_PAYMENT_STATUSES)
+    )
+
+
+def lifetime_ordering(sort):
+    """ORDER BY for ranking customers by ``sort`` (one of ``LIFETIME_SORTS``), ties by user id"""
+    from app.models.customer_metrics import CustomerLifetime
+
+    if sort not in LIFETIME_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(LIFETIME_SORTS)}")
+    return getattr(CustomerLifetime, sort).desc(), CustomerLifetime.user_id
+
+
+def refresh_customers(user_ids, orders=None):
+    """Recompute lifetime and active-month rows for some customers; returns the cohorts touched"""
+    from app import db
+    from app.models.customer_metrics import CustomerLifetime, CustomerActiveMonth
+
+    orders = _orders_table(orders)
+    cohorts = set(db.session.scalars(
+        select(CustomerLifetime.cohort_month).where(CustomerLifetime.user_id.in_(user_ids)).distinct()
+    ))
+    db.session.execute(delete(CustomerLifetime).where(CustomerLifetime.user_id.in_(user_ids)))
+    db.session.execute(delete(CustomerActiveMonth).where(CustomerActiveMonth.user_id.in_(user_ids)))
+
+    month = month_start(orders.c.created_at)
+    active_months = [
+        {'user_id': user_id, 'month': as_date(start), 'order_count': count, 'revenue': revenue or 0}
+        for user_id, start, count, revenue in db.session.execute(
+            select(orders.c.user_id, month, db.func.count(orders.c.id), db.func.sum(orders.c.total_amount))
+            .where(orders.c.user_id.in_(user_ids), counted_orders(orders))
+            .group_by(orders.c.user_id, month)
+        )
+    ]
+    lifetimes = [
+        {'user_id': user_id, 'cohort_month': as_date(first).replace(day=1), 'order_count': count,
+         'total_spent': spent or 0, 'first_order_at': first, 'last_order_at': last,
+         'updated_at': datetime.utcnow()}
+        for user_id, count, spent, first, last in db.session.execute(
+            select(orders.c.user_id, db.func.count(orders.c.id), db.func.sum(orders.c.total_amount),
+                   db.func.min(orders.c.created_at), db.func.max(orders.c.created_at))
+            .where(orders.c.user_id.in_(user_ids), counted_orders(orders))
+            .group_by(orders.c.user_id)
+        )
+    ]
+
+    if active_months:
+        db.session.execute(insert(CustomerActiveMonth), active_months)
+    if lifetimes:
+        db.session.execute(insert(CustomerLifetime), lifetimes)
+        cohorts.update(row['cohort_month'] for row in lifetimes)
+    return cohorts
+
+
+def rebuild_cohorts(cohorts):
+    """Recompute the retention matrix rows of the given cohort months"""
+    from app import db
+    from app.models.customer_metrics import CustomerLifetime, CustomerActiveMonth, CohortRetention
+
+    cohorts = list(cohorts)
+    db.session.execute(delete(CohortRetention).where(CohortRetention.cohort_month.in_(cohorts)))
+    rows = [
+        {'cohort_month': cohort, 'months_since': months_between(cohort, month),
+         'customers': customers, 'revenue': revenue or 0}
+        for cohort, month, customers, revenue in db.session.execute(
+            select(CustomerLifetime.cohort_month, CustomerActiveMonth.month,
+                   db.func.count(CustomerActiveMonth.user_id), db.func.sum(CustomerActiveMonth.revenue))
+            .join(CustomerActiveMonth, CustomerActiveMonth.user_id == CustomerLifetime.user_id)
+            .where(CustomerLifetime.cohort_month.in_(cohorts))
+            .group_by(CustomerLifetime.cohort_month, CustomerActiveMonth.month)
+        )
+    ]
+    if rows:
+        db.session.execute(insert(CohortRetention), rows)
+
+
+def _changed_customer_ids(since, orders=None):
+    """Customers with an order created or updated since ``since``; all customers with orders if None"""
+    from app import db
+
+    orders = _orders_table(orders)
+    query = select(orders.c.user_id).where(orders.c.user_id.isnot(None)).distinct()
+    if since is not None:
+        # Two indexed comparisons rather than one on coalesce(updated_at, created_at)
+        query = query.where(or_(orders.c.updated_at >= since, orders.c.created_at >= since))
+    return list(db.session.scalars(query))
+
+
+def refresh_customer_metrics(full=False, batch_size=1000, orders=None):
+    """Bring lifetimes and the retention matrix up to date; returns counts"""
+    from app import db
+    from app.models.job_watermark import JobWatermark
+    from app.models.customer_metrics import CustomerLifetime, CustomerActiveMonth, CohortRetention
+
+    # Orders changed while this runs are picked up again next time
+    until = datetime.utcnow()
+    since = None if full else JobWatermark.get_position(WATERMARK_NAME)
+    if since is None:
+        for model in (CohortRetention, CustomerActiveMonth, CustomerLifetime):
+            db.session.execute(delete(model))
+
+    user_ids = _changed_customer_ids(since, orders)
+    cohorts = set()
+    for i in range(0, len(user_ids), batch_size):
+        cohorts |= refresh_customers(user_ids[i:i + batch_size], orders)
+
+    cohorts = sorted(cohorts)
+    for i in range(0, len(cohorts), batch_size):
+        rebuild_cohorts(cohorts[i:i + batch_size])
+
+    JobWatermark.set_position(WATERMARK_NAME, until)
+    db.session.commit()
+    return {'customers': len(user_ids), 'cohorts': len(cohorts)}
+
+
+def cohort_matrix(since_month):
+    """Retention matrix for cohorts from ``since_month`` on, oldest first"""
+    from app.models.customer_metrics import CohortRetention
+
+    cells = CohortRetention.query.filter(
+        CohortRetention.cohort_month >= since_month
+    ).order_by(CohortRetention.cohort_month, CohortRetention.months_since).all()
+
+    matrix = []
+    for cell in cells:
+        if not matrix or matrix[-1]['cohort'] != cell.cohort_month.strftime('%Y-%m'):
+            matrix.append({'cohort': cell.cohort_month.strftime('%Y-%m'), 'customers': 0, 'retention': []})
+        cohort = matrix[-1]
+        if cell.months_since == 0:
+            cohort['customers'] = cell.customers
+        cohort['retention'].append({
+            'months_since': cell.months_since,
+            'customers': cell.customers,
+            'rate': round(cell.customers / cohort['customers'], 4) if cohort['customers'] else 0,
+            'revenue': float(cell.revenue)
+        })
+    return matrix
@@ -0,0 +1,160 @@
+"""Buffered writer for the email delivery log.
+
+Send attempts are appended to an in-memory buffer and written to
+``email_logs`` in batches by a background thread, so logging never adds a
+database round trip to the request that sent the email. A batch that fails
+to insert goes back to the front of the buffer and is retried on the next
+flush; after ``max_retries`` failures in a row it is written to the
+application log instead and dropped.
+"""
+import atexit
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import current_app
+
+
+class EmailLogBuffer:
+    """Collects log rows and bulk-inserts them off the request path"""
+
+    def __init__(self, app, batch_size=500, flush_interval=2.0, max_buffered=50000, max_retries=5):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._failures = 0
+        # Bounded so a database outage cannot grow memory without limit
+        self._rows = deque(maxlen=max_buffered)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, row):
+        self._rows.append(row)
+        self._ensure_thread()
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        # Threads do not survive fork(); start one per worker process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='email-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _drain(self):
+        rows = []
+        while self._rows and len(rows) < self.batch_size:
+            rows.append(self._rows.popleft())
+        return rows
+
+    def flush(self):
+        """Write everything buffered so far; safe to call from any thread"""
+        from app import db
+        from app.models.email_log import EmailLog
+
+        while True:
+            rows = self._drain()
+            if not rows:
+                return
+            with self.app.app_context():
+                try:
+                    db.session.execute(EmailLog.__table__.insert(), rows)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    self._failed(rows, e)
+                    return
+                finally:
+                    db.session.remove()
+            self._failures = 0
+
+    def _failed(self, rows, error):
+        self._failures += 1
+        if self._failures <= self.max_retries:
+            self.app.logger.error(
+                f"Failed to write {len(rows)} email log rows (attempt {self._failures}), will retry: {str(error)}"
+            )
+            # Oldest first again; if the buffer is full the newest rows are the ones dropped
+            self._rows.extendleft(reversed(rows))
+            return
+
+        self.app.logger.error(
+            f"Dropping {len(rows)} email log rows after {self._failures} failed writes: {str(error)}"
+        )
+        for row in rows:
+            self.app.logger.error(
+                f"Unwritten email log: {row['created_at'].isoformat()} {getattr(row['status'], 'value', row['status'])} "
+                f"to={row['recipient']} template={row['template']} order={row['order_id']} "
+                f"appointment={row['appointment_id']} error={row['error']}"
+            )
+        self._failures = 0
+
+
+def init_email_log(app):
+    """Create the per-process email log buffer"""
+    buffer = EmailLogBuffer(
+        app,
+        batch_size=app.config.get('EMAIL_LOG_BATCH_SIZE', 500),
+        flush_interval=app.config.get('EMAIL_LOG_FLUSH_INTERVAL', 2.0),
+        max_retries=app.config.get('EMAIL_LOG_MAX_RETRIES', 5)
+    )
+    app.extensions['email_log'] = buffer
+    # Write whatever is still buffered when the worker shuts down
+    atexit.register(buffer.flush)
+
+
+def keyset_page(query, per_page, cursor=None):
+    """One page of an ``EmailLog`` query, newest first; returns (logs, next_cursor)
+
+    Ids only grow, so "older than the cursor" is a range scan on the id
+    index however deep the page.
+    """
+    from app.models.email_log import EmailLog
+
+    if cursor:
+        query = query.filter(EmailLog.id < cursor)
+    logs = query.order_by(EmailLog.id.desc()).limit(per_page + 1).all()
+    if len(logs) > per_page:
+        logs = logs[:per_page]
+        return logs, logs[-1].id
+    return logs, None
+
+
+def record_email_attempt(recipient, status, subject=None, template=None, order_id=None,
+                         appointment_id=None, latency_ms=None, error=None):
+    """Queue one send attempt for the delivery log; never raises"""
+    try:
+        if not current_app.config.get('EMAIL_LOG_ENABLED', True):
+            return
+        buffer = current_app.extensions.get('email_log')
+        if buffer is None:
+            init_email_log(current_app._get_current_object())
+            buffer = current_app.extensions['email_log']
+
+        buffer.record({
+            'recipient': (recipient or '')[:120].lower(),
+            'template': template,
+            'subject': subject[:255] if subject else None,
+            'order_id': order_id,
+            'appointment_id': appointment_id,
+            'status': status,
+            'latency_ms': latency_ms,
+            'error': error,
+            'created_at': datetime.utcnow()
+        })
+    except Exception as e:
+        current_app.logger.error(f"Failed to record email attempt for {recipient}: {str(e)}")
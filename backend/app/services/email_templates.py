@@ -0,0 +1,164 @@
+"""Precompiled email templates.
+
+Templates live in ``app/templates/emails`` as ``<name>.html`` with an
+optional ``<name>.txt`` plain text variant. Each one is loaded, CSS-inlined
+and compiled by Jinja once per process; renders after that only execute the
+compiled template code.
+"""
+import os
+import re
+import threading
+from collections import defaultdict
+
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'emails')
+
+STYLE_BLOCK = re.compile(r'\s*<style[^>]*>(.*?)</style>', re.S | re.I)
+CSS_RULE = re.compile(r'([^{}]+)\{([^}]*)\}')
+OPEN_TAG = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)(\s[^<>]*?)?(/?)>')
+CLASS_ATTR = re.compile(r'class="([^"]*)"')
+STYLE_ATTR = re.compile(r'style="([^"]*)"')
+HTML_TAG = re.compile('<.*?>')
+
+
+def inline_css(html):
+    """Move <style> rules onto the elements they match.
+
+    Many mail clients ignore <style> blocks, so rules are copied into each
+    element's style attribute (existing inline styles win). Only the simple
+    tag and ``.class`` selectors used by our templates are supported.
+    """
+    match = STYLE_BLOCK.search(html)
+    if not match:
+        return html
+
+    rules = []
+    for selectors, declarations in CSS_RULE.findall(match.group(1)):
+        declarations = declarations.strip().rstrip(';').strip()
+        for selector in selectors.split(','):
+            rules.append((selector.strip(), declarations))
+
+    html = html[:match.start()] + html[match.end():]
+
+    def apply_rules(tag_match):
+        tag, attrs, self_closing = tag_match.group(1), tag_match.group(2) or '', tag_match.group(3)
+        class_match = CLASS_ATTR.search(attrs)
+        classes = set(class_match.group(1).split()) if class_match else set()
+
+        styles = [
+            declarations for selector, declarations in rules
+            if selector == tag.lower() or (selector.startswith('.') and selector[1:] in classes)
+        ]
+        if not styles:
+            return tag_match.group(0)
+
+        style_match = STYLE_ATTR.search(attrs)
+        if style_match:
+            styles.append(style_match.group(1).strip().rstrip(';'))
+            attrs = attrs[:style_match.start()] + f'style="{"; ".join(styles)}"' + attrs[style_match.end():]
+        else:
+            attrs += f' style="{"; ".join(styles)}"'
+        return f'<{tag}{attrs}{self_closing}>'
+
+    return OPEN_TAG.sub(apply_rules, html)
+
+
+def strip_html_tags(html_text):
+    """Strip HTML tags for plain text email"""
+    return HTML_TAG.sub('', html_text)
+
+
+class InlineCSSLoader(FileSystemLoader):
+    """FileSystemLoader that inlines CSS into HTML templates as they are loaded"""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        if template.endswith('.html'):
+            source = inline_css(source)
+        return source, filename, uptodate
+
+
+class EmailTemplateRegistry:
+    """Loads and compiles every email template once, then renders from cache"""
+
+    def __init__(self, template_dir=TEMPLATE_DIR):
+        self.env = Environment(
+            loader=InlineCSSLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False,  # Templates ship with the code; never stat on render
+            cache_size=-1
+        )
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def _get(self, filename):
+        template = self._templates.get(filename, False)
+        if template is not False:
+            return template
+
+        with self._lock:
+            if filename not in self._templates:
+                try:
+                    self._templates[filename] = self.env.get_template(filename)
+                except TemplateNotFound:
+                    self._templates[filename] = None
+            return self._templates[filename]
+
+    def preload(self):
+        """Compile every template up front (e.g. before a bulk send)"""
+        for filename in self.env.list_templates(extensions=['html', 'txt']):
+            self._get(filename)
+
+    def has_template(self, name):
+        return self._get(f'{name}.html') is not None
+
+    def compile_text(self, source):
+        """Compile an ad-hoc plain text template, e.g. a campaign subject line"""
+        return self.env.from_string('{% autoescape false %}' + source + '{% endautoescape %}')
+
+    def render_html(self, name, **context):
+        template = self._get(f'{name}.html')
+        if template is None:
+            raise TemplateNotFound(f'{name}.html')
+        return template.render(**context)
+
+    def render_text(self, name, html_body=None, **context):
+        """Render the .txt variant, falling back to the stripped HTML"""
+        template = self._get(f'{name}.txt')
+        if template is not None:
+            return template.render(**context).strip()
+        if html_body is None:
+            html_body = self.render_html(name, **context)
+        return strip_html_tags(html_body)
+
+    def render(self, name, **context):
+        """Return ``(html_body, text_body)`` for a template"""
+        html_body = self.render_html(name, **context)
+        return html_body, self.render_text(name, html_body=html_body, **context)
+
+
+def load_order_items(orders):
+    """Fetch the items of many orders in one query, keyed by order id.
+
+    Rendering ``order.items`` for each order would lazy-load them one
+    query at a time.
+    """
+    from app.models import OrderItem
+
+    order_ids = [order.id for order in orders]
+    items_by_order = defaultdict(list)
+    if not order_ids:
+        return items_by_order
+
+    items = OrderItem.query.filter(
+        OrderItem.order_id.in_(order_ids)
+    ).order_by(OrderItem.order_id, OrderItem.id).all()
+
+    for item in items:
+        items_by_order[item.order_id].append(item)
+    return items_by_order
+
+
+# One registry per process
+registry = EmailTemplateRegistry()
@@ -0,0 +1,301 @@
+"""Materialized low-stock set and the digest alert.
+
+``low_stock_products`` holds every active, inventory-tracked product whose
+stock is at or below its ``low_stock_threshold``. Reads (the dashboard count,
+``/admin/products/low-stock``) use only this small table and never scan
+``products``.
+
+The set is updated in the transaction that changes stock:
+
+* an ``after_flush`` listener re-checks every product inserted, deleted or
+  flushed with a changed stock, threshold, ``is_active`` or
+  ``track_inventory``
+* bulk ``UPDATE`` paths, which bypass the ORM, call ``record_stock_changes``
+  with the product ids they touched
+
+A product entering the set has ``alerted_at`` left empty. After a commit that
+added one, a timer is started if none is pending. When it fires, one digest
+listing every product not yet alerted is emailed to
+``LOW_STOCK_ALERT_EMAILS``. A burst of stock changes therefore produces a
+single email. The digest first claims its rows (``claimed_at``) in a short
+transaction and sends with no locks held, so checkouts that touch the same
+rows never wait on SMTP. Rows are only marked alerted once the digest reached
+at least one recipient; if every send failed the claim is cleared, they stay
+pending and the timer is started again. A claim older than
+``LOW_STOCK_CLAIM_TIMEOUT`` (a sender that died mid-send) is ignored. Each process also starts a timer at boot, so products left
+pending by a restart are still reported. ``flask stock send-low-stock-digest``
+sends the digest immediately, and ``flask stock sync-low-stock`` rebuilds
+the set from ``products``.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, delete, event, inspect, insert, or_, select, update
+
+TRACKED_FIELDS = ('stock_quantity', 'low_stock_threshold', 'is_active', 'track_inventory')
+PENDING_KEY = 'low_stock_crossed'
+
+_listeners_registered = False
+_digest_timer = None
+_digest_lock = threading.Lock()
+
+
+class DigestNotSent(RuntimeError):
+    """No recipient received the digest; its products stay pending"""
+
+
+def is_low_stock(is_active, track_inventory, stock_quantity, threshold):
+    return bool(is_active and track_inventory) and stock_quantity is not None \
+        and threshold is not None and stock_quantity <= threshold
+
+
+def plan_changes(products, members):
+    """Compare product state with current set membership.
+
+    ``products`` maps id to (is_active, track_inventory, stock, threshold)
+    for the products being checked; ids absent from it have been deleted.
+    ``members`` maps id to (stock, threshold) for those of them already in
+    the set. Returns (entered, refreshed, left): entered and refreshed map
+    id to (stock, threshold), left is a set of ids.
+    """
+    entered, refreshed = {}, {}
+    for product_id, (is_active, track_inventory, stock, threshold) in products.items():
+        if not is_low_stock(is_active, track_inventory, stock, threshold):
+            continue
+        if product_id not in members:
+            entered[product_id] = (stock, threshold)
+        elif members[product_id] != (stock, threshold):
+            refreshed[product_id] = (stock, threshold)
+    left = {
+        product_id for product_id in members
+        if product_id not in products or not is_low_stock(*products[product_id])
+    }
+    return entered, refreshed, left
+
+
+def _product_model():
+    """Looked up when needed so tests can supply their own"""
+    from app.models import Product
+    return Product
+
+
+def sync_low_stock(connection, product_ids):
+    """Bring the set up to date for some products; returns the ids that entered it"""
+    from app.models.low_stock import LowStockProduct
+
+    Product = _product_model()
+
+    product_ids = list(product_ids)
+    products = {
+        row[0]: tuple(row[1:]) for row in connection.execute(
+            select(Product.id, Product.is_active, Product.track_inventory,
+                   Product.stock_quantity, Product.low_stock_threshold)
+            .where(Product.id.in_(product_ids))
+        )
+    }
+    members = {
+        row[0]: tuple(row[1:]) for row in connection.execute(
+            select(LowStockProduct.product_id, LowStockProduct.stock_quantity, LowStockProduct.threshold)
+            .where(LowStockProduct.product_id.in_(product_ids))
+        )
+    }
+    entered, refreshed, left = plan_changes(products, members)
+
+    table = LowStockProduct.__table__
+    if left:
+        connection.execute(delete(table).where(table.c.product_id.in_(left)))
+    if refreshed:
+        connection.execute(
+            update(table).where(table.c.product_id == bindparam('pid'))
+            .values(stock_quantity=bindparam('stock'), threshold=bindparam('limit')),
+            [{'pid': pid, 'stock': stock, 'limit': limit} for pid, (stock, limit) in refreshed.items()]
+        )
+    if entered:
+        now = datetime.utcnow()
+        connection.execute(insert(table), [
+            {'product_id': pid, 'stock_quantity': stock, 'threshold': limit, 'since': now, 'alerted_at': None}
+            for pid, (stock, limit) in entered.items()
+        ])
+    return set(entered)
+
+
+def record_stock_changes(session, product_ids, chunk_size=1000):
+    """Update the set after stock changed outside the ORM (bulk UPDATEs)"""
+    product_ids = list(product_ids)
+    for i in range(0, len(product_ids), chunk_size):
+        if sync_low_stock(session.connection(), product_ids[i:i + chunk_size]):
+            session.info[PENDING_KEY] = True
+
+
+def _stock_changed(product):
+    attrs = inspect(product).attrs
+    return any(attrs[field].history.has_changes() for field in TRACKED_FIELDS)
+
+
+def _after_flush(session, flush_context):
+    Product = _product_model()
+
+    # new/dirty/deleted and attribute history still describe the flush here
+    product_ids = {obj.id for obj in session.new if isinstance(obj, Product)}
+    product_ids |= {obj.id for obj in session.deleted if isinstance(obj, Product)}
+    product_ids |= {
+        obj.id for obj in session.dirty if isinstance(obj, Product) and _stock_changed(obj)
+    }
+    if product_ids:
+        record_stock_changes(session, product_ids)
+
+
+def _after_commit(session):
+    if session.info.pop(PENDING_KEY, False) and has_app_context():
+        schedule_digest(current_app._get_current_object())
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def init_low_stock(app):
+    """Keep the low-stock set in step with every ORM flush"""
+    global _listeners_registered
+    from app.models import db
+
+    if not _listeners_registered:
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
+        _listeners_registered = True
+
+    # Products left pending by a restart; the timer sends nothing if there are none
+    if app.config.get('LOW_STOCK_ALERT_EMAILS') and not app.testing:
+        schedule_digest(app)
+
+
+def schedule_digest(app):
+    """Send a digest after LOW_STOCK_DIGEST_DELAY seconds unless one is already pending"""
+    global _digest_timer
+
+    with _digest_lock:
+        if _digest_timer is not None:
+            return
+        _digest_timer = threading.Timer(app.config.get('LOW_STOCK_DIGEST_DELAY', 300), _run_digest, args=(app,))
+        _digest_timer.daemon = True
+        _digest_timer.start()
+
+
+def _run_digest(app):
+    global _digest_timer
+
+    with _digest_lock:
+        _digest_timer = None
+    with app.app_context():
+        try:
+            send_low_stock_digest()
+        except DigestNotSent as e:
+            app.logger.error(f"{str(e)}; retrying in {app.config.get('LOW_STOCK_DIGEST_DELAY', 300)}s")
+            schedule_digest(app)
+        except Exception as e:
+            app.logger.error(f"Failed to send low stock digest: {str(e)}")
+
+
+def _claim_pending_rows(claim_timeout):
+    """Claim the products not yet alerted and commit; returns (claim, rows)"""
+    from app import db
+    from app.models.low_stock import LowStockProduct
+
+    Product = _product_model()
+    claim = datetime.utcnow()
+    # skip_locked lets concurrent senders in other processes split the rows instead of doubling up
+    rows = db.session.execute(
+        select(LowStockProduct.product_id, LowStockProduct.stock_quantity, LowStockProduct.threshold,
+               Product.name, Product.sku)
+        .join(Product, Product.id == LowStockProduct.product_id)
+        .where(
+            LowStockProduct.alerted_at.is_(None),
+            or_(LowStockProduct.claimed_at.is_(None),
+                LowStockProduct.claimed_at < claim - timedelta(seconds=claim_timeout))
+        )
+        .order_by(LowStockProduct.stock_quantity, LowStockProduct.product_id)
+        .with_for_update(of=LowStockProduct, skip_locked=True)
+    ).all()
+    if rows:
+        db.session.execute(
+            update(LowStockProduct)
+            .where(LowStockProduct.product_id.in_([row.product_id for row in rows]))
+            .values(claimed_at=claim)
+        )
+    db.session.commit()
+    return claim, rows
+
+
+def _settle_claim(claim, product_ids, alerted_at=None):
+    """Drop our claim on the rows, marking them alerted if the digest went out"""
+    from app import db
+    from app.models.low_stock import LowStockProduct
+
+    db.session.execute(
+        update(LowStockProduct)
+        .where(LowStockProduct.product_id.in_(product_ids), LowStockProduct.claimed_at == claim)
+        .values(claimed_at=None, alerted_at=alerted_at)
+    )
+    db.session.commit()
+
+
+def send_low_stock_digest():
+    """Email one digest of products that crossed the threshold since the last one; returns the count
+
+    Raises ``DigestNotSent`` (leaving the products pending) if no recipient got it.
+    """
+    from app.services import email_service
+    from app.services.email_templates import registry
+
+    recipients = current_app.config.get('LOW_STOCK_ALERT_EMAILS') or []
+    if not recipients:
+        current_app.logger.info("Low stock digest skipped: LOW_STOCK_ALERT_EMAILS is not set")
+        return 0
+
+    claim, rows = _claim_pending_rows(current_app.config.get('LOW_STOCK_CLAIM_TIMEOUT', 900))
+    if not rows:
+        return 0
+    product_ids = [row.product_id for row in rows]
+
+    try:
+        items = [
+            {'name': row.name, 'sku': row.sku, 'stock_quantity': row.stock_quantity, 'threshold': row.threshold}
+            for row in rows
+        ]
+        html_body, text_body = registry.render('low_stock_digest', items=items)
+        subject = f"Low stock: {len(items)} product{'s' if len(items) != 1 else ''} at or below threshold"
+        delivered = email_service.send_email_batch([
+            {'to_email': email, 'subject': subject, 'html_body': html_body,
+             'text_body': text_body, 'template': 'low_stock_digest'}
+            for email in recipients
+        ])
+    except BaseException:
+        _settle_claim(claim, product_ids)
+        raise
+
+    if not any(delivered):
+        _settle_claim(claim, product_ids)
+        raise DigestNotSent(f"Low stock digest for {len(items)} product(s) could not be sent to any recipient")
+    if not all(delivered):
+        failed = [email for email, ok in zip(recipients, delivered) if not ok]
+        current_app.logger.warning(f"Low stock digest not delivered to: {', '.join(failed)}")
+
+    _settle_claim(claim, product_ids, alerted_at=datetime.utcnow())
+    return len(items)
+
+
+def rebuild_low_stock(chunk_size=1000):
+    """Re-check every product and every member of the set; returns (members, entered)"""
+    from app import db
+    from app.models.low_stock import LowStockProduct
+
+    Product = _product_model()
+    product_ids = sorted(set(db.session.scalars(select(Product.id))) |
+                         set(db.session.scalars(select(LowStockProduct.product_id))))
+    entered = 0
+    for i in range(0, len(product_ids), chunk_size):
+        entered += len(sync_low_stock(db.session.connection(), product_ids[i:i + chunk_size]))
+    db.session.commit()
+    return LowStockProduct.query.count(), entered
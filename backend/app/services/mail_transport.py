@@ -0,0 +1,244 @@
+"""Pooled SMTP transport for outgoing email.
+
+Flask-Mail opens, authenticates and tears down a new SMTP session for every
+message. The transport keeps a small pool of authenticated connections per
+process instead, applies the timeout to each socket rather than to the whole
+process, and transparently reconnects when the server has dropped an idle
+connection.
+"""
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from queue import LifoQueue, Empty, Full
+
+from flask import current_app
+from flask_mail import BadHeaderError, email_dispatched, sanitize_address, sanitize_addresses
+
+
+def is_connection_error(error):
+    """Return True if the error means the SMTP connection itself is unusable"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError, but those are protocol-level replies
+    # (refused recipient, bad data...) on a connection that is still healthy
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPSession:
+    """A checked-out pooled connection that reconnects once on failure"""
+
+    def __init__(self, pool, connection):
+        self.pool = pool
+        self.connection = connection
+
+    def sendmail(self, from_addr, to_addrs, msg, mail_options=(), rcpt_options=()):
+        if self.connection is None:
+            self.connection = self.pool.connect()
+        try:
+            return self.connection.sendmail(from_addr, to_addrs, msg, mail_options, rcpt_options)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            # The server closed the connection (idle timeout, restart...):
+            # drop it and retry the message once on a fresh one
+            self.pool.discard(self.connection)
+            self.connection = None
+            self.connection = self.pool.connect()
+            return self.connection.sendmail(from_addr, to_addrs, msg, mail_options, rcpt_options)
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of persistent, authenticated SMTP connections"""
+
+    def __init__(self, host, port, username=None, password=None, use_tls=False,
+                 use_ssl=False, timeout=30, size=4, max_idle=60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.size = size
+        self.max_idle = max_idle
+
+        self._idle = LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def connect(self):
+        """Open a new authenticated connection (not tracked until checked in)"""
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        connection = smtp_class(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls()
+            if self.username and self.password:
+                connection.login(self.username, self.password)
+        except Exception:
+            self.discard(connection)
+            raise
+
+        with self._lock:
+            self.connections_opened += 1
+        return connection
+
+    def discard(self, connection):
+        """Close a connection without returning it to the pool"""
+        try:
+            connection.quit()
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        while True:
+            try:
+                connection, last_used = self._idle.get_nowait()
+            except Empty:
+                return self.connect()
+
+            if time.monotonic() - last_used < self.max_idle:
+                return connection
+
+            # Idle long enough that the server may have hung up; probe it
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except Exception:
+                pass
+            self.discard(connection)
+
+    def _checkin(self, connection):
+        try:
+            self._idle.put_nowait((connection, time.monotonic()))
+        except Full:
+            self.discard(connection)
+
+    @contextmanager
+    def session(self):
+        """Check out a connection for one or more messages"""
+        self._slots.acquire()
+        session = None
+        try:
+            session = SMTPSession(self, self._checkout())
+            yield session
+        except Exception as e:
+            if session is not None and session.connection is not None and is_connection_error(e):
+                self.discard(session.connection)
+                session.connection = None
+            raise
+        finally:
+            if session is not None and session.connection is not None:
+                self._checkin(session.connection)
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection in the pool"""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            self.discard(connection)
+
+
+class MailTransport:
+    """Delivers Flask-Mail messages over a SMTPConnectionPool"""
+
+    def __init__(self, pool, suppress=False):
+        self.pool = pool
+        self.suppress = suppress
+
+    @classmethod
+    def from_app(cls, app):
+        state = app.extensions['mail']
+        pool = SMTPConnectionPool(
+            host=state.server,
+            port=state.port,
+            username=state.username,
+            password=state.password,
+            use_tls=state.use_tls,
+            use_ssl=state.use_ssl,
+            timeout=app.config.get('MAIL_TIMEOUT', 30),
+            size=app.config.get('MAIL_POOL_SIZE', 4),
+            max_idle=app.config.get('MAIL_POOL_MAX_IDLE', 60)
+        )
+        return cls(pool, suppress=state.suppress)
+
+    def _deliver(self, session, message):
+        assert message.send_to, "No recipients have been added"
+        assert message.sender, (
+            "The message does not specify a sender and a default sender "
+            "has not been configured")
+
+        if message.has_bad_headers():
+            raise BadHeaderError
+
+        if message.date is None:
+            message.date = time.time()
+
+        if session is not None:
+            session.sendmail(sanitize_address(message.sender),
+                             list(sanitize_addresses(message.send_to)),
+                             message.as_bytes(),
+                             message.mail_options,
+                             message.rcpt_options)
+
+        # Keep Flask-Mail's record_messages() working for tests
+        email_dispatched.send(message, app=current_app._get_current_object())
+
+    def send(self, message):
+        """Send a single message, raising on failure"""
+        if self.suppress:
+            self._deliver(None, message)
+            return
+
+        with self.pool.session() as session:
+            self._deliver(session, message)
+
+    def send_many(self, messages):
+        """Send messages over one session.
+
+        Returns a list aligned with ``messages`` holding None for each message
+        that was delivered and the exception for each one that was not.
+        """
+        results = []
+        if self.suppress:
+            for message in messages:
+                try:
+                    self._deliver(None, message)
+                    results.append(None)
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        with self.pool.session() as session:
+            for message in messages:
+                try:
+                    self._deliver(session, message)
+                    results.append(None)
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def close(self):
+        self.pool.close()
+
+
+def init_mail_transport(app):
+    """Create the per-process transport; call after Mail.init_app"""
+    app.extensions['mail_transport'] = MailTransport.from_app(app)
+
+
+def get_mail_transport():
+    """Return the current app's transport, creating it on first use"""
+    transport = current_app.extensions.get('mail_transport')
+    if transport is None:
+        init_mail_transport(current_app)
+        transport = current_app.extensions['mail_transport']
+    return transport
@@ -0,0 +1,104 @@
+"""Streaming export of orders with their items as CSV or NDJSON.
+
+Orders are read in chunks through a server-side cursor (``yield_per``), and
+only the exported columns are selected. The items of each chunk are loaded
+with a single ``order_id IN (...)`` query. Output is produced by generators
+one chunk at a time, so memory stays flat however many orders are exported.
+The same generators feed the HTTP response and ``flask orders export``.
+
+CSV has one row per order item, with the order columns repeated; orders
+without items get a single row. NDJSON has one JSON object per order, with
+an ``items`` array.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+
+ORDER_FIELDS = [
+    'order_number', 'created_at', 'status', 'payment_status', 'customer_email',
+    'subtotal', 'tax_amount', 'shipping_amount', 'discount_amount', 'total_amount',
+    'payment_method', 'shipping_method', 'tracking_number', 'shipped_at', 'delivered_at'
+]
+ITEM_FIELDS = ['product_sku', 'product_name', 'quantity', 'unit_price', 'total_price']
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def _plain(value):
+    """A CSV/JSON-friendly version of a column value"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def iter_order_batches(start=None, end=None, status=None, chunk_size=1000):
+    """Yield lists of (order dict, [item dicts]), one list per chunk of orders"""
+    from app.models import db, Order, OrderItem
+
+    query = db.select(Order.id, *(getattr(Order, field) for field in ORDER_FIELDS))
+    if start:
+        query = query.where(Order.created_at >= start)
+    if end:
+        query = query.where(Order.created_at < end)
+    if status:
+        query = query.where(Order.status == status)
+    query = query.order_by(Order.created_at, Order.id).execution_options(yield_per=chunk_size)
+
+    for rows in db.session.execute(query).partitions():
+        items_by_order = {}
+        for item in db.session.execute(
+            db.select(OrderItem.order_id, *(getattr(OrderItem, field) for field in ITEM_FIELDS))
+            .where(OrderItem.order_id.in_([row.id for row in rows]))
+            .order_by(OrderItem.order_id, OrderItem.id)
+        ):
+            items_by_order.setdefault(item.order_id, []).append(
+                {field: _plain(getattr(item, field)) for field in ITEM_FIELDS}
+            )
+
+        yield [
+            ({field: _plain(getattr(row, field)) for field in ORDER_FIELDS}, items_by_order.get(row.id, []))
+            for row in rows
+        ]
+
+
+def generate_csv(batches):
+    """CSV text, one chunk of orders per yielded string"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ORDER_FIELDS + ['item_' + field for field in ITEM_FIELDS])
+    yield buffer.getvalue()
+
+    empty_item = [''] * len(ITEM_FIELDS)
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for order, items in batch:
+            order_values = [order[field] for field in ORDER_FIELDS]
+            if not items:
+                writer.writerow(order_values + empty_item)
+            for item in items:
+                writer.writerow(order_values + [item[field] for field in ITEM_FIELDS])
+        yield buffer.getvalue()
+
+
+def generate_ndjson(batches):
+    """One JSON object per order and line, one chunk of orders per yielded string"""
+    for batch in batches:
+        yield ''.join(
+            json.dumps(dict(order, items=items), separators=(',', ':')) + '\n'
+            for order, items in batch
+        )
+
+
+def generate_export(export_format, **filters):
+    generator = generate_csv if export_format == 'csv' else generate_ndjson
+    return generator(iter_order_batches(**filters))
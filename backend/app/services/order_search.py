@@ -0,0 +1,100 @@
+"""Admin order search.
+
+Every filter is backed by an index:
+
+* order number prefix: ``LIKE 'prefix%'`` on a ``varchar_pattern_ops`` index
+* customer email: ``lower(email) =`` for a full address (expression index),
+  otherwise ``ILIKE '%part%'`` on a pg_trgm GIN index
+* product name or SKU in the order's items: trigram GIN on ``product_name``
+  and a prefix index on ``product_sku``
+* status and date range: ``(status, created_at, id)`` and ``(created_at, id)``
+
+Results are newest first, with keyset pagination on ``(created_at, id)``, so
+every page is a short index range scan however deep into the results it is.
+Substring searches need at least ``MIN_SUBSTRING`` characters; shorter ones
+can't use a trigram index.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, or_, select, tuple_
+
+MIN_SUBSTRING = 3
+
+
+class SearchError(ValueError):
+    """A search parameter that can't be used"""
+
+
+def _like_escape(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def encode_cursor(order):
+    return f"{order.created_at.isoformat()}_{order.id}"
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, order_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except ValueError:
+        raise SearchError('Invalid cursor')
+
+
+def _search_models():
+    """(Order, OrderItem), looked up when needed so tests can supply their own"""
+    from app.models import Order, OrderItem
+    return Order, OrderItem
+
+
+def build_order_search(order_number=None, email=None, product=None, status=None,
+                       start=None, end=None, cursor=None):
+    """The filtered, newest-first SELECT of orders for a search"""
+    Order, OrderItem = _search_models()
+    query = select(Order)
+
+    if order_number:
+        query = query.filter(Order.order_number.like(f'{_like_escape(order_number)}%', escape='\\'))
+
+    if email:
+        email = email.lower()
+        if '@' in email and '.' in email.rsplit('@', 1)[-1]:
+            query = query.filter(func.lower(Order.customer_email) == email)
+        elif len(email) < MIN_SUBSTRING:
+            raise SearchError(f'Email search needs at least {MIN_SUBSTRING} characters')
+        else:
+            query = query.filter(Order.customer_email.ilike(f'%{_like_escape(email)}%', escape='\\'))
+
+    if product:
+        if len(product) < MIN_SUBSTRING:
+            raise SearchError(f'Product search needs at least {MIN_SUBSTRING} characters')
+        term = _like_escape(product)
+        query = query.filter(Order.id.in_(
+            select(OrderItem.order_id).where(or_(
+                OrderItem.product_name.ilike(f'%{term}%', escape='\\'),
+                OrderItem.product_sku.like(f'{term}%', escape='\\')
+            ))
+        ))
+
+    if status:
+        query = query.filter(Order.status == status)
+    if start:
+        query = query.filter(Order.created_at >= start)
+    if end:
+        query = query.filter(Order.created_at < end)
+
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Order.created_at, Order.id) < tuple_(created_at, order_id))
+
+    return query.order_by(Order.created_at.desc(), Order.id.desc())
+
+
+def search_orders(per_page=20, **filters):
+    """One page of matching orders and the cursor for the next page (or None)"""
+    from app import db
+
+    orders = db.session.scalars(build_order_search(**filters).limit(per_page + 1)).all()
+    has_next = len(orders) > per_page
+    orders = orders[:per_page]
+    return orders, encode_cursor(orders[-1]) if has_next else None
@@ -0,0 +1,237 @@
+"""Order status changes shared by every admin endpoint.
+
+One state machine decides which moves are allowed. Stock is taken when an
+order is confirmed and put back when a confirmed order is cancelled or
+returned. The stock movements of a whole batch are applied with one grouped
+SELECT over the batch's items and one UPDATE per direction; when a product
+runs short, its stock goes to the batch's orders in id order. Customer emails
+are rendered and sent on a background thread after the commit, so a request
+moving hundreds of orders returns without waiting on SMTP.
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, case, func, select, update
+
+# Status names rather than members, so this table doesn't need the models
+ALLOWED_TRANSITIONS = {
+    'PENDING': {'CONFIRMED', 'CANCELLED'},
+    'CONFIRMED': {'PROCESSING', 'SHIPPED', 'OUT_FOR_DELIVERY', 'DELIVERED', 'CANCELLED'},
+    'PROCESSING': {'SHIPPED', 'OUT_FOR_DELIVERY', 'DELIVERED', 'CANCELLED'},
+    'SHIPPED': {'OUT_FOR_DELIVERY', 'DELIVERED', 'RETURNED'},
+    'OUT_FOR_DELIVERY': {'DELIVERED', 'RETURNED'},
+    'DELIVERED': {'RETURNED'},
+    'CANCELLED': set(),
+    'RETURNED': set()
+}
+# Statuses in which the order's items have been taken out of stock
+STOCK_HELD = {'CONFIRMED', 'PROCESSING', 'SHIPPED', 'OUT_FOR_DELIVERY', 'DELIVERED'}
+
+
+class InvalidTransition(ValueError):
+    """A status change the state machine does not allow"""
+
+
+def can_transition(old_status, new_status):
+    return new_status.name in ALLOWED_TRANSITIONS.get(old_status.name, set())
+
+
+def stock_direction(old_status, new_status):
+    """-1 to take stock, +1 to put it back, 0 for no movement"""
+    held_before, held_after = old_status.name in STOCK_HELD, new_status.name in STOCK_HELD
+    if held_after and not held_before:
+        return -1
+    if held_before and not held_after:
+        return 1
+    return 0
+
+
+def _stock_tables():
+    """(order items, products) tables, looked up when needed so tests can supply their own"""
+    from app.models import OrderItem, Product
+    return OrderItem.__table__, Product.__table__
+
+
+def _order_model():
+    from app.models import Order
+    return Order
+
+
+def _allocate_short_stock(items, order_ids, short):
+    """Share out the stock of short products in order id order, as moving the
+    orders one at a time would; ``short`` is {product_id: stock}. Returns
+    {product_id: quantity taken}."""
+    from app import db
+
+    remaining = dict(short)
+    taken = defaultdict(int)
+    rows = db.session.execute(
+        select(items.c.order_id, items.c.product_id, func.sum(items.c.quantity))
+        .where(items.c.order_id.in_(order_ids), items.c.product_id.in_(short))
+        .group_by(items.c.order_id, items.c.product_id)
+        .order_by(items.c.order_id, items.c.product_id)
+    )
+    for order_id, product_id, quantity in rows:
+        if quantity <= remaining[product_id]:
+            remaining[product_id] -= quantity
+            taken[product_id] += quantity
+        else:
+            current_app.logger.warning(
+                f"Insufficient stock for product {product_id} on order {order_id}: requested {quantity}, "
+                f"available {remaining[product_id]}"
+            )
+    return taken
+
+
+def apply_stock_movements(movements):
+    """movements: {direction: [order ids]}; one grouped read and one UPDATE per direction.
+
+    As before, orders are never blocked on stock: an order whose items are
+    short is confirmed without taking them. Nothing records that, so
+    cancelling or returning such an order later still puts its items back.
+    """
+    from app import db
+    from app.services import low_stock
+
+    items, products = _stock_tables()
+    touched = set()
+    for direction, order_ids in movements.items():
+        if not order_ids:
+            continue
+        quantities = dict(db.session.execute(
+            select(items.c.product_id, func.sum(items.c.quantity))
+            .where(items.c.order_id.in_(order_ids))
+            .group_by(items.c.product_id)
+        ).all())
+        if not quantities:
+            continue
+        touched.update(quantities)
+
+        delta = case(quantities, value=products.c.id, else_=0)
+        tracked = and_(products.c.id.in_(quantities), products.c.track_inventory == True)
+        if direction < 0:
+            short = dict(db.session.execute(
+                select(products.c.id, products.c.stock_quantity).where(tracked, products.c.stock_quantity < delta)
+            ).all())
+            if short:
+                # Only the orders that still fit take stock; the rest are logged and left alone
+                taken = _allocate_short_stock(items, order_ids, short)
+                quantities.update({product_id: taken.get(product_id, 0) for product_id in short})
+                delta = case(quantities, value=products.c.id, else_=0)
+            db.session.execute(
+                update(products).where(tracked, products.c.stock_quantity >= delta)
+                .values(stock_quantity=products.c.stock_quantity - delta)
+            )
+        else:
+            db.session.execute(
+                update(products).where(tracked).values(stock_quantity=products.c.stock_quantity + delta)
+            )
+
+    # The UPDATEs bypass the ORM flush, so the low-stock set is told directly
+    if touched:
+        low_stock.record_stock_changes(db.session, touched)
+
+
+def transition_orders(orders, new_status, tracking_number=None, shipping_method=None, notes=None):
+    """Move loaded orders to ``new_status`` in the current transaction.
+
+    Returns (changed, unchanged, rejected) where rejected holds
+    (order, reason) pairs. Nothing is committed.
+    """
+    now = datetime.utcnow()
+    changed, unchanged, rejected = [], [], []
+    movements = defaultdict(list)
+
+    for order in orders:
+        old_status = order.status
+        if old_status == new_status:
+            unchanged.append(order)
+            continue
+        if not can_transition(old_status, new_status):
+            rejected.append((order, f'Cannot change status from {old_status.value} to {new_status.value}'))
+            continue
+
+        direction = stock_direction(old_status, new_status)
+        if direction:
+            movements[direction].append(order.id)
+
+        order.status = new_status
+        if new_status.name == 'SHIPPED':
+            order.shipped_at = now
+            if tracking_number:
+                order.tracking_number = tracking_number
+            if shipping_method:
+                order.shipping_method = shipping_method
+        elif new_status.name == 'DELIVERED':
+            order.delivered_at = now
+            if not order.shipped_at:
+                order.shipped_at = now
+
+        if notes:
+            new_note = f"[{now.isoformat()}] Status changed from {old_status.value} to {new_status.value}. {notes}"
+            order.admin_notes = f"{order.admin_notes}\n{new_note}" if order.admin_notes else new_note
+        changed.append(order)
+
+    apply_stock_movements(movements)
+    return changed, unchanged, rejected
+
+
+def transition_order(order, new_status, **details):
+    """Single-order form of ``transition_orders``; raises InvalidTransition"""
+    changed, _, rejected = transition_orders([order], new_status, **details)
+    if rejected:
+        raise InvalidTransition(rejected[0][1])
+    return bool(changed)
+
+
+def bulk_transition(order_ids, new_status, **details):
+    """Lock the orders with ``order_ids`` and move them to ``new_status``.
+
+    Returns the ids the bulk endpoint reports: ``updated``, ``unchanged``,
+    ``rejected`` (with the reason) and ``not_found``. Nothing is committed.
+    """
+    from app import db
+
+    order_model = _order_model()
+    orders = db.session.scalars(
+        select(order_model).where(order_model.id.in_(order_ids)).order_by(order_model.id).with_for_update()
+    ).all()
+    found = {order.id for order in orders}
+
+    changed, unchanged, rejected = transition_orders(orders, new_status, **details)
+    return {
+        'updated': [order.id for order in changed],
+        'unchanged': [order.id for order in unchanged],
+        'rejected': [{'id': order.id, 'error': reason} for order, reason in rejected],
+        'not_found': [order_id for order_id in order_ids if order_id not in found]
+    }
+
+
+def _send_status_emails(app, order_ids, status, batch_size):
+    from app.models import Order
+    from app.services.email_service import render_order_status_emails, send_email_batch
+
+    with app.app_context():
+        for i in range(0, len(order_ids), batch_size):
+            try:
+                orders = Order.query.filter(Order.id.in_(order_ids[i:i + batch_size])).all()
+                send_email_batch(render_order_status_emails(orders, status))
+            except Exception as e:
+                app.logger.error(f"Failed to send {status.value} emails: {str(e)}")
+
+
+def queue_status_emails(order_ids, status, batch_size=50):
+    """Email each order's customer about its new status, off the request thread"""
+    from app.services.email_service import ORDER_STATUS_EMAILS
+
+    if not order_ids or status.name not in ORDER_STATUS_EMAILS:
+        return None
+    thread = threading.Thread(
+        target=_send_status_emails,
+        args=(current_app._get_current_object(), list(order_ids), status, batch_size),
+        name='order-status-emails', daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,127 @@
+"""bcrypt hashing and verification off the request thread.
+
+bcrypt is the most CPU-expensive thing the API does, and it is meant to be.
+Hashes run on a small pool of threads (bcrypt releases the GIL), sized to the
+cores with ``PASSWORD_HASH_WORKERS``. At most ``PASSWORD_HASH_QUEUE`` more
+requests wait for a thread. When the queue is full, a request waits up to
+``PASSWORD_HASH_WAIT`` seconds for a place before ``PasswordHasherBusy`` is
+raised, which the auth routes turn into a 503 with ``Retry-After``. A burst
+of logins then gets fast rejections instead of every request thread burning
+CPU at once and all of them timing out together.
+
+``BCRYPT_LOG_ROUNDS`` is the cost for new hashes. ``verify`` reports when a
+correct password's hash used a different cost (or wasn't bcrypt at all), so
+login can rehash it while it has the plaintext.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from flask import current_app
+
+MAX_PASSWORD_BYTES = 72  # bcrypt ignores anything longer
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing thread is busy and the queue is full"""
+
+
+def _encode(password):
+    return password.encode('utf-8')[:MAX_PASSWORD_BYTES]
+
+
+def hash_rounds(password_hash):
+    """Cost of a bcrypt hash (``$2b$12$...``), or None if it isn't one"""
+    parts = (password_hash or '').split('$')
+    if len(parts) != 4 or parts[1] not in ('2a', '2b', '2y') or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode('ascii')
+
+
+def _check(password, password_hash):
+    try:
+        return bcrypt.checkpw(_encode(password), password_hash.encode('ascii'))
+    except ValueError:
+        return False  # Malformed hash
+
+
+class PasswordHasher:
+    def __init__(self, rounds=12, workers=None, queue_size=None, wait=1.0):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 2
+        self.queue_size = self.workers * 4 if queue_size is None else queue_size
+        self.wait = wait
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, password, password_hash, fallback=None):
+        """Returns (valid, needs_rehash).
+
+        ``fallback(password)`` checks hashes that aren't bcrypt (e.g. the
+        model's own ``check_password``); without it they never match.
+        """
+        rounds = hash_rounds(password_hash)
+        if rounds is None:
+            valid = bool(fallback and self._run(fallback, password))
+            return valid, valid
+        valid = self._run(_check, password, password_hash)
+        return valid, valid and rounds != self.rounds
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def init_password_hasher(app):
+    app.extensions['password_hasher'] = PasswordHasher(
+        rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12),
+        workers=app.config.get('PASSWORD_HASH_WORKERS'),
+        queue_size=app.config.get('PASSWORD_HASH_QUEUE'),
+        wait=app.config.get('PASSWORD_HASH_WAIT', 1.0)
+    )
+    return app.extensions['password_hasher']
+
+
+def get_password_hasher():
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None:
+        hasher = init_password_hasher(current_app._get_current_object())
+    return hasher
+
+
+def hash_password(password):
+    """bcrypt hash of a new password at the configured cost"""
+    return get_password_hasher().hash(password)
+
+
+def verify_user_password(user, password):
+    """Check a user's password once, upgrading the stored hash if its cost is out of date.
+
+    The upgrade is left in the session for the caller to commit.
+    """
+    hasher = get_password_hasher()
+    valid, needs_rehash = hasher.verify(password, user.password_hash, fallback=user.check_password)
+    if needs_rehash:
+        try:
+            user.password_hash = hasher.hash(password)
+        except PasswordHasherBusy:
+            pass  # Upgraded on a later login
+    return valid
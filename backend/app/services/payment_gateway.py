@@ -0,0 +1,183 @@
+"""Stripe payment gateway.
+
+Stripe is configured once when the app is created: one pooled HTTP session
+shared by every request, bounded connect/read timeouts, and Stripe's own
+network retries (exponential backoff with jitter; POSTs carry an idempotency
+key so a retried create can never charge twice). Every call goes through a
+circuit breaker, so while Stripe is timing out or returning server errors
+checkout fails fast with ``PaymentGatewayUnavailable`` instead of tying up a
+web worker for the full timeout on every attempt.
+
+Set ``STRIPE_API_BASE`` to point the gateway at a local stand-in
+(``app/services/stripe_standin.py``) for load tests, or ``STRIPE_STANDIN=true`` to
+start one inside this process.
+"""
+import threading
+import time
+
+import requests
+import stripe
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+
+class PaymentGatewayUnavailable(stripe.error.APIConnectionError):
+    """Raised without calling Stripe while the circuit breaker is open"""
+
+
+# Errors that mean Stripe itself is degraded, as opposed to a bad request or declined card
+DEGRADED_ERRORS = (stripe.error.APIConnectionError, stripe.error.APIError, stripe.error.RateLimitError)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through per reset period"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return
+            if state == self.OPEN or self._trial_in_flight:
+                raise PaymentGatewayUnavailable('Payment provider is temporarily unavailable')
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Free the trial slot without judging Stripe's health (the call failed for another reason)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            # A failed trial re-opens immediately
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class PaymentGateway:
+    """The Stripe calls the app makes, each guarded by the circuit breaker"""
+
+    def __init__(self, breaker=None):
+        self.breaker = breaker or CircuitBreaker()
+
+    def call(self, func, *args, **kwargs):
+        self.breaker.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except DEGRADED_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except stripe.error.StripeError:
+            # Stripe answered (e.g. card declined); it is healthy
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            # Says nothing about Stripe, but a half-open trial must not stay taken forever
+            self.breaker.release_trial()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def create_payment_intent(self, **params):
+        return self.call(stripe.PaymentIntent.create, **params)
+
+    def retrieve_payment_intent(self, payment_intent_id):
+        return self.call(stripe.PaymentIntent.retrieve, payment_intent_id)
+
+    def update_payment_intent(self, payment_intent_id, **params):
+        return self.call(stripe.PaymentIntent.modify, payment_intent_id, **params)
+
+    def cancel_payment_intent(self, payment_intent_id, **params):
+        return self.call(stripe.PaymentIntent.cancel, payment_intent_id, **params)
+
+    def create_refund(self, **params):
+        return self.call(stripe.Refund.create, **params)
+
+    def iter_payment_intents(self, created_gte, created_lt, page_size=100):
+        """Yield every intent created in [created_gte, created_lt), one list call per page"""
+        params = {'created': {'gte': created_gte, 'lt': created_lt}, 'limit': page_size}
+        while True:
+            page = self.call(stripe.PaymentIntent.list, **params)
+            yield from page.data
+            if not page.has_more or not page.data:
+                return
+            params['starting_after'] = page.data[-1].id
+
+
+def start_standin(app):
+    """Start the in-process Stripe stand-in and return its base URL"""
+    if (app.config.get('STRIPE_SECRET_KEY') or '').startswith('sk_live'):
+        raise RuntimeError('STRIPE_STANDIN cannot be used with a live Stripe key')
+
+    from app.services.stripe_standin import start_standin_server
+
+    server, base_url = start_standin_server(
+        port=app.config.get('STRIPE_STANDIN_PORT', 0),
+        latency_ms=app.config.get('STRIPE_STANDIN_LATENCY_MS', 0),
+        failure_rate=app.config.get('STRIPE_STANDIN_FAILURE_RATE', 0.0),
+        webhook_url=app.config.get('STRIPE_STANDIN_WEBHOOK_URL'),
+        webhook_secret=app.config.get('STRIPE_WEBHOOK_SECRET')
+    )
+    app.extensions['stripe_standin'] = server
+    app.logger.warning(f"Using the local Stripe stand-in at {base_url}")
+    return base_url
+
+
+def init_payment_gateway(app):
+    """Configure the Stripe library once for this process"""
+    api_base = app.config.get('STRIPE_API_BASE')
+    if not api_base and app.config.get('STRIPE_STANDIN'):
+        api_base = start_standin(app)
+
+    stripe.api_key = app.config.get('STRIPE_SECRET_KEY') or ('sk_test_standin' if api_base else None)
+    stripe.api_base = api_base or stripe.DEFAULT_API_BASE
+    stripe.max_network_retries = app.config.get('STRIPE_MAX_RETRIES', 2)
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=app.config.get('STRIPE_POOL_SIZE', 10))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    stripe.default_http_client = stripe.RequestsClient(
+        timeout=(app.config.get('STRIPE_CONNECT_TIMEOUT', 3.0), app.config.get('STRIPE_READ_TIMEOUT', 15.0)),
+        session=session
+    )
+
+    app.extensions['payment_gateway'] = PaymentGateway(CircuitBreaker(
+        failure_threshold=app.config.get('STRIPE_BREAKER_THRESHOLD', 5),
+        reset_timeout=app.config.get('STRIPE_BREAKER_RESET', 30.0)
+    ))
+
+
+def get_payment_gateway():
+    gateway = current_app.extensions.get('payment_gateway')
+    if gateway is None:
+        init_payment_gateway(current_app._get_current_object())
+        gateway = current_app.extensions['payment_gateway']
+    return gateway
@@ -0,0 +1,194 @@
+"""Nightly reconciliation of order payment status against Stripe.
+
+Orders are streamed in ``created_at`` windows (only the columns needed, via
+``yield_per``). The PaymentIntents for each window come from paginated list
+calls filtered by creation time, 100 per request. Each intent is fetched once
+across the whole run and kept in memory only while an order could still refer
+to it. The two sides are diffed in memory and corrections are applied with
+one bulk UPDATE per kind of change. The window end is stored as a watermark
+in the same transaction, so an interrupted run resumes where it stopped.
+
+Only the changes a webhook would have made are applied: Stripe succeeded ->
+COMPLETED/CONFIRMED, Stripe failed or cancelled -> FAILED/CANCELLED for orders
+still pending. Anything else that disagrees (e.g. an order marked paid whose
+intent did not succeed) is reported for a human to look at, never changed.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from app.services.payment_gateway import get_payment_gateway
+
+WATERMARK_NAME = 'payment_reconciliation'
+
+
+def to_timestamp(value):
+    return int((value - datetime(1970, 1, 1)).total_seconds())
+
+
+def _orders_table(orders):
+    if orders is not None:
+        return orders
+    from app.models import Order
+    return Order.__table__
+
+
+def _name(status):
+    """Statuses compare by enum name, which is what the orders table holds"""
+    return getattr(status, 'name', status)
+
+
+def expected_change(intent, payment_status, order_status):
+    """The (payment_status, status) names an order should move to, or None"""
+    payment_status, order_status = _name(payment_status), _name(order_status)
+    stripe_status = intent['status']
+    if stripe_status == 'succeeded':
+        if payment_status in ('PENDING', 'FAILED'):
+            new_status = 'CONFIRMED' if order_status in ('PENDING', 'CANCELLED') else order_status
+            return 'COMPLETED', new_status
+        return None
+
+    failed = stripe_status == 'canceled' or (
+        stripe_status == 'requires_payment_method' and intent['last_payment_error']
+    )
+    if failed and payment_status == 'PENDING':
+        return 'FAILED', 'CANCELLED'
+    return None
+
+
+def is_discrepancy(intent, payment_status):
+    """Disagreements that are reported but not corrected automatically"""
+    return _name(payment_status) == 'COMPLETED' and intent['status'] != 'succeeded'
+
+
+class IntentWindow:
+    """PaymentIntents created in a sliding time range, each fetched from Stripe once"""
+
+    def __init__(self, gateway, lookback):
+        self.gateway = gateway
+        self.lookback = lookback
+        self.intents = {}
+        self.fetched_until = None
+
+    def advance(self, start, end):
+        """Make sure every intent created in [start - lookback, end) is loaded"""
+        fetch_from = start - self.lookback
+        if self.fetched_until is not None:
+            fetch_from = max(fetch_from, self.fetched_until)
+        if fetch_from < end:
+            for intent in self.gateway.iter_payment_intents(created_gte=to_timestamp(fetch_from),
+                                                            created_lt=to_timestamp(end)):
+                self.intents[intent['id']] = intent
+            self.fetched_until = end
+
+        # Forget intents no order from here on can refer to
+        cutoff = to_timestamp(start - self.lookback)
+        self.intents = {k: v for k, v in self.intents.items() if v['created'] >= cutoff}
+
+
+def apply_corrections(corrections, chunk_size=1000, orders=None):
+    """corrections: {(payment_status, status): [order rows]}; one UPDATE per change and chunk"""
+    from app import db
+    from app.services.rollups import record_status_changes
+
+    table = _orders_table(orders)
+    updated = 0
+    for (payment_status, status), rows in corrections.items():
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            record_status_changes(chunk, status)
+            updated += db.session.execute(
+                update(table).where(table.c.id.in_([row.id for row in chunk])).values(
+                    payment_status=payment_status,
+                    status=status,
+                    updated_at=datetime.utcnow()
+                )
+            ).rowcount
+    return updated
+
+
+def reconcile_window(start, end, intents, dry_run=False, orders=None):
+    """Diff one window of orders against the loaded intents; returns stats"""
+    from app import db
+
+    table = _orders_table(orders)
+    rows = db.session.execute(
+        select(
+            table.c.id, table.c.order_number, table.c.payment_intent_id, table.c.payment_status,
+            table.c.status, table.c.created_at, table.c.total_amount
+        ).where(
+            table.c.created_at >= start,
+            table.c.created_at < end,
+            table.c.payment_intent_id.isnot(None)
+        ).order_by(table.c.created_at, table.c.id).execution_options(yield_per=1000)
+    )
+
+    stats = {'checked': 0, 'corrected': 0, 'missing': 0, 'discrepancies': 0}
+    corrections = defaultdict(list)
+    for order in rows:
+        stats['checked'] += 1
+        intent = intents.get(order.payment_intent_id)
+        if intent is None:
+            stats['missing'] += 1
+            current_app.logger.warning(
+                f"Reconciliation: no PaymentIntent {order.payment_intent_id} found for order {order.order_number}"
+            )
+            continue
+
+        change = expected_change(intent, order.payment_status, order.status)
+        if change:
+            corrections[change].append(order)
+        elif is_discrepancy(intent, order.payment_status):
+            stats['discrepancies'] += 1
+            current_app.logger.warning(
+                f"Reconciliation: order {order.order_number} is paid but PaymentIntent "
+                f"{order.payment_intent_id} is {intent['status']}"
+            )
+
+    stats['corrected'] = sum(len(ids) for ids in corrections.values())
+    if corrections and not dry_run:
+        apply_corrections(corrections, orders=table)
+    return stats
+
+
+def reconcile_payments(since=None, until=None, window=None, lag=None, lookback=None, dry_run=False,
+                       orders=None):
+    """Reconcile every window from the watermark (or ``since``) up to ``until``; returns totals"""
+    from app import db
+    from app.models.job_watermark import JobWatermark
+
+    config = current_app.config
+    window = window or timedelta(hours=config.get('RECONCILE_WINDOW_HOURS', 24))
+    lag = lag if lag is not None else timedelta(minutes=config.get('RECONCILE_LAG_MINUTES', 30))
+    lookback = lookback or timedelta(hours=config.get('RECONCILE_INTENT_LOOKBACK_HOURS', 48))
+    # Leave recent orders alone; their webhooks may still be on the way
+    until = until or datetime.utcnow() - lag
+
+    start = since or JobWatermark.get_position(WATERMARK_NAME)
+    if start is None:
+        start = db.session.scalar(select(func.min(_orders_table(orders).c.created_at)))
+    totals = {'windows': 0, 'checked': 0, 'corrected': 0, 'missing': 0, 'discrepancies': 0}
+    if start is None:
+        return totals
+
+    intents = IntentWindow(get_payment_gateway(), lookback)
+    while start < until:
+        end = min(start + window, until)
+        intents.advance(start, end)
+        stats = reconcile_window(start, end, intents.intents, dry_run=dry_run, orders=orders)
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            JobWatermark.set_position(WATERMARK_NAME, end)
+            db.session.commit()
+
+        totals['windows'] += 1
+        for key, value in stats.items():
+            totals[key] += value
+        current_app.logger.info(f"Reconciled orders {start.isoformat()} - {end.isoformat()}: {stats}")
+        start = end
+
+    return totals
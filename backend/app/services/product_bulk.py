@@ -0,0 +1,189 @@
+"""Bulk product price and stock updates.
+
+Each row names a product by ``id`` or ``sku`` and carries the fields to
+change. A batch goes to the database as:
+
+* one SELECT resolving every id and SKU in the batch to a product
+* one SELECT checking every new SKU against the rest of the catalog
+* one bulk UPDATE by primary key (an executemany of a single statement);
+  it sets every field changed anywhere in the batch, and a row that doesn't
+  change a field passes NULL, which ``COALESCE`` turns back into the current
+  value
+
+The route invalidates cached product data once per batch, after the commit.
+Nothing is written unless every row is valid.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import bindparam, func, inspect, or_, select, update
+
+SKU_PATTERN = re.compile(r'^[A-Za-z0-9\-_]+$')
+PRICE_FIELDS = ('price', 'compare_price', 'cost_price')
+INT_FIELDS = ('stock_quantity', 'low_stock_threshold')
+BOOL_FIELDS = ('is_active', 'is_featured', 'track_inventory')
+
+
+class BulkUpdateError(ValueError):
+    """Rows that can't be applied; ``errors`` lists one message per problem"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+class SkuConflict(BulkUpdateError):
+    """New SKUs that clash with each other or with other products"""
+
+
+def _price(value):
+    amount = Decimal(str(value))
+    if not amount.is_finite():
+        raise InvalidOperation
+    return amount
+
+
+def normalize_rows(rows):
+    """Validated (key, changes) pairs; key is ('id', int) or ('sku', str)"""
+    if not isinstance(rows, list):
+        raise BulkUpdateError(['products must be a list'])
+
+    errors, normalized = [], []
+    for index, row in enumerate(rows):
+        label = f'Row {index}'
+        if not isinstance(row, dict):
+            errors.append(f'{label}: must be an object')
+            continue
+
+        if row.get('id') is not None:
+            try:
+                key = ('id', int(row['id']))
+            except (TypeError, ValueError):
+                errors.append(f'{label}: id must be an integer')
+                continue
+        elif row.get('sku'):
+            key = ('sku', str(row['sku']).strip())
+        else:
+            errors.append(f'{label}: id or sku is required')
+            continue
+
+        changes, error_count = {}, len(errors)
+        for field in PRICE_FIELDS:
+            if field in row and row[field] is not None:
+                try:
+                    changes[field] = _price(row[field])
+                except (InvalidOperation, ValueError):
+                    errors.append(f'{label}: {field} must be a valid number')
+                    continue
+                if changes[field] < 0 or (field == 'price' and changes[field] == 0):
+                    errors.append(f'{label}: {field} must be greater than 0')
+        for field in INT_FIELDS:
+            if field in row:
+                value = row[field]
+                if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).lstrip('-').isdigit():
+                    errors.append(f'{label}: {field} must be a valid integer')
+                    continue
+                changes[field] = int(value)
+                if changes[field] < 0:
+                    errors.append(f'{label}: {field} cannot be negative')
+        for field in BOOL_FIELDS:
+            if field in row:
+                if not isinstance(row[field], bool):
+                    errors.append(f'{label}: {field} must be true or false')
+                    continue
+                changes[field] = row[field]
+        # With an id, "sku" renames the product; with only a sku it is the key
+        if key[0] == 'id' and row.get('sku'):
+            sku = str(row['sku']).strip()
+            if not SKU_PATTERN.match(sku):
+                errors.append(f'{label}: SKU can only contain letters, numbers, hyphens, and underscores')
+            changes['sku'] = sku
+
+        if not changes and len(errors) == error_count:
+            errors.append(f'{label}: nothing to update')
+        normalized.append((key, changes))
+
+    if errors:
+        raise BulkUpdateError(errors)
+    return normalized
+
+
+def duplicate_values(values):
+    seen, duplicates = set(), set()
+    for value in values:
+        (duplicates if value in seen else seen).add(value)
+    return duplicates
+
+
+def _product_model():
+    """Looked up when needed so tests can supply their own"""
+    from app.models import Product
+    return Product
+
+
+def bulk_update_products(rows):
+    """Apply a batch of product changes; returns (updated ids, unresolved keys)
+
+    The caller commits, then invalidates cached product data. Raises
+    BulkUpdateError for invalid rows and SkuConflict for SKU clashes; in
+    both cases nothing has been written.
+    """
+    from app import db
+    from app.services.low_stock import TRACKED_FIELDS, record_stock_changes
+
+    Product = _product_model()
+    normalized = normalize_rows(rows)
+    ids = {value for kind, value in (key for key, _ in normalized) if kind == 'id'}
+    skus = {value for kind, value in (key for key, _ in normalized) if kind == 'sku'}
+
+    found = db.session.execute(
+        select(Product.id, Product.sku).where(or_(Product.id.in_(ids), Product.sku.in_(skus)))
+    ).all()
+    id_by_key = {('id', product_id): product_id for product_id, _ in found}
+    id_by_key.update({('sku', sku): product_id for product_id, sku in found})
+    current_sku = dict(found)
+
+    changes_by_id, unresolved = {}, []
+    for key, changes in normalized:
+        product_id = id_by_key.get(key)
+        if product_id is None:
+            unresolved.append({key[0]: key[1]})
+            continue
+        # Later rows for the same product win field by field
+        changes_by_id.setdefault(product_id, {}).update(changes)
+
+    renames = {
+        product_id: changes['sku'] for product_id, changes in changes_by_id.items()
+        if 'sku' in changes and changes['sku'] != current_sku[product_id]
+    }
+    if renames:
+        conflicts = [f'SKU {sku} is used more than once' for sku in sorted(duplicate_values(renames.values()))]
+        # Any current holder is a clash, including one renamed in this batch:
+        # swapping SKUs would trip the unique index partway through the UPDATE
+        conflicts += [
+            f'SKU {sku} already exists' for sku in sorted(db.session.scalars(
+                select(Product.sku).where(Product.sku.in_(set(renames.values())))
+            ))
+        ]
+        if conflicts:
+            raise SkuConflict(conflicts)
+
+    if changes_by_id:
+        # An ORM bulk UPDATE would send one statement per distinct set of changed fields
+        table = inspect(Product).local_table
+        fields = sorted(set().union(*changes_by_id.values()))
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('_id')).values({
+                field: func.coalesce(bindparam(f'_{field}', type_=table.c[field].type), table.c[field])
+                for field in fields
+            }),
+            [
+                {'_id': product_id, **{f'_{field}': changes.get(field) for field in fields}}
+                for product_id, changes in changes_by_id.items()
+            ]
+        )
+        record_stock_changes(db.session, [
+            product_id for product_id, changes in changes_by_id.items() if changes.keys() & set(TRACKED_FIELDS)
+        ])
+
+    return sorted(changes_by_id), unresolved
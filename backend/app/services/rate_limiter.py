@@ -0,0 +1,205 @@
+"""Per-route rate limits.
+
+A policy names one or more limits, written as ``"10/minute per ip; 5/minute
+per account"`` in ``RATE_LIMITS``. Each limit counts requests by a scope:
+
+- ``ip``: the client address (see ``RATE_LIMIT_PROXY_HOPS`` behind a proxy)
+- ``user``: the signed-in user, or the client address for anonymous requests
+- ``account``: the email in the request body (hashed), so one account can't
+  be attacked from many addresses; skipped when the body has no email
+
+A request is refused when any of its limits is exhausted.
+
+Two stores keep the counts. ``MemoryStore`` is a token bucket per key, kept
+as one timestamp (GCRA), for a single process. ``RedisStore`` is a sliding
+window counter shared by every node: one pipelined INCR/EXPIRE/GET per limit.
+The Redis store counts refused requests too, so a client that keeps hammering
+stays limited; the memory store only spends a token on an allowed request, so
+a refused client gets its next one back on schedule. If Redis can't be reached, each node falls back to its own memory
+store for ``RATE_LIMIT_REDIS_RETRY`` seconds, and limits become per node
+rather than failing open or slowing every request down.
+"""
+import hashlib
+import heapq
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from flask import current_app
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+SCOPES = ('ip', 'user', 'account')
+LIMIT_PATTERN = re.compile(r'^(\d+)\s*/\s*(\d+)?\s*(second|minute|hour|day)s?\s+per\s+(\w+)$')
+
+
+@dataclass(frozen=True)
+class Limit:
+    count: int
+    period: float  # Seconds
+    scope: str
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until the limit is fully available again
+    retry_after: float = 0.0  # Seconds until a refused request would be allowed
+
+
+def parse_policy(spec):
+    """``"10/minute per ip; 100/day per account"`` -> [Limit, ...]"""
+    limits = []
+    for part in filter(None, (part.strip() for part in spec.split(';'))):
+        match = LIMIT_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"Invalid rate limit '{part}'")
+        count, multiple, unit, scope = match.groups()
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown rate limit scope '{scope}' (expected one of {', '.join(SCOPES)})")
+        limits.append(Limit(int(count), int(multiple or 1) * PERIODS[unit], scope))
+    return limits
+
+
+def hash_identity(value):
+    return hashlib.blake2b(value.encode(), digest_size=8).hexdigest()
+
+
+class MemoryStore:
+    """Token buckets for one process, stored as each key's theoretical arrival time.
+
+    A refused hit leaves the arrival time alone, so it costs the client nothing.
+    """
+
+    def __init__(self, max_entries=100000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._tat = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, period):
+        interval = period / limit
+        now = self.clock()
+        with self._lock:
+            tat = max(self._tat.get(key, now), now)
+            allow_at = tat + interval - period
+            if allow_at > now:
+                return Decision(False, limit, 0, tat - now, allow_at - now)
+            self._tat[key] = tat + interval
+            if len(self._tat) > self.max_entries:
+                self._evict(now)
+        reset_after = tat + interval - now
+        return Decision(True, limit, int((period - reset_after) / interval), reset_after)
+
+    def _evict(self, now):
+        # Full buckets carry no state; beyond that, drop the keys closest to full
+        for key in [key for key, tat in self._tat.items() if tat <= now]:
+            del self._tat[key]
+        excess = len(self._tat) - int(self.max_entries * 0.9)
+        if excess > 0:
+            for key, _ in heapq.nsmallest(excess, self._tat.items(), key=lambda item: item[1]):
+                del self._tat[key]
+
+
+class RedisStore:
+    """Sliding window counters shared through Redis"""
+
+    def __init__(self, redis, fallback=None, retry_interval=5.0, prefix='ratelimit:', logger=None, clock=time.time):
+        self.redis = redis
+        self.fallback = fallback or MemoryStore()
+        self.retry_interval = retry_interval
+        self.prefix = prefix
+        self.logger = logger
+        self.clock = clock
+        self._down_until = 0.0
+
+    def hit(self, key, limit, period):
+        if self._down_until and time.monotonic() < self._down_until:
+            return self.fallback.hit(key, limit, period)
+
+        now = self.clock()
+        window, elapsed = divmod(now, period)
+        current_key = f'{self.prefix}{key}:{int(window)}'
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.expire(current_key, int(period * 2) + 1)
+        pipe.get(f'{self.prefix}{key}:{int(window) - 1}')
+        try:
+            count, _, previous = pipe.execute()
+        except Exception as e:
+            self._down_until = time.monotonic() + self.retry_interval
+            if self.logger:
+                self.logger.error(f"Rate limit store unavailable, limiting per process: {str(e)}")
+            return self.fallback.hit(key, limit, period)
+        self._down_until = 0.0
+
+        # The previous window's count, weighted by how much of it still overlaps
+        previous = int(previous or 0)
+        weight = 1.0 - elapsed / period
+        used = previous * weight + count
+        reset_after = period - elapsed
+        if used <= limit:
+            return Decision(True, limit, int(limit - used), reset_after)
+        retry_after = reset_after
+        if previous and count <= limit:
+            # Until enough of the previous window has slid out
+            retry_after = min(reset_after, (used - limit) * period / previous)
+        return Decision(False, limit, 0, reset_after, retry_after)
+
+
+class RateLimiter:
+    def __init__(self, store, policies, enabled=True):
+        self.store = store
+        self.policies = {name: parse_policy(spec) for name, spec in policies.items()}
+        self.enabled = enabled
+
+    def check(self, name, identify):
+        """Count a request against policy ``name``.
+
+        ``identify(scope)`` returns the requester's identity for a scope, or
+        None to skip limits of that scope. Returns the decision to report
+        (the refusal, or the limit closest to running out), or None when no
+        limit applies.
+        """
+        if not self.enabled:
+            return None
+        reported = None
+        for limit in self.policies.get(name, ()):
+            identity = identify(limit.scope)
+            if identity is None:
+                continue
+            decision = self.store.hit(f'{name}:{limit.scope}:{identity}', limit.count, limit.period)
+            if not decision.allowed:
+                return decision
+            if reported is None or decision.remaining < reported.remaining:
+                reported = decision
+        return reported
+
+
+def init_rate_limiter(app):
+    config = app.config
+    storage = config.get('RATE_LIMIT_STORAGE', 'auto')
+    if storage == 'redis' or (storage == 'auto' and config.get('REDIS_URL')):
+        from app.services.redis_client import init_redis
+
+        store = RedisStore(
+            app.extensions.get('redis') or init_redis(app),
+            retry_interval=config.get('RATE_LIMIT_REDIS_RETRY', 5.0),
+            logger=app.logger
+        )
+    else:
+        store = MemoryStore(max_entries=config.get('RATE_LIMIT_MAX_KEYS', 100000))
+
+    app.extensions['rate_limiter'] = RateLimiter(
+        store, config.get('RATE_LIMITS', {}), enabled=config.get('RATE_LIMIT_ENABLED', True)
+    )
+    return app.extensions['rate_limiter']
+
+
+def get_rate_limiter():
+    limiter = current_app.extensions.get('rate_limiter')
+    if limiter is None:
+        limiter = init_rate_limiter(current_app._get_current_object())
+    return limiter
@@ -0,0 +1,33 @@
+"""Shared Redis connection.
+
+``REDIS_URL`` points at the server every worker shares. Without it, an
+in-process fakeredis server stands in. That is fine for development and
+tests, but whatever is kept in Redis is then private to each process.
+"""
+from flask import current_app
+
+
+def init_redis(app):
+    url = app.config.get('REDIS_URL')
+    if url:
+        import redis
+
+        client = redis.Redis.from_url(
+            url,
+            socket_timeout=app.config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+            socket_connect_timeout=app.config.get('REDIS_SOCKET_TIMEOUT', 0.5)
+        )
+    else:
+        import fakeredis
+
+        client = fakeredis.FakeRedis()
+        app.logger.warning("REDIS_URL is not set; using an in-process fakeredis stand-in")
+    app.extensions['redis'] = client
+    return client
+
+
+def get_redis():
+    client = current_app.extensions.get('redis')
+    if client is None:
+        client = init_redis(current_app._get_current_object())
+    return client
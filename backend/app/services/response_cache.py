@@ -0,0 +1,101 @@
+"""Short-lived, per-process cache for expensive read-only responses.
+
+Entries live for a few seconds. When several requests miss on the same key at
+once, only the first computes the value. The others wait for it and share
+the result (or the exception), so a room full of auto-refreshing admin
+dashboards costs one set of queries per TTL per process rather than one per
+browser tab.
+
+``invalidate`` also covers computations already running: their result is
+still handed to the callers waiting on them, but it is not stored, and
+later callers start a fresh computation.
+"""
+import threading
+import time
+
+from flask import current_app
+
+
+class _Flight:
+    """One in-progress computation that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """TTL cache whose concurrent misses for a key share a single computation"""
+
+    def __init__(self, ttl=10.0, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (expires_at, value)
+        self._flights = {}  # key -> _Flight
+        self._generation = 0  # Bumped by invalidate(); results computed across a bump are stale
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                # Invalidated while computing: the value may predate the change
+                if self._generation == generation:
+                    if len(self._entries) >= self.max_entries:
+                        self._evict_expired(time.monotonic())
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything, including results still being computed"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+                self._flights.clear()
+            else:
+                self._entries.pop(key, None)
+                self._flights.pop(key, None)
+
+    def _evict_expired(self, now):
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+
+def get_dashboard_cache():
+    cache = current_app.extensions.get('dashboard_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'dashboard_cache', SingleFlightCache(ttl=current_app.config.get('DASHBOARD_CACHE_TTL', 10.0))
+        )
+    return cache
@@ -0,0 +1,299 @@
+"""Daily rollups behind the admin dashboard.
+
+Three small tables are kept up to date as orders and customers change:
+
+* ``daily_order_stats``: order count and revenue per (day, status)
+* ``daily_customer_stats``: new customer accounts per day
+* ``daily_product_sales``: units and revenue per (day, product) from delivered orders
+
+Days are the order's (or user's) ``created_at`` date in UTC, matching how the
+dashboard windows its queries. A ``before_flush`` listener turns every ORM
+change to an order's status or total into +/- deltas, which are written in
+the same transaction as the change. Bulk ``UPDATE`` statements bypass the ORM,
+so code that uses them calls ``record_status_changes`` first. ``flask rollups
+backfill`` rebuilds the tables from raw rows.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import and_, event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+_listeners_registered = False
+
+
+def _day(value):
+    return (value or datetime.utcnow()).date()
+
+
+def _status_key(status):
+    """Rollup rows store the enum name, which is what the orders table holds"""
+    if isinstance(status, str):
+        return status
+    from app.models import OrderStatus
+
+    return (status or OrderStatus.PENDING).name
+
+
+class RollupDeltas:
+    """Accumulates increments for one flush and writes them as upserts"""
+
+    def __init__(self):
+        self.orders = defaultdict(lambda: [0, Decimal('0')])
+        self.products = defaultdict(lambda: [0, Decimal('0')])
+        self.customers = defaultdict(int)
+        self.delivered_moves = {}
+
+    def __bool__(self):
+        return bool(self.orders or self.products or self.customers or self.delivered_moves)
+
+    def add_order(self, day, status, total, sign):
+        delta = self.orders[(day, _status_key(status))]
+        delta[0] += sign
+        delta[1] += sign * Decimal(str(total or 0))
+
+    def add_product(self, day, product_id, units, revenue, sign):
+        delta = self.products[(day, product_id)]
+        delta[0] += sign * (units or 0)
+        delta[1] += sign * Decimal(str(revenue or 0))
+
+    def add_items(self, day, items, sign):
+        for item in items:
+            self.add_product(day, item.product_id, item.quantity, item.total_price, sign)
+
+    def move_delivered(self, order_id, day, sign):
+        """An order entered (+1) or left (-1) DELIVERED; its lines are loaded in bulk on write"""
+        self.delivered_moves[order_id] = (day, sign)
+
+    def _load_delivered_items(self, connection, chunk_size=1000):
+        if not self.delivered_moves:
+            return
+        from app.models import OrderItem
+
+        order_ids = list(self.delivered_moves)
+        for i in range(0, len(order_ids), chunk_size):
+            rows = connection.execute(
+                select(OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.total_price)
+                .where(OrderItem.order_id.in_(order_ids[i:i + chunk_size]))
+            )
+            for order_id, product_id, quantity, total_price in rows:
+                day, sign = self.delivered_moves[order_id]
+                self.add_product(day, product_id, quantity, total_price, sign)
+        self.delivered_moves = {}
+
+    def write(self, connection):
+        from app.models.rollups import DailyOrderStats, DailyCustomerStats, DailyProductSales
+
+        self._load_delivered_items(connection)
+
+        for (day, status), (count, revenue) in self.orders.items():
+            if count or revenue:
+                _upsert(connection, DailyOrderStats.__table__, {'day': day, 'status': status},
+                        {'order_count': count, 'revenue': revenue})
+        for (day, product_id), (units, revenue) in self.products.items():
+            if product_id is not None and (units or revenue):
+                _upsert(connection, DailyProductSales.__table__, {'day': day, 'product_id': product_id},
+                        {'units': units, 'revenue': revenue})
+        for day, count in self.customers.items():
+            if count:
+                _upsert(connection, DailyCustomerStats.__table__, {'day': day}, {'new_customers': count})
+
+
+def _upsert(connection, table, keys, increments):
+    """Add ``increments`` to the row identified by ``keys``, creating it if needed"""
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: table.c[column] + stmt.excluded[column] for column in increments}
+        )
+        connection.execute(stmt)
+        return
+
+    match = and_(*(table.c[key] == value for key, value in keys.items()))
+    result = connection.execute(
+        table.update().where(match).values({column: table.c[column] + value for column, value in increments.items()})
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**keys, **increments))
+
+
+def _previous_value(session, obj, attribute):
+    """The value an attribute had in the database before this flush"""
+    history = inspect(obj).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    if not history.added:
+        return getattr(obj, attribute)
+    # Changed without having been loaded first; read the stored value
+    from app.models import Order
+    return session.execute(
+        select(getattr(Order, attribute)).where(Order.id == obj.id)
+    ).scalar()
+
+
+def collect_flush_deltas(session):
+    from app.models import Order, OrderStatus, User, UserRole
+
+    deltas = RollupDeltas()
+
+    for obj in session.new:
+        if isinstance(obj, Order):
+            day = _day(obj.created_at)
+            deltas.add_order(day, obj.status, obj.total_amount, 1)
+            if obj.status == OrderStatus.DELIVERED:
+                deltas.add_items(day, obj.items, 1)
+        elif isinstance(obj, User) and (obj.role or UserRole.CUSTOMER) == UserRole.CUSTOMER:
+            deltas.customers[_day(obj.created_at)] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Order) or not session.is_modified(obj, include_collections=False):
+            continue
+        old_status = _previous_value(session, obj, 'status')
+        old_total = _previous_value(session, obj, 'total_amount')
+        if old_status == obj.status and old_total == obj.total_amount:
+            continue
+
+        day = _day(obj.created_at)
+        deltas.add_order(day, old_status, old_total, -1)
+        deltas.add_order(day, obj.status, obj.total_amount, 1)
+        was_delivered = old_status == OrderStatus.DELIVERED
+        if was_delivered != (obj.status == OrderStatus.DELIVERED):
+            deltas.move_delivered(obj.id, day, -1 if was_delivered else 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            day = _day(obj.created_at)
+            deltas.add_order(day, obj.status, obj.total_amount, -1)
+            if obj.status == OrderStatus.DELIVERED:
+                deltas.move_delivered(obj.id, day, -1)
+
+    return deltas
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = collect_flush_deltas(session)
+    if deltas:
+        deltas.write(session.connection())
+
+
+def record_status_changes(orders, new_status):
+    """Account for a bulk status UPDATE that bypasses the ORM.
+
+    ``orders`` are rows with ``id``, ``created_at``, ``status`` and
+    ``total_amount`` as they were before the update; call this in the same
+    transaction as the UPDATE. Statuses may be ``OrderStatus`` members or
+    their names.
+    """
+    from app import db
+
+    new_key = _status_key(new_status)
+    deltas = RollupDeltas()
+    for order in orders:
+        old_key = _status_key(order.status)
+        if old_key == new_key:
+            continue
+        day = _day(order.created_at)
+        deltas.add_order(day, old_key, order.total_amount, -1)
+        deltas.add_order(day, new_key, order.total_amount, 1)
+        was_delivered = old_key == 'DELIVERED'
+        if was_delivered != (new_key == 'DELIVERED'):
+            deltas.move_delivered(order.id, day, -1 if was_delivered else 1)
+    deltas.write(db.session.connection())
+
+
+def init_rollups(app):
+    """Keep the rollup tables in step with every ORM flush"""
+    global _listeners_registered
+    from app.models import db
+
+    if not _listeners_registered:
+        event.listen(db.session, 'before_flush', _before_flush)
+        _listeners_registered = True
+
+
+def backfill_rollups(since=None):
+    """Rebuild the rollups for every day from ``since`` (a date; default all time)"""
+    from app.models import db, Order, OrderItem, OrderStatus, User, UserRole
+    from app.models.rollups import DailyOrderStats, DailyCustomerStats, DailyProductSales
+
+    order_day = db.func.date(Order.created_at)
+    user_day = db.func.date(User.created_at)
+    orders_filter = Order.created_at >= since if since else True
+    users_filter = User.created_at >= since if since else True
+
+    for model in (DailyOrderStats, DailyCustomerStats, DailyProductSales):
+        query = model.query.filter(model.day >= since) if since else model.query
+        query.delete(synchronize_session=False)
+
+    db.session.execute(DailyOrderStats.__table__.insert().from_select(
+        ['day', 'status', 'order_count', 'revenue'],
+        select(order_day, db.cast(Order.status, db.String(20)), db.func.count(Order.id), db.func.coalesce(db.func.sum(Order.total_amount), 0))
+        .where(orders_filter).group_by(order_day, Order.status)
+    ))
+    db.session.execute(DailyCustomerStats.__table__.insert().from_select(
+        ['day', 'new_customers'],
+        select(user_day, db.func.count(User.id))
+        .where(and_(User.role == UserRole.CUSTOMER, users_filter)).group_by(user_day)
+    ))
+    db.session.execute(DailyProductSales.__table__.insert().from_select(
+        ['day', 'product_id', 'units', 'revenue'],
+        select(order_day, OrderItem.product_id, db.func.sum(OrderItem.quantity),
+               db.func.coalesce(db.func.sum(OrderItem.total_price), 0))
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(and_(Order.status == OrderStatus.DELIVERED, OrderItem.product_id.isnot(None), orders_filter))
+        .group_by(order_day, OrderItem.product_id)
+    ))
+    db.session.commit()
+
+
+def dashboard_rollup_metrics(days, top_products=5):
+    """Dashboard figures for the last ``days`` days, read from the rollups"""
+    from app.models import db, OrderStatus, Product
+    from app.models.rollups import DailyOrderStats, DailyCustomerStats, DailyProductSales
+
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
+
+    by_status = dict(
+        (status, (count, revenue)) for status, count, revenue in db.session.query(
+            DailyOrderStats.status,
+            db.func.sum(DailyOrderStats.order_count),
+            db.func.sum(DailyOrderStats.revenue)
+        ).filter(DailyOrderStats.day >= start_day).group_by(DailyOrderStats.status)
+    )
+    # All-time pending work, regardless of the window
+    pending_orders = db.session.query(db.func.sum(DailyOrderStats.order_count)).filter(
+        DailyOrderStats.status.in_([OrderStatus.PENDING.name, OrderStatus.CONFIRMED.name])
+    ).scalar() or 0
+
+    total_customers = db.session.query(db.func.sum(DailyCustomerStats.new_customers)).scalar() or 0
+    new_customers = db.session.query(db.func.sum(DailyCustomerStats.new_customers)).filter(
+        DailyCustomerStats.day >= start_day
+    ).scalar() or 0
+
+    units = db.func.sum(DailyProductSales.units)
+    top = db.session.query(
+        Product.name, units.label('total_sold'), db.func.sum(DailyProductSales.revenue).label('total_revenue')
+    ).join(
+        Product, Product.id == DailyProductSales.product_id
+    ).filter(
+        DailyProductSales.day >= start_day
+    ).group_by(
+        Product.id, Product.name
+    ).order_by(units.desc()).limit(top_products).all()
+
+    return {
+        'total_revenue': float(by_status.get(OrderStatus.DELIVERED.name, (0, 0))[1] or 0),
+        'total_orders': int(sum(count or 0 for count, _ in by_status.values())),
+        'orders_by_status': {status: int(count or 0) for status, (count, _) in by_status.items()},
+        'pending_orders': int(pending_orders),
+        'total_customers': int(total_customers),
+        'new_customers': int(new_customers),
+        'top_products': [
+            {'name': name, 'total_sold': int(sold or 0), 'total_revenue': float(revenue or 0)}
+            for name, sold, revenue in top
+        ]
+    }
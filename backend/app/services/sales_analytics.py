@@ -0,0 +1,208 @@
+"""Sales analytics: revenue, orders, AOV and units per day, week or month.
+
+Like the dashboard, only delivered orders count as sales. Store-wide series
+are read from the daily rollups (see ``app.services.rollups``), so a
+year-long range touches about 365 rows. Series split by brand, category or
+frame type need item-level facts. Those are streamed from the database in
+chunks into columnar NumPy arrays, then bucketed and summed with
+``bincount``. Distinct orders per bucket are counted the same way, so an
+order with two items from the same brand counts once for that brand.
+
+For split series, revenue is the sum of item totals and excludes shipping
+and tax. A product in several categories counts towards each of them.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+GRANULARITIES = ('day', 'week', 'month')
+GROUP_BY_OPTIONS = ('brand', 'category', 'frame_type')
+UNASSIGNED = 'Unassigned'
+
+
+def period_starts(days, granularity):
+    """Map datetime64[D] values to the first day of their day/week (Monday)/month"""
+    days = np.asarray(days, dtype='datetime64[D]')
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        # 1970-01-01 was a Thursday, so Monday-based weekday is (n + 3) % 7
+        offsets = (days.astype(np.int64) + 3) % 7
+        return days - offsets.astype('timedelta64[D]')
+    if granularity == 'month':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f'Unknown granularity: {granularity}')
+
+
+def period_range(start, end, granularity):
+    """Every period start between two dates, inclusive"""
+    return np.unique(period_starts(np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1), granularity))
+
+
+def factorize(values, codes):
+    """Integer codes for ``values``, extending the ``codes`` dict of label -> code"""
+    return np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int64, count=len(values))
+
+
+def aggregate(periods, days, granularity, group_codes=None, labels=None, revenue=None, units=None,
+              orders=None, order_ids=None):
+    """Sum facts into (group, period) cells.
+
+    ``group_codes`` index into ``labels`` (see ``factorize``). ``orders`` holds
+    pre-counted orders per row (rollups); ``order_ids`` makes each row a single
+    order line and distinct ids are counted per cell instead. Returns
+    (labels, {metric: 2-D array of groups x periods}).
+    """
+    period_index = np.searchsorted(periods, period_starts(days, granularity))
+    if group_codes is None:
+        labels = [None]
+        group_index = np.zeros(len(period_index), dtype=np.int64)
+    else:
+        group_index = np.asarray(group_codes, dtype=np.int64)
+    cells = len(labels) * len(periods)
+    cell = group_index * len(periods) + period_index
+
+    def total(values):
+        if values is None:
+            return np.zeros(cells)
+        return np.bincount(cell, weights=np.asarray(values, dtype=np.float64), minlength=cells)
+
+    if order_ids is not None and len(cell):
+        order_ids = np.asarray(order_ids, dtype=np.int64)
+        stride = int(order_ids.max()) + 1
+        # Sort-and-compare is much cheaper than np.unique for a million int64 keys
+        keys = np.sort(cell * stride + order_ids)
+        first = np.empty(len(keys), dtype=bool)
+        first[0] = True
+        np.not_equal(keys[1:], keys[:-1], out=first[1:])
+        distinct_cells = keys[first] // stride
+        order_counts = np.bincount(distinct_cells, minlength=cells).astype(np.float64)
+    else:
+        order_counts = total(orders)
+
+    shape = (len(labels), len(periods))
+    return labels, {
+        'revenue': total(revenue).reshape(shape),
+        'orders': order_counts.reshape(shape),
+        'units': total(units).reshape(shape)
+    }
+
+
+def _summary(revenue, orders, units):
+    revenue, orders, units = round(float(revenue), 2), int(orders), int(units)
+    return {
+        'revenue': revenue,
+        'orders': orders,
+        'units': units,
+        'average_order_value': round(revenue / orders, 2) if orders else 0
+    }
+
+
+def format_series(periods, labels, metrics):
+    """Turn aggregate() output into JSON-ready series, one per group"""
+    period_labels = [str(p) for p in periods]
+    result = []
+    for g, label in enumerate(labels):
+        revenue, orders, units = metrics['revenue'][g], metrics['orders'][g], metrics['units'][g]
+        result.append({
+            'name': label,
+            'totals': _summary(revenue.sum(), orders.sum(), units.sum()),
+            'series': [
+                dict(period=period_labels[p], **_summary(revenue[p], orders[p], units[p]))
+                for p in range(len(periods))
+            ]
+        })
+    return result
+
+
+def _rollup_facts(start, end):
+    """Delivered orders and units per day from the rollups"""
+    from app.models import db, OrderStatus
+    from app.models.rollups import DailyOrderStats, DailyProductSales
+
+    order_rows = db.session.query(
+        DailyOrderStats.day, DailyOrderStats.order_count, DailyOrderStats.revenue
+    ).filter(
+        DailyOrderStats.status == OrderStatus.DELIVERED.name,
+        DailyOrderStats.day >= start,
+        DailyOrderStats.day <= end
+    ).all()
+    unit_rows = db.session.query(
+        DailyProductSales.day, db.func.sum(DailyProductSales.units)
+    ).filter(
+        DailyProductSales.day >= start,
+        DailyProductSales.day <= end
+    ).group_by(DailyProductSales.day).all()
+
+    units_by_day = {day: units for day, units in unit_rows}
+    days = sorted(set(units_by_day) | {row.day for row in order_rows})
+    orders_by_day = {row.day: row for row in order_rows}
+    return (
+        np.array(days, dtype='datetime64[D]'),
+        np.array([orders_by_day[d].order_count if d in orders_by_day else 0 for d in days], dtype=np.float64),
+        np.array([orders_by_day[d].revenue if d in orders_by_day else 0 for d in days], dtype=np.float64),
+        np.array([units_by_day.get(d) or 0 for d in days], dtype=np.float64)
+    )
+
+
+def _item_facts(start, end, group_by, chunk_size=10000):
+    """Stream delivered order lines as columns: day, order id, group code, group labels, units, revenue"""
+    from app.models import db, Order, OrderItem, OrderStatus, Product, Brand, Category
+
+    group_column = {
+        'brand': Brand.name,
+        'category': Category.name,
+        'frame_type': Product.frame_type
+    }[group_by]
+
+    query = db.select(
+        Order.created_at, OrderItem.order_id, group_column, OrderItem.quantity, OrderItem.total_price
+    ).select_from(OrderItem).join(
+        Order, OrderItem.order_id == Order.id
+    ).outerjoin(
+        Product, OrderItem.product_id == Product.id
+    ).where(
+        Order.status == OrderStatus.DELIVERED,
+        Order.created_at >= datetime.combine(start, datetime.min.time()),
+        Order.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    )
+    if group_by == 'brand':
+        query = query.outerjoin(Brand, Product.brand_id == Brand.id)
+    elif group_by == 'category':
+        query = query.outerjoin(Product.categories)
+
+    columns = [[], [], [], [], []]
+    codes = {}
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    for rows in result.partitions():
+        created, order_ids, groups, quantities, totals = zip(*rows)
+        columns[0].append(np.array(created, dtype='datetime64[D]'))
+        columns[1].append(np.fromiter(order_ids, dtype=np.int64, count=len(rows)))
+        columns[2].append(factorize([g or UNASSIGNED for g in groups], codes))
+        columns[3].append(np.fromiter((q or 0 for q in quantities), dtype=np.float64, count=len(rows)))
+        columns[4].append(np.fromiter((float(t or 0) for t in totals), dtype=np.float64, count=len(rows)))
+
+    labels = sorted(codes, key=codes.get)
+    if not columns[0]:
+        return (np.array([], dtype='datetime64[D]'), np.array([], dtype=np.int64),
+                np.array([], dtype=np.int64), labels, np.array([]), np.array([]))
+    days, order_ids, group_codes, units, revenue = (np.concatenate(column) for column in columns)
+    return days, order_ids, group_codes, labels, units, revenue
+
+
+def sales_analytics(start, end, granularity='day', group_by=None):
+    """Revenue, orders, AOV and units for [start, end] (dates), optionally split"""
+    periods = period_range(start, end, granularity)
+
+    if group_by is None:
+        days, orders, revenue, units = _rollup_facts(start, end)
+        labels, metrics = aggregate(periods, days, granularity, revenue=revenue, units=units, orders=orders)
+        series = format_series(periods, labels, metrics)[0]
+        return {'totals': series['totals'], 'series': series['series']}
+
+    days, order_ids, group_codes, labels, units, revenue = _item_facts(start, end, group_by)
+    labels, metrics = aggregate(periods, days, granularity, group_codes=group_codes, labels=labels,
+                                revenue=revenue, units=units, order_ids=order_ids)
+    split = format_series(periods, labels, metrics)
+    split.sort(key=lambda group: group['totals']['revenue'], reverse=True)
+    return {'groups': split}
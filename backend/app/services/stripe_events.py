@@ -0,0 +1,246 @@
+"""Stripe webhook inbox.
+
+The webhook endpoint only verifies the signature and stores the event in
+``stripe_events`` (unique on the Stripe event id, so retries of an event we
+already have are acknowledged and dropped). A background worker then applies
+pending events in the order Stripe created them, loading every order a batch
+touches with a single ``payment_intent_id IN (...)`` query.
+
+An event is only picked up once every earlier pending event for its payment
+intent has been applied, so a refund never overtakes the ``succeeded`` it
+follows. A failing event is retried with exponential backoff (holding back
+its intent's later events meanwhile) until ``max_attempts``, after which it
+is left for an operator and no longer blocks the intent.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+
+def _payment_intent_id(event_type, obj):
+    if event_type.startswith('payment_intent.'):
+        return obj.get('id')
+    payment_intent = obj.get('payment_intent')
+    if isinstance(payment_intent, dict):
+        return payment_intent.get('id')
+    return payment_intent
+
+
+def record_stripe_event(event, payload):
+    """Store a verified event; returns False if it was already received"""
+    from app import db
+    from app.models.stripe_event import StripeEvent
+
+    obj = event['data']['object']
+    row = StripeEvent(
+        event_id=event['id'],
+        event_type=event['type'],
+        payment_intent_id=_payment_intent_id(event['type'], obj),
+        payload=payload.decode('utf-8') if isinstance(payload, bytes) else payload,
+        stripe_created=event.get('created') or 0
+    )
+    db.session.add(row)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+# Event handlers: (event, obj, order) -> None; order is None if no order matches
+
+def handle_payment_succeeded(event, obj, order):
+    from app.models import OrderStatus, PaymentStatus
+
+    current_app.logger.info(f"Payment succeeded: {obj['id']}")
+    if order and order.payment_status != PaymentStatus.COMPLETED:
+        order.payment_status = PaymentStatus.COMPLETED
+        order.status = OrderStatus.CONFIRMED
+
+
+def handle_payment_failed(event, obj, order):
+    from app.models import OrderStatus, PaymentStatus
+
+    current_app.logger.info(f"Payment failed: {obj['id']}")
+    # A late failure for an intent that already succeeded must not cancel the order
+    if order and order.payment_status != PaymentStatus.COMPLETED:
+        order.payment_status = PaymentStatus.FAILED
+        order.status = OrderStatus.CANCELLED
+
+
+def handle_dispute_created(event, obj, order):
+    current_app.logger.warning(f"Dispute created: {obj['id']}")
+
+
+EVENT_HANDLERS = {
+    'payment_intent.succeeded': handle_payment_succeeded,
+    'payment_intent.payment_failed': handle_payment_failed,
+    'charge.dispute.created': handle_dispute_created,
+}
+
+
+def _load_orders(intent_ids):
+    from app.models import Order
+
+    return {
+        order.payment_intent_id: order
+        for order in Order.query.filter(Order.payment_intent_id.in_(intent_ids)).all()
+    }
+
+
+def process_pending_events(batch_size=100, max_attempts=5, retry_backoff=30, load_orders=_load_orders):
+    """Apply one batch of due events; returns ``(applied, failed)``"""
+    from app import db
+    from app.models.stripe_event import StripeEvent
+
+    now = datetime.utcnow()
+    earlier = aliased(StripeEvent)
+    waiting_on_earlier = db.session.query(earlier.id).filter(
+        earlier.payment_intent_id == StripeEvent.payment_intent_id,
+        earlier.processed_at.is_(None),
+        earlier.attempts < max_attempts,
+        tuple_(earlier.stripe_created, earlier.id) < tuple_(StripeEvent.stripe_created, StripeEvent.id)
+    ).exists()
+
+    events = StripeEvent.query.filter(
+        StripeEvent.processed_at.is_(None),
+        StripeEvent.attempts < max_attempts,
+        db.or_(StripeEvent.next_attempt_at.is_(None), StripeEvent.next_attempt_at <= now),
+        ~waiting_on_earlier
+    ).order_by(
+        StripeEvent.stripe_created, StripeEvent.id
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    if not events:
+        db.session.rollback()
+        return 0, 0
+
+    # One query for every order this batch touches
+    intent_ids = {e.payment_intent_id for e in events if e.payment_intent_id}
+    orders = load_orders(intent_ids) if intent_ids else {}
+
+    applied = failed = 0
+    for event in events:
+        event.attempts += 1
+        handler = EVENT_HANDLERS.get(event.event_type)
+        try:
+            if handler:
+                with db.session.begin_nested():
+                    handler(event, event.get_object(), orders.get(event.payment_intent_id))
+            else:
+                current_app.logger.info(f"Unhandled event type: {event.event_type}")
+            event.processed_at = now
+            event.next_attempt_at = None
+            event.error = None
+            applied += 1
+        except Exception as e:
+            current_app.logger.error(f"Error applying Stripe event {event.event_id}: {str(e)}")
+            event.error = str(e)
+            event.next_attempt_at = now + timedelta(seconds=retry_backoff * 2 ** (event.attempts - 1))
+            failed += 1
+            if event.attempts >= max_attempts:
+                current_app.logger.error(
+                    f"Giving up on Stripe event {event.event_id} after {event.attempts} attempts"
+                )
+
+    db.session.commit()
+    return applied, failed
+
+
+def drain_events(batch_size=100, max_attempts=5, retry_backoff=30, load_orders=_load_orders):
+    """Process batches until no event is due; returns the number applied"""
+    total = 0
+    while True:
+        applied, failed = process_pending_events(batch_size, max_attempts, retry_backoff, load_orders)
+        if not applied and not failed:
+            return total
+        total += applied
+
+
+class StripeEventWorker:
+    """Per-process daemon thread that drains the inbox when woken or on a timer"""
+
+    def __init__(self, app, batch_size=100, poll_interval=5.0, max_attempts=5, retry_backoff=30):
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._fork_hook = False
+
+    def start(self):
+        """Start polling now, so events left from before a restart are applied without a new webhook"""
+        if not self._fork_hook and hasattr(os, 'register_at_fork'):
+            # Pre-forking servers: the thread stays in the parent, so start one in each child
+            os.register_at_fork(after_in_child=self._after_fork)
+            self._fork_hook = True
+        self.notify()
+
+    def _after_fork(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self.notify()
+
+    def notify(self):
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def _ensure_thread(self):
+        # Threads do not survive fork(); start one per worker process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='stripe-event-worker', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        from app import db
+
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            with self.app.app_context():
+                try:
+                    drain_events(self.batch_size, self.max_attempts, self.retry_backoff)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Stripe event worker failed: {str(e)}")
+                finally:
+                    db.session.remove()
+
+
+def init_stripe_event_worker(app):
+    worker = StripeEventWorker(
+        app,
+        batch_size=app.config.get('STRIPE_EVENT_BATCH_SIZE', 100),
+        poll_interval=app.config.get('STRIPE_EVENT_POLL_INTERVAL', 5.0),
+        max_attempts=app.config.get('STRIPE_EVENT_MAX_ATTEMPTS', 5),
+        retry_backoff=app.config.get('STRIPE_EVENT_RETRY_BACKOFF', 30)
+    )
+    app.extensions['stripe_events'] = worker
+    if app.config.get('STRIPE_EVENT_WORKER_ENABLED', True):
+        worker.start()
+
+
+def notify_stripe_event_worker():
+    """Wake this process's worker after an event was stored"""
+    if not current_app.config.get('STRIPE_EVENT_WORKER_ENABLED', True):
+        return
+    worker = current_app.extensions.get('stripe_events')
+    if worker is None:
+        init_stripe_event_worker(current_app._get_current_object())
+        worker = current_app.extensions['stripe_events']
+    worker.notify()
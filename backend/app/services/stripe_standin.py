@@ -0,0 +1,360 @@
+"""Local stand-in for the subset of the Stripe API the app uses.
+
+Keeps PaymentIntents (create, retrieve, list, update, confirm, cancel) and
+Refunds in memory so checkout can be load-tested without network access or
+Stripe's test-mode rate limits. State changes are delivered as signed
+webhooks, just as Stripe sends them, and every API call can be slowed down or
+made to fail to see how checkout behaves when Stripe is degraded.
+
+Run it standalone and point the app at it with ``STRIPE_API_BASE``:
+
+    python -m app.services.stripe_standin --port 12111 --latency-ms 150 --failure-rate 0.02 \\
+        --webhook-url http://127.0.0.1:5000/api/payments/webhook --webhook-secret whsec_standin
+    STRIPE_API_BASE=http://127.0.0.1:12111 python run.py
+
+or set ``STRIPE_STANDIN=true`` to have the app start one in-process (single
+process only: each worker would otherwise get its own in-memory state).
+Latency and failure rate can be changed while running with
+``POST /_standin/config``. Confirming with ``payment_method=pm_card_chargeDeclined``
+declines the payment.
+
+Not for production use: any API key is accepted.
+"""
+import argparse
+import copy
+import hashlib
+import hmac
+import itertools
+import json
+import queue
+import random
+import secrets
+import threading
+import time
+
+import requests
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+DECLINED_PAYMENT_METHODS = ('pm_card_chargeDeclined', 'pm_card_visa_chargeDeclined')
+UPDATABLE_STATUSES = ('requires_payment_method', 'requires_confirmation', 'requires_action')
+
+
+def parse_form(form):
+    """Turn Stripe's bracketed form encoding (metadata[user_id]=1) into nested dicts"""
+    params = {}
+    for key, value in form.items(multi=True):
+        parts = key.replace(']', '').split('[')
+        target = params
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return params
+
+
+def stripe_error(message, status=400, error_type='invalid_request_error', code=None):
+    return jsonify({'error': {'type': error_type, 'message': message, 'code': code}}), status
+
+
+def sign_payload(payload, secret, timestamp=None):
+    """Build a Stripe-Signature header for ``payload`` (bytes)"""
+    timestamp = int(timestamp or time.time())
+    signed = f'{timestamp}.'.encode('utf-8') + payload
+    signature = hmac.new(secret.encode('utf-8'), signed, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+class WebhookSender:
+    """Delivers signed events from a background thread, retrying with backoff"""
+
+    def __init__(self, url, secret, max_attempts=4):
+        self.url = url
+        self.secret = secret
+        self.max_attempts = max_attempts
+        self.delivered = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._session = requests.Session()
+        threading.Thread(target=self._run, name='standin-webhooks', daemon=True).start()
+
+    def send(self, event):
+        self._queue.put(event)
+
+    def join(self):
+        """Block until every queued event has been delivered or given up on"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                self._deliver(event)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, event):
+        payload = json.dumps(event).encode('utf-8')
+        for attempt in range(self.max_attempts):
+            try:
+                response = self._session.post(self.url, data=payload, timeout=10, headers={
+                    'Content-Type': 'application/json',
+                    'Stripe-Signature': sign_payload(payload, self.secret)
+                })
+                if response.status_code < 300:
+                    self.delivered += 1
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.5 * 2 ** attempt)
+        self.failed += 1
+
+
+class StripeStandin:
+    """In-memory PaymentIntent and Refund store"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, failure_rate=0.0, webhook_url=None, webhook_secret=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.webhooks = WebhookSender(webhook_url, webhook_secret or '') if webhook_url else None
+        self.payment_intents = {}
+        self.refunds = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def new_id(self, prefix):
+        return f'{prefix}_standin{next(self._ids):010d}{secrets.token_hex(4)}'
+
+    def simulate_network(self):
+        """Sleep for the configured latency; returns True if this call should fail"""
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return self.failure_rate > 0 and random.random() < self.failure_rate
+
+    def emit(self, event_type, obj):
+        if self.webhooks is None:
+            return
+        self.webhooks.send({
+            'id': self.new_id('evt'),
+            'object': 'event',
+            'type': event_type,
+            'created': int(time.time()),
+            'livemode': False,
+            'data': {'object': copy.deepcopy(obj)}
+        })
+
+    def create_payment_intent(self, params):
+        intent_id = self.new_id('pi')
+        intent = {
+            'id': intent_id,
+            'object': 'payment_intent',
+            'amount': int(params['amount']),
+            'amount_received': 0,
+            'currency': params.get('currency', 'usd'),
+            'status': 'requires_payment_method',
+            'client_secret': f'{intent_id}_secret_{secrets.token_hex(8)}',
+            'metadata': params.get('metadata', {}),
+            'last_payment_error': None,
+            'created': int(time.time()),
+            'livemode': False
+        }
+        with self._lock:
+            self.payment_intents[intent_id] = intent
+        self.emit('payment_intent.created', intent)
+        return intent
+
+    def update_payment_intent(self, intent, params):
+        with self._lock:
+            if intent['status'] not in UPDATABLE_STATUSES:
+                return None
+            if 'amount' in params:
+                intent['amount'] = int(params['amount'])
+            if 'currency' in params:
+                intent['currency'] = params['currency']
+            intent['metadata'].update(params.get('metadata', {}))
+        return intent
+
+    def cancel_payment_intent(self, intent, params):
+        with self._lock:
+            if intent['status'] in ('succeeded', 'canceled'):
+                return None
+            intent['status'] = 'canceled'
+            intent['cancellation_reason'] = params.get('cancellation_reason')
+        self.emit('payment_intent.canceled', intent)
+        return intent
+
+    def confirm_payment_intent(self, intent, params):
+        """Returns (intent, declined)"""
+        declined = params.get('payment_method') in DECLINED_PAYMENT_METHODS
+        with self._lock:
+            if intent['status'] not in UPDATABLE_STATUSES:
+                return None, False
+            if declined:
+                intent['status'] = 'requires_payment_method'
+                intent['last_payment_error'] = {'type': 'card_error', 'code': 'card_declined',
+                                                'message': 'Your card was declined.'}
+            else:
+                intent['status'] = 'succeeded'
+                intent['amount_received'] = intent['amount']
+                intent['last_payment_error'] = None
+        self.emit('payment_intent.payment_failed' if declined else 'payment_intent.succeeded', intent)
+        return intent, declined
+
+    def create_refund(self, params):
+        intent = self.payment_intents.get(params.get('payment_intent'))
+        if intent is None:
+            return None
+        refund = {
+            'id': self.new_id('re'),
+            'object': 'refund',
+            'amount': int(params.get('amount') or intent['amount_received'] or intent['amount']),
+            'currency': intent['currency'],
+            'payment_intent': intent['id'],
+            'reason': params.get('reason'),
+            'status': 'succeeded',
+            'created': int(time.time())
+        }
+        with self._lock:
+            self.refunds[refund['id']] = refund
+        self.emit('charge.refunded', {'id': self.new_id('ch'), 'object': 'charge',
+                                      'payment_intent': intent['id'], 'amount_refunded': refund['amount']})
+        return refund
+
+
+def create_standin_app(standin=None):
+    app = Flask(__name__)
+    state = standin or StripeStandin()
+    app.extensions['stripe_standin'] = state
+
+    def missing(intent_id):
+        return stripe_error(f"No such payment_intent: '{intent_id}'", 404, code='resource_missing')
+
+    def unexpected_state(intent, action):
+        return stripe_error(f"This PaymentIntent's status is {intent['status']} and cannot be {action}.",
+                            code='payment_intent_unexpected_state')
+
+    @app.before_request
+    def inject_latency_and_failures():
+        if request.path.startswith('/_standin'):
+            return None
+        if state.simulate_network():
+            return stripe_error('Injected failure from the Stripe stand-in', 500, error_type='api_error')
+        return None
+
+    @app.route('/_standin/config', methods=['GET', 'POST'])
+    def standin_config():
+        data = request.get_json(silent=True) or {}
+        for key in ('latency_ms', 'jitter_ms', 'failure_rate'):
+            if key in data:
+                setattr(state, key, float(data[key]))
+        return jsonify({key: getattr(state, key) for key in ('latency_ms', 'jitter_ms', 'failure_rate')})
+
+    @app.route('/v1/payment_intents', methods=['POST'])
+    def create_payment_intent():
+        params = parse_form(request.form)
+        if 'amount' not in params:
+            return stripe_error('Missing required param: amount.', code='parameter_missing')
+        return jsonify(state.create_payment_intent(params))
+
+    @app.route('/v1/payment_intents', methods=['GET'])
+    def list_payment_intents():
+        # Newest first, like Stripe; starting_after continues from the previous page
+        created = {key: int(request.args[f'created[{key}]'])
+                   for key in ('gt', 'gte', 'lt', 'lte') if f'created[{key}]' in request.args}
+        limit = min(int(request.args.get('limit', 10)), 100)
+        intents = sorted(
+            (i for i in list(state.payment_intents.values())
+             if ('gt' not in created or i['created'] > created['gt'])
+             and ('gte' not in created or i['created'] >= created['gte'])
+             and ('lt' not in created or i['created'] < created['lt'])
+             and ('lte' not in created or i['created'] <= created['lte'])),
+            key=lambda i: (i['created'], i['id']), reverse=True
+        )
+        starting_after = request.args.get('starting_after')
+        if starting_after:
+            ids = [i['id'] for i in intents]
+            intents = intents[ids.index(starting_after) + 1:] if starting_after in ids else []
+        return jsonify({
+            'object': 'list',
+            'url': '/v1/payment_intents',
+            'data': intents[:limit],
+            'has_more': len(intents) > limit
+        })
+
+    @app.route('/v1/payment_intents/<intent_id>', methods=['GET'])
+    def retrieve_payment_intent(intent_id):
+        intent = state.payment_intents.get(intent_id)
+        if intent is None:
+            return missing(intent_id)
+        return jsonify(intent)
+
+    @app.route('/v1/payment_intents/<intent_id>', methods=['POST'])
+    def update_payment_intent(intent_id):
+        intent = state.payment_intents.get(intent_id)
+        if intent is None:
+            return missing(intent_id)
+        updated = state.update_payment_intent(intent, parse_form(request.form))
+        if updated is None:
+            return unexpected_state(intent, 'updated')
+        return jsonify(updated)
+
+    @app.route('/v1/payment_intents/<intent_id>/cancel', methods=['POST'])
+    def cancel_payment_intent(intent_id):
+        intent = state.payment_intents.get(intent_id)
+        if intent is None:
+            return missing(intent_id)
+        cancelled = state.cancel_payment_intent(intent, parse_form(request.form))
+        if cancelled is None:
+            return unexpected_state(intent, 'canceled')
+        return jsonify(cancelled)
+
+    @app.route('/v1/payment_intents/<intent_id>/confirm', methods=['POST'])
+    def confirm_payment_intent(intent_id):
+        intent = state.payment_intents.get(intent_id)
+        if intent is None:
+            return missing(intent_id)
+        confirmed, declined = state.confirm_payment_intent(intent, parse_form(request.form))
+        if confirmed is None:
+            return unexpected_state(intent, 'confirmed')
+        if declined:
+            return jsonify({'error': dict(confirmed['last_payment_error'], payment_intent=confirmed)}), 402
+        return jsonify(confirmed)
+
+    @app.route('/v1/refunds', methods=['POST'])
+    def create_refund():
+        refund = state.create_refund(parse_form(request.form))
+        if refund is None:
+            return stripe_error('No such payment_intent', 404, code='resource_missing')
+        return jsonify(refund)
+
+    return app
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def start_standin_server(host='127.0.0.1', port=0, **options):
+    """Serve a stand-in from a daemon thread; returns (server, base_url)"""
+    server = make_server(host, port, create_standin_app(StripeStandin(**options)), threaded=True,
+                         request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, name='stripe-standin', daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local Stripe stand-in for load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=12111)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Added to every API call')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Random +/- variation of the latency')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of calls answered with a 500')
+    parser.add_argument('--webhook-url', help='Where to POST signed events, e.g. .../api/payments/webhook')
+    parser.add_argument('--webhook-secret', default='whsec_standin', help='Must match STRIPE_WEBHOOK_SECRET')
+    args = parser.parse_args()
+
+    standin = StripeStandin(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate,
+                            webhook_url=args.webhook_url, webhook_secret=args.webhook_secret)
+    create_standin_app(standin).run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,248 @@
+"""JWT revocation with a Bloom filter fast path.
+
+Revoked tokens are rows in ``revoked_tokens``, keyed by ``jti``. A password
+reset or change revokes every token a user holds with one row keyed
+``user:<id>``, whose ``revoked_at`` is the cutoff for their tokens' ``iat``.
+Each row has an ``expires_at``, after which the tokens it covers are dead
+anyway; ``flask auth cleanup-revoked`` deletes those rows.
+
+Every worker keeps a Bloom filter of the revoked keys. A token whose ``jti``
+and ``user:<id>`` are both absent from the filter is not revoked. That is the
+answer for nearly every request, and it needs no I/O. A hit (real or false
+positive) is confirmed against the table.
+
+The filter's bits are mirrored in Redis. A revocation sets its bits with
+SETBIT and bumps a version counter. Each worker checks the counter at most
+every ``TOKEN_BLOCKLIST_SYNC_INTERVAL`` seconds and reloads the bitset when
+it has moved, so other workers learn of a revocation within that interval.
+While Redis can't be reached the filter counts as stale, and every token is
+checked against the table.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+BLOOM_KEY = 'token_blocklist:bloom'
+VERSION_KEY = 'token_blocklist:version'
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+class BloomFilter:
+    """Bloom filter whose bit layout matches Redis SETBIT/GETBIT (MSB first)"""
+
+    def __init__(self, capacity=100000, error_rate=0.001, bits=None):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        byte_count = (self.size + 7) // 8
+        if bits is not None and len(bits) != byte_count:
+            raise ValueError('Bitset size does not match this filter')
+        self.bits = bytearray(bits) if bits is not None else bytearray(byte_count)
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        positions = self.positions(key)
+        for position in positions:
+            self.bits[position >> 3] |= 0x80 >> (position & 7)
+        return positions
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (0x80 >> (position & 7)) for position in self.positions(key))
+
+
+class TokenBlocklist:
+    """One worker's view of the revoked keys, synced through Redis"""
+
+    def __init__(self, redis, load_keys, capacity=100000, error_rate=0.001, sync_interval=1.0, logger=None):
+        self.redis = redis
+        self.load_keys = load_keys  # Returns every key currently in revoked_tokens
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.logger = logger
+        self.filter = BloomFilter(capacity, error_rate)
+        self.version = None
+        self.stale = True
+        self._unpublished = set()  # Revoked here while Redis was unreachable
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def might_contain(self, key):
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return self.stale or key in self.filter
+
+    def sync(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now < self._next_sync:
+                return
+            # Also paces retries while Redis is down
+            self._next_sync = now + self.sync_interval
+            try:
+                version = self.redis.get(VERSION_KEY)
+                if version is None:
+                    self.rebuild()
+                elif version != self.version:
+                    bits = self.redis.get(BLOOM_KEY)
+                    try:
+                        self.filter = BloomFilter(self.capacity, self.error_rate, bits=bits or None)
+                        self.version = version
+                    except ValueError:
+                        # Sized differently by a worker with other settings
+                        self.rebuild()
+                self.stale = False
+                if self._unpublished:
+                    keys, self._unpublished = list(self._unpublished), set()
+                    self.add(keys)
+            except Exception as e:
+                self.stale = True
+                if self.logger:
+                    self.logger.error(f"Token blocklist sync failed, checking every token against the database: {str(e)}")
+
+    def rebuild(self):
+        """Replace the shared filter with one built from the table"""
+        started = datetime.utcnow()
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        for key in self.load_keys():
+            fresh.add(key)
+        pipe = self.redis.pipeline()
+        pipe.set(BLOOM_KEY, bytes(fresh.bits))
+        pipe.incr(VERSION_KEY)
+        _, version = pipe.execute()
+        self.filter, self.version = fresh, str(version).encode()
+        # Keys revoked while the table was being read may have had their bits overwritten
+        late = list(self.load_keys(since=started - timedelta(seconds=5)))
+        if late:
+            self.add(late)
+
+    def add(self, keys):
+        """Publish newly revoked keys (already committed to the table)"""
+        keys = list(keys)
+        pipe = self.redis.pipeline()
+        for key in keys:
+            for position in self.filter.add(key):
+                pipe.setbit(BLOOM_KEY, position, 1)
+        pipe.incr(VERSION_KEY)
+        try:
+            version = pipe.execute()[-1]
+        except Exception as e:
+            # Check the table until Redis is back, then publish these keys
+            self._unpublished.update(keys)
+            self.stale = True
+            if self.logger:
+                self.logger.error(f"Failed to publish token revocation: {str(e)}")
+            return
+        if self.version is not None and int(self.version) + 1 == version:
+            self.version = str(version).encode()
+        else:
+            self._next_sync = 0.0  # Other workers added keys too; reload on the next check
+
+
+def _load_keys(since=None):
+    from app.models import db
+    from app.models.revoked_token import RevokedToken
+
+    query = db.select(RevokedToken.jti).where(RevokedToken.expires_at > datetime.utcnow())
+    if since is not None:
+        query = query.where(RevokedToken.revoked_at >= since)
+    return db.session.scalars(query).all()
+
+
+def init_token_blocklist(app):
+    from app.services.redis_client import get_redis
+
+    with app.app_context():
+        app.extensions['token_blocklist'] = TokenBlocklist(
+            get_redis(), _load_keys,
+            capacity=app.config.get('TOKEN_BLOCKLIST_CAPACITY', 100000),
+            error_rate=app.config.get('TOKEN_BLOCKLIST_ERROR_RATE', 0.001),
+            sync_interval=app.config.get('TOKEN_BLOCKLIST_SYNC_INTERVAL', 1.0),
+            logger=app.logger
+        )
+
+
+def get_token_blocklist():
+    blocklist = current_app.extensions.get('token_blocklist')
+    if blocklist is None:
+        init_token_blocklist(current_app._get_current_object())
+        blocklist = current_app.extensions['token_blocklist']
+    return blocklist
+
+
+def is_token_revoked(payload):
+    """``token_in_blocklist_loader`` check; I/O only on a Bloom filter hit"""
+    from app.models.revoked_token import RevokedToken
+
+    blocklist = get_token_blocklist()
+    candidates = [key for key in (payload['jti'], user_key(payload['sub'])) if blocklist.might_contain(key)]
+    if not candidates:
+        return False
+
+    for row in RevokedToken.query.filter(RevokedToken.jti.in_(candidates)).all():
+        if row.jti == payload['jti']:
+            return True
+        if payload.get('iat', 0) < int((row.revoked_at - datetime(1970, 1, 1)).total_seconds()):
+            return True
+    return False
+
+
+def revoke_tokens(payloads):
+    """Revoke decoded tokens (e.g. on logout) and commit"""
+    from app.models import db
+    from app.models.revoked_token import RevokedToken
+
+    keys = []
+    for payload in payloads:
+        db.session.merge(RevokedToken(
+            jti=payload['jti'],
+            token_type=payload.get('type', 'access'),
+            user_id=int(payload['sub']) if str(payload.get('sub', '')).isdigit() else None,
+            expires_at=datetime.utcfromtimestamp(payload['exp']) if payload.get('exp') else
+            datetime.utcnow() + current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+        ))
+        keys.append(payload['jti'])
+    db.session.commit()
+    get_token_blocklist().add(keys)
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to a user until now and commit (with any pending changes)"""
+    from app.models import db
+    from app.models.revoked_token import RevokedToken
+
+    now = datetime.utcnow()
+    db.session.merge(RevokedToken(
+        jti=user_key(user_id),
+        token_type='all',
+        user_id=user_id,
+        revoked_at=now,
+        expires_at=now + current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    ))
+    db.session.commit()
+    get_token_blocklist().add([user_key(user_id)])
+
+
+def cleanup_revoked_tokens():
+    """Delete rows whose tokens have expired and shrink the shared filter; returns rows deleted"""
+    from app.models import db
+    from app.models.revoked_token import RevokedToken
+
+    deleted = RevokedToken.query.filter(RevokedToken.expires_at <= datetime.utcnow()).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    get_token_blocklist().rebuild()
+    return deleted
@@ -0,0 +1,127 @@
+"""Authenticated principals, cached per process.
+
+A principal is what authorization needs to know about a user: id, email,
+role and a version. The version is ``users.updated_at`` in milliseconds; a
+flush listener bumps ``updated_at`` whenever a user row changes. Access tokens
+carry the role and version as ``role`` and ``ver`` claims (see
+``token_claims``).
+
+Principals are cached for ``USER_CACHE_TTL`` seconds. Concurrent misses for
+the same user share one query. Committed changes to a user drop that entry
+in this process, and a load that was already running when they committed
+is not cached; other processes see them when the TTL expires, or earlier
+when a token newer than their cached version arrives. A token whose ``ver``
+is ahead of the cached principal forces a reload, so a user who refreshes
+their token after a change is never judged on stale data.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+
+from app.services.response_cache import SingleFlightCache
+
+EPOCH = datetime(1970, 1, 1)
+CHANGED_KEY = 'changed_user_ids'
+
+_listeners_registered = False
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str  # UserRole name
+    version: int
+
+    @property
+    def is_admin(self):
+        return self.role in ('ADMIN', 'SUPER_ADMIN')
+
+    @property
+    def is_super_admin(self):
+        return self.role == 'SUPER_ADMIN'
+
+
+def user_version(updated_at):
+    """Milliseconds since the epoch of a naive UTC ``updated_at``, or 0"""
+    if updated_at is None:
+        return 0
+    return int((updated_at - EPOCH).total_seconds() * 1000)
+
+
+def token_claims(user):
+    """Extra access token claims for a user"""
+    return {'role': user.role.name, 'ver': user_version(user.updated_at)}
+
+
+def load_principal(user_id):
+    from app.models import db, User
+
+    row = db.session.execute(
+        select(User.id, User.email, User.role, User.updated_at).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return Principal(id=row.id, email=row.email, role=row.role.name, version=user_version(row.updated_at))
+
+
+def get_user_cache():
+    cache = current_app.extensions.get('user_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('user_cache', SingleFlightCache(
+            ttl=current_app.config.get('USER_CACHE_TTL', 30.0),
+            max_entries=current_app.config.get('USER_CACHE_MAX_ENTRIES', 10000)
+        ))
+    return cache
+
+
+def resolve_principal(user_id, claims, cache=None, load=load_principal):
+    """The principal for a token's user; None if the user no longer exists"""
+    cache = cache or get_user_cache()
+    key = ('user', user_id)
+    principal = cache.get_or_compute(key, lambda: load(user_id))
+
+    token_version = claims.get('ver')
+    if principal is not None and token_version is not None and token_version > principal.version:
+        # The token was issued after a change this process hasn't seen yet
+        cache.invalidate(key)
+        principal = cache.get_or_compute(key, lambda: load(user_id))
+    return principal
+
+
+def _before_flush(session, flush_context, instances):
+    from app.models import User
+
+    now = datetime.utcnow()
+    changed = session.info.setdefault(CHANGED_KEY, set())
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj, include_collections=False):
+            obj.updated_at = now
+            changed.add(obj.id)
+    changed.update(obj.id for obj in session.deleted if isinstance(obj, User))
+
+
+def _after_commit(session):
+    changed = session.info.pop(CHANGED_KEY, None)
+    if changed and has_app_context():
+        cache = get_user_cache()
+        for user_id in changed:
+            cache.invalidate(('user', user_id))
+
+
+def _after_rollback(session):
+    session.info.pop(CHANGED_KEY, None)
+
+
+def init_user_cache(app):
+    """Bump user versions on change and drop committed changes from the cache"""
+    global _listeners_registered
+    from app.models import db
+
+    if not _listeners_registered:
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
+        _listeners_registered = True
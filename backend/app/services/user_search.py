@@ -0,0 +1,122 @@
+"""Admin user search and listing.
+
+Search matches a substring of the email, first name, last name or phone.
+
+* PostgreSQL: ``LIKE '%term%'`` against one lower-cased document expression, served
+  by a pg_trgm GIN index on that same expression.
+* SQLite (development and tests): an external-content FTS5 table with the
+  trigram tokenizer (``users_fts``), kept in sync with ``users`` by triggers.
+
+Listing is newest first with keyset pagination on ``(created_at, id)``. The
+total on the first page is the planner's row estimate on PostgreSQL, and a
+count capped at ``COUNT_CAP`` elsewhere. Neither scans every matching user.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import func, literal_column, select, text, tuple_
+
+MIN_TERM = 3  # Trigram indexes can't serve shorter substrings
+COUNT_CAP = 10000
+
+# Mirrors the SQLite branch of the migration adding user search, for databases built without it
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+    "email, first_name, last_name, phone, content='users', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, email, first_name, last_name, phone) "
+    "VALUES (new.id, new.email, new.first_name, new.last_name, new.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, email, first_name, last_name, phone) "
+    "VALUES ('delete', old.id, old.email, old.first_name, old.last_name, old.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF email, first_name, last_name, phone ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, email, first_name, last_name, phone) "
+    "VALUES ('delete', old.id, old.email, old.first_name, old.last_name, old.phone); "
+    "INSERT INTO users_fts(rowid, email, first_name, last_name, phone) "
+    "VALUES (new.id, new.email, new.first_name, new.last_name, new.phone); END",
+    "INSERT INTO users_fts(users_fts) VALUES ('rebuild')"
+]
+
+
+class UserSearchError(ValueError):
+    """A search parameter that can't be used"""
+
+
+def install_sqlite_search(connection):
+    for statement in SQLITE_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def search_document(users):
+    """The expression the PostgreSQL trigram index is built on; must match it exactly"""
+    space = literal_column("' '")
+    return func.lower(
+        users.c.email.op('||')(space).op('||')(users.c.first_name).op('||')(space)
+        .op('||')(users.c.last_name).op('||')(space).op('||')(func.coalesce(users.c.phone, literal_column("''")))
+    )
+
+
+def encode_cursor(created_at, user_id):
+    return f"{created_at.isoformat()}_{user_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, user_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(user_id)
+    except ValueError:
+        raise UserSearchError('Invalid cursor')
+
+
+def build_user_query(users, dialect, term=None, role=None):
+    """Ids and creation times of matching users, newest first"""
+    query = select(users.c.id, users.c.created_at)
+
+    if term:
+        if len(term) < MIN_TERM:
+            raise UserSearchError(f'Search needs at least {MIN_TERM} characters')
+        if dialect == 'sqlite':
+            phrase = '"' + term.replace('"', '""') + '"'
+            query = query.where(users.c.id.in_(
+                select(literal_column('rowid')).select_from(text('users_fts'))
+                .where(text('users_fts MATCH :phrase').bindparams(phrase=phrase))
+            ))
+        else:
+            escaped = term.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.where(search_document(users).like(f'%{escaped}%', escape='\\'))
+
+    if role is not None:
+        query = query.where(users.c.role == role)
+
+    return query.order_by(users.c.created_at.desc(), users.c.id.desc())
+
+
+def estimate_total(connection, query):
+    """(row count, whether it is an estimate) without counting every match"""
+    if connection.dialect.name == 'postgresql':
+        compiled = query.compile(dialect=connection.dialect)
+        plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), True
+
+    capped = connection.execute(
+        select(func.count()).select_from(query.order_by(None).limit(COUNT_CAP + 1).subquery())
+    ).scalar()
+    return min(capped, COUNT_CAP), capped > COUNT_CAP
+
+
+def list_users(connection, users, per_page=20, term=None, role=None, cursor=None):
+    """One page of (id, created_at) rows, the next cursor and, on the first page, the total"""
+    query = build_user_query(users, connection.dialect.name, term=term, role=role)
+    total = None if cursor else estimate_total(connection, query)
+
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        query = query.where(tuple_(users.c.created_at, users.c.id) < tuple_(created_at, user_id))
+
+    rows = connection.execute(query.limit(per_page + 1)).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_next else None
+    return rows, next_cursor, total
@@ -1,7 +1,9 @@
 from functools import wraps
-from flask import jsonify, request, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
-from app.models import User, UserRole
+from flask import jsonify, request, current_app, g
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, verify_jwt_in_request
+from app.models import db, User, UserRole
+from app.services.user_cache import resolve_principal
+from app.services.password_hasher import PasswordHasherBusy
 import uuid
 import secrets
 from datetime import datetime, timedelta
@@ -14,34 +16,36 @@ def token_required(f):
         return f(*args, **kwargs)
     return decorated
 
+def current_principal():
+    """The authenticated principal, resolved once per request (None if the user is gone)
+    
+    Call from inside a ``jwt_required`` view.
+    """
+    if 'principal' not in g:
+        identity = get_jwt_identity()
+        try:
+            user_id = int(identity)
+        except (TypeError, ValueError):
+            g.principal = None
+        else:
+            g.principal = resolve_principal(user_id, get_jwt())
+    return g.principal
+
 def admin_required(f):
     """Decorator to require admin role"""
     @wraps(f)
     @jwt_required()
     def decorated(*args, **kwargs):
-        try:
-            current_user_id = get_jwt_identity()
-            current_app.logger.info(f"Admin required - User ID from token: {current_user_id}")
-            
-            # Convert string ID to int for database query
-            user_id = int(current_user_id) if isinstance(current_user_id, str) and current_user_id.isdigit() else current_user_id
-            user = User.query.get(user_id)
-            
-            if not user:
-                current_app.logger.error(f"User not found for ID: {current_user_id}")
-                return jsonify({'error': 'User not found'}), 404
-            
-            current_app.logger.info(f"User found: {user.email}, Role: {user.role}")
-            
-            if user.role not in [UserRole.ADMIN, UserRole.SUPER_ADMIN]:
-                current_app.logger.warning(f"Access denied - User {user.email} is not admin")
-                return jsonify({'error': 'Admin access required'}), 403
-            
-            current_app.logger.info(f"Admin check passed, calling function: {f.__name__}")
-            return f(*args, **kwargs)
-        except Exception as e:
-            current_app.logger.error(f"Admin auth error: {str(e)}")
-            raise
+        principal = current_principal()
+        
+        if not principal:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if not principal.is_admin:
+            current_app.logger.warning(f"Access denied - User {principal.email} is not admin")
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return f(*args, **kwargs)
     return decorated
 
 def super_admin_required(f):
@@ -49,26 +53,26 @@ def super_admin_required(f):
     @wraps(f)
     @jwt_required()
     def decorated(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        # Convert string ID to int for database query
-        user_id = int(current_user_id) if isinstance(current_user_id, str) and current_user_id.isdigit() else current_user_id
-        user = User.query.get(user_id)
+        principal = current_principal()
         
-        if not user:
+        if not principal:
             return jsonify({'error': 'User not found'}), 404
         
-        if user.role != UserRole.SUPER_ADMIN:
+        if not principal.is_super_admin:
             return jsonify({'error': 'Super admin access required'}), 403
         
         return f(*args, **kwargs)
     return decorated
 
 def get_current_user():
-    """Get current authenticated user"""
+    """Get current authenticated user, loaded at most once per request"""
     try:
         verify_jwt_in_request()
-        current_user_id = get_jwt_identity()
-        return User.query.get(current_user_id)
+        if 'current_user' not in g:
+            principal = current_principal()
+            # A user known to be gone needs no query
+            g.current_user = db.session.get(User, principal.id) if principal else None
+        return g.current_user
     except:
         return None
 
@@ -162,6 +166,8 @@ def handle_auth_errors(f):
             return jsonify({'error': str(e)}), 401
         except AuthorizationError as e:
             return jsonify({'error': str(e)}), 403
+        except PasswordHasherBusy:
+            return jsonify({'error': 'Too many sign-in requests right now, please retry shortly'}), 503, {'Retry-After': '1'}
         except Exception as e:
             current_app.logger.error(f"Unexpected error in {f.__name__}: {str(e)}")
             return jsonify({'error': 'An unexpected error occurred'}), 500
@@ -0,0 +1,61 @@
+from functools import wraps
+import math
+from flask import request, jsonify, current_app, make_response
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from app.services.rate_limiter import get_rate_limiter, hash_identity
+
+def client_ip():
+    """Client address, skipping ``RATE_LIMIT_PROXY_HOPS`` trusted proxies in X-Forwarded-For"""
+    hops = current_app.config.get('RATE_LIMIT_PROXY_HOPS', 0)
+    if hops:
+        route = request.access_route
+        if len(route) >= hops:
+            return route[-hops]
+    return request.remote_addr or 'unknown'
+
+def _identify(scope):
+    if scope == 'ip':
+        return client_ip()
+    if scope == 'user':
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            identity = None  # Invalid tokens are left for the view to reject
+        return f'user:{identity}' if identity else f'ip:{client_ip()}'
+    if scope == 'account':
+        data = request.get_json(silent=True)
+        email = data.get('email') if isinstance(data, dict) else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return hash_identity(email.lower().strip())
+    return None
+
+def _set_headers(response, decision):
+    response.headers['RateLimit-Limit'] = str(decision.limit)
+    response.headers['RateLimit-Remaining'] = str(decision.remaining)
+    response.headers['RateLimit-Reset'] = str(math.ceil(decision.reset_after))
+    return response
+
+def rate_limit(policy):
+    """Decorator applying the ``RATE_LIMITS`` policy of that name; refuses with 429"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            decision = get_rate_limiter().check(policy, _identify)
+            if decision is None:
+                return f(*args, **kwargs)
+
+            if not decision.allowed:
+                retry_after = max(1, math.ceil(decision.retry_after))
+                response = jsonify({
+                    'error': 'Too many requests, please try again later',
+                    'retry_after': retry_after
+                })
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                return _set_headers(response, decision)
+
+            return _set_headers(make_response(f(*args, **kwargs)), decision)
+        return decorated
+    return decorator
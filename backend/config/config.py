@@ -16,6 +16,31 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL') or 30.0)  # Seconds a resolved principal (id, role, version) is reused per process
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS') or 12)  # Cost of new password hashes; older hashes are upgraded at login
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 0) or None  # bcrypt threads per process (default: CPU count)
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 0) or None  # Requests allowed to wait for a thread (default: 4 per thread)
+    PASSWORD_HASH_WAIT = float(os.environ.get('PASSWORD_HASH_WAIT') or 1.0)  # Seconds to wait for a queue place before answering 503
+    TOKEN_BLOCKLIST_CAPACITY = int(os.environ.get('TOKEN_BLOCKLIST_CAPACITY') or 100000)  # Unexpired revocations the Bloom filter is sized for
+    TOKEN_BLOCKLIST_ERROR_RATE = float(os.environ.get('TOKEN_BLOCKLIST_ERROR_RATE') or 0.001)  # False positives cost one indexed lookup
+    TOKEN_BLOCKLIST_SYNC_INTERVAL = float(os.environ.get('TOKEN_BLOCKLIST_SYNC_INTERVAL') or 1.0)  # Seconds between checks for revocations by other workers
+    
+    # Redis (shared by all workers; an in-process fakeredis stands in when unset)
+    REDIS_URL = os.environ.get('REDIS_URL')
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT') or 0.5)  # Seconds; callers fall back to the database on timeout
+    
+    # Rate limiting ("<count>/<period> per ip|user|account", ';' separated)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE') or 'auto'  # memory, redis, or auto (redis when REDIS_URL is set)
+    RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS') or 0)  # Trusted proxies in front of the app (X-Forwarded-For)
+    RATE_LIMIT_REDIS_RETRY = float(os.environ.get('RATE_LIMIT_REDIS_RETRY') or 5.0)  # Seconds to limit per process after a Redis error
+    RATE_LIMITS = {
+        'login': os.environ.get('RATE_LIMIT_LOGIN') or '10/minute per ip; 5/minute per account; 50/day per account',
+        'check_email': os.environ.get('RATE_LIMIT_CHECK_EMAIL') or '20/minute per ip',
+        'contact': os.environ.get('RATE_LIMIT_CONTACT') or '3/minute per ip; 10/hour per ip',
+        'search_suggestions': os.environ.get('RATE_LIMIT_SEARCH_SUGGESTIONS') or '120/minute per user',
+        'appointments': os.environ.get('RATE_LIMIT_APPOINTMENTS') or '5/minute per user; 20/day per user',
+    }
     
     # Mail configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
@@ -24,11 +49,60 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME') or 'almahraweb@gmail.com'
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'support.almahra@gmail.com'
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT') or 30)  # Per-connection socket timeout (seconds)
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE') or 4)  # Persistent SMTP connections per process
+    MAIL_POOL_MAX_IDLE = int(os.environ.get('MAIL_POOL_MAX_IDLE') or 60)  # Probe with NOOP after this many idle seconds
+    
+    # Email delivery log (buffered, written by a background thread)
+    EMAIL_LOG_ENABLED = os.environ.get('EMAIL_LOG_ENABLED', 'true').lower() in ['true', 'on', '1']
+    EMAIL_LOG_BATCH_SIZE = int(os.environ.get('EMAIL_LOG_BATCH_SIZE') or 500)
+    EMAIL_LOG_FLUSH_INTERVAL = float(os.environ.get('EMAIL_LOG_FLUSH_INTERVAL') or 2.0)  # Seconds
+    EMAIL_LOG_MAX_RETRIES = int(os.environ.get('EMAIL_LOG_MAX_RETRIES') or 5)  # Failed writes of a batch before it is only logged
+    
+    # Bulk email campaigns
+    CAMPAIGN_BATCH_SIZE = int(os.environ.get('CAMPAIGN_BATCH_SIZE') or 500)  # Recipients per checkpoint
+    CAMPAIGN_RATE_LIMIT = float(os.environ.get('CAMPAIGN_RATE_LIMIT') or 10)  # Default messages per second
+    CAMPAIGN_CONCURRENCY = int(os.environ.get('CAMPAIGN_CONCURRENCY') or 2)  # Default parallel SMTP sessions
+    CAMPAIGN_STALE_AFTER = int(os.environ.get('CAMPAIGN_STALE_AFTER') or 300)  # Seconds without a heartbeat before a run can be taken over
     
     # Stripe configuration
     STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY')
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+    STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE')  # e.g. http://127.0.0.1:12111 for the local stand-in
+    STRIPE_STANDIN = os.environ.get('STRIPE_STANDIN', 'false').lower() in ['true', 'on', '1']  # Start the local stand-in in-process (load tests only)
+    STRIPE_STANDIN_PORT = int(os.environ.get('STRIPE_STANDIN_PORT') or 0)  # 0 picks a free port
+    STRIPE_STANDIN_LATENCY_MS = float(os.environ.get('STRIPE_STANDIN_LATENCY_MS') or 0)
+    STRIPE_STANDIN_FAILURE_RATE = float(os.environ.get('STRIPE_STANDIN_FAILURE_RATE') or 0.0)  # Fraction of calls that return 500
+    STRIPE_STANDIN_WEBHOOK_URL = os.environ.get('STRIPE_STANDIN_WEBHOOK_URL')  # e.g. http://127.0.0.1:5000/api/payments/webhook
+    STRIPE_CONNECT_TIMEOUT = float(os.environ.get('STRIPE_CONNECT_TIMEOUT') or 3.0)  # Seconds
+    STRIPE_READ_TIMEOUT = float(os.environ.get('STRIPE_READ_TIMEOUT') or 15.0)  # Seconds
+    STRIPE_MAX_RETRIES = int(os.environ.get('STRIPE_MAX_RETRIES') or 2)  # Network retries with backoff
+    STRIPE_POOL_SIZE = int(os.environ.get('STRIPE_POOL_SIZE') or 10)  # Pooled HTTPS connections per process
+    STRIPE_BREAKER_THRESHOLD = int(os.environ.get('STRIPE_BREAKER_THRESHOLD') or 5)  # Consecutive failures before failing fast
+    STRIPE_BREAKER_RESET = float(os.environ.get('STRIPE_BREAKER_RESET') or 30.0)  # Seconds before a trial call
+    PAYMENT_INTENT_ABANDON_AFTER = int(os.environ.get('PAYMENT_INTENT_ABANDON_AFTER') or 86400)  # Seconds before an unused intent is cancelled
+    RECONCILE_WINDOW_HOURS = int(os.environ.get('RECONCILE_WINDOW_HOURS') or 24)  # Orders per reconciliation batch, by creation time
+    RECONCILE_LAG_MINUTES = int(os.environ.get('RECONCILE_LAG_MINUTES') or 30)  # Skip orders newer than this
+    RECONCILE_INTENT_LOOKBACK_HOURS = int(os.environ.get('RECONCILE_INTENT_LOOKBACK_HOURS') or 48)  # Max intent age at order time
+    STRIPE_EVENT_WORKER_ENABLED = os.environ.get('STRIPE_EVENT_WORKER_ENABLED', 'true').lower() in ['true', 'on', '1']  # Off if only 'flask stripe-events process' applies events
+    STRIPE_EVENT_BATCH_SIZE = int(os.environ.get('STRIPE_EVENT_BATCH_SIZE') or 100)
+    STRIPE_EVENT_POLL_INTERVAL = float(os.environ.get('STRIPE_EVENT_POLL_INTERVAL') or 5.0)  # Seconds
+    STRIPE_EVENT_MAX_ATTEMPTS = int(os.environ.get('STRIPE_EVENT_MAX_ATTEMPTS') or 5)
+    STRIPE_EVENT_RETRY_BACKOFF = int(os.environ.get('STRIPE_EVENT_RETRY_BACKOFF') or 30)  # Seconds before the first retry; doubles each attempt
+    
+    # Appointment calendar (times are shop-local)
+    APPOINTMENT_TIMEZONE = os.environ.get('APPOINTMENT_TIMEZONE') or 'Asia/Qatar'
+    APPOINTMENT_SLOT_MINUTES = int(os.environ.get('APPOINTMENT_SLOT_MINUTES') or 30)  # Start time grid; run 'flask appointments rebuild-calendar' after changing
+    APPOINTMENT_STAFF_CAPACITY = int(os.environ.get('APPOINTMENT_STAFF_CAPACITY') or 2)  # Appointments that can overlap
+    APPOINTMENT_BOOKING_DAYS = int(os.environ.get('APPOINTMENT_BOOKING_DAYS') or 92)  # How far ahead customers can book
+    APPOINTMENT_OPENING_HOURS = {  # Per weekday, comma separated ranges; empty = closed
+        'mon': '09:30-23:00', 'tue': '09:30-23:00', 'wed': '09:30-23:00', 'thu': '09:30-23:00',
+        'fri': '15:00-23:00', 'sat': '09:30-23:00', 'sun': '09:30-23:00',
+    }
+    APPOINTMENT_DURATIONS = {  # Minutes per AppointmentType name, rounded up to whole slots
+        'EYE_EXAM': 30, 'FRAME_FITTING': 30, 'CONTACT_LENS': 60, 'CONSULTATION': 30,
+    }
     
     # File upload configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -37,6 +111,17 @@ class Config:
     # AR Service configuration
     AR_SERVICE_URL = os.environ.get('AR_SERVICE_URL') or 'http://localhost:5001'
     
+    # Admin dashboard
+    DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL') or 10.0)  # Seconds a computed dashboard is served from memory
+    ANALYTICS_MAX_DAYS = int(os.environ.get('ANALYTICS_MAX_DAYS') or 1096)  # Longest date range /admin/analytics accepts
+    BULK_ORDER_STATUS_LIMIT = int(os.environ.get('BULK_ORDER_STATUS_LIMIT') or 500)  # Most orders one bulk status request may change
+    BULK_PRODUCT_UPDATE_LIMIT = int(os.environ.get('BULK_PRODUCT_UPDATE_LIMIT') or 1000)  # Most rows one bulk product update may carry
+    LOW_STOCK_ALERT_EMAILS = [email.strip() for email in (os.environ.get('LOW_STOCK_ALERT_EMAILS') or '').split(',') if email.strip()]
+    LOW_STOCK_DIGEST_DELAY = float(os.environ.get('LOW_STOCK_DIGEST_DELAY') or 300)  # Seconds to collect threshold crossings into one email
+    LOW_STOCK_CLAIM_TIMEOUT = float(os.environ.get('LOW_STOCK_CLAIM_TIMEOUT') or 900)  # Seconds before a digest that never finished sending gives its products back
+    FORECAST_HISTORY_DAYS = int(os.environ.get('FORECAST_HISTORY_DAYS') or 730)  # Days of sales behind each velocity forecast
+    FORECAST_HALF_LIFE_DAYS = float(os.environ.get('FORECAST_HALF_LIFE_DAYS') or 14)  # Days for a sale's weight in the velocity to halve
+    
     # Pagination
     PRODUCTS_PER_PAGE = 20
     ORDERS_PER_PAGE = 10
@@ -56,6 +141,9 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    BCRYPT_LOG_ROUNDS = 4  # Fast hashes for tests
+    RATE_LIMIT_ENABLED = False
+    STRIPE_EVENT_WORKER_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,47 @@
+"""Add daily rollup tables for the admin dashboard
+
+Revision ID: 0a0d8f21f119
+Revises: 96a5723a3ce2
+Create Date: 2026-10-18 16:10:42.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a0d8f21f119'
+down_revision = '96a5723a3ce2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_order_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    op.create_table('daily_customer_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('new_customers', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('daily_product_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+
+    # Run "flask rollups backfill" after upgrading to populate existing history
+
+
+def downgrade():
+    op.drop_table('daily_product_sales')
+    op.drop_table('daily_customer_stats')
+    op.drop_table('daily_order_stats')
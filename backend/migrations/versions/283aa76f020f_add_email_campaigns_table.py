@@ -0,0 +1,48 @@
+"""Add email_campaigns table
+
+Revision ID: 283aa76f020f
+Revises: 926395f381f3
+Create Date: 2026-10-18 11:03:27.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '283aa76f020f'
+down_revision = '926395f381f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('email_campaigns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('template', sa.String(length=50), nullable=False),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('audience', sa.Enum('CUSTOMERS', 'ALL_USERS', name='campaignaudience'), nullable=False),
+    sa.Column('verified_only', sa.Boolean(), nullable=True),
+    sa.Column('rate_limit', sa.Float(), nullable=False),
+    sa.Column('concurrency', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('DRAFT', 'RUNNING', 'PAUSED', 'COMPLETED', 'FAILED', name='campaignstatus'), nullable=False),
+    sa.Column('last_user_id', sa.Integer(), nullable=False),
+    sa.Column('sent_count', sa.Integer(), nullable=False),
+    sa.Column('failed_count', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('email_campaigns')
+    sa.Enum(name='campaignstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='campaignaudience').drop(op.get_bind(), checkfirst=True)
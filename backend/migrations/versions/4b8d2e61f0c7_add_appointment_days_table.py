@@ -0,0 +1,32 @@
+"""Add appointment slot occupancy table
+
+Revision ID: 4b8d2e61f0c7
+Revises: a91f3c27d6e4
+Create Date: 2026-10-18 23:41:08.226517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8d2e61f0c7'
+down_revision = 'a91f3c27d6e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('appointment_days',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('slot_minutes', sa.Integer(), nullable=False),
+    sa.Column('layers', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+    # Run "flask appointments rebuild-calendar" after upgrading to count existing bookings
+
+
+def downgrade():
+    op.drop_table('appointment_days')
@@ -0,0 +1,69 @@
+"""Add user search and listing indexes
+
+Revision ID: 5d2e9b7c41a8
+Revises: ab61c0e4d7f3
+Create Date: 2026-10-18 19:15:36.448120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e9b7c41a8'
+down_revision = 'ab61c0e4d7f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination of the admin user list, optionally by role
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_users_role_created_at_id', ['role', 'created_at', 'id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Must match app.services.user_search.search_document
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            "CREATE INDEX ix_users_search_trgm ON users USING gin "
+            "((lower(email || ' ' || first_name || ' ' || last_name || ' ' || coalesce(phone, ''))) gin_trgm_ops)"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE users_fts USING fts5("
+            "email, first_name, last_name, phone, content='users', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+            "INSERT INTO users_fts(rowid, email, first_name, last_name, phone) "
+            "VALUES (new.id, new.email, new.first_name, new.last_name, new.phone); END"
+        )
+        op.execute(
+            "CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+            "INSERT INTO users_fts(users_fts, rowid, email, first_name, last_name, phone) "
+            "VALUES ('delete', old.id, old.email, old.first_name, old.last_name, old.phone); END"
+        )
+        op.execute(
+            "CREATE TRIGGER users_fts_au AFTER UPDATE OF email, first_name, last_name, phone ON users BEGIN "
+            "INSERT INTO users_fts(users_fts, rowid, email, first_name, last_name, phone) "
+            "VALUES ('delete', old.id, old.email, old.first_name, old.last_name, old.phone); "
+            "INSERT INTO users_fts(rowid, email, first_name, last_name, phone) "
+            "VALUES (new.id, new.email, new.first_name, new.last_name, new.phone); END"
+        )
+        op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_users_search_trgm')
+    elif dialect == 'sqlite':
+        for trigger in ('users_fts_ai', 'users_fts_ad', 'users_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS users_fts')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role_created_at_id')
+        batch_op.drop_index('ix_users_created_at_id')
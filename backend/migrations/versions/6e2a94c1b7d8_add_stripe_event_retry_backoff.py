@@ -0,0 +1,28 @@
+"""Add retry backoff and per-intent index to stripe_events
+
+Revision ID: 6e2a94c1b7d8
+Revises: d5f07a3c9e21
+Create Date: 2026-10-19 11:26:05.174382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2a94c1b7d8'
+down_revision = 'd5f07a3c9e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('stripe_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_stripe_events_intent', ['payment_intent_id', 'stripe_created', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stripe_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_stripe_events_intent')
+        batch_op.drop_column('next_attempt_at')
@@ -0,0 +1,47 @@
+"""Add product sales velocity forecasts table
+
+Revision ID: 7c4e0d9a5b13
+Revises: e3b81f6c2a90
+Create Date: 2026-10-18 22:12:50.904127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e0d9a5b13'
+down_revision = 'e3b81f6c2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_forecasts',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('velocity', sa.Float(), nullable=False),
+    sa.Column('units_30d', sa.Integer(), nullable=False),
+    sa.Column('stock_quantity', sa.Integer(), nullable=False),
+    sa.Column('days_until_stockout', sa.Float(), nullable=True),
+    sa.Column('stockout_date', sa.Date(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    with op.batch_alter_table('product_forecasts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_forecasts_days_until_stockout'), ['days_until_stockout'], unique=False)
+        batch_op.create_index(batch_op.f('ix_product_forecasts_stock_quantity'), ['stock_quantity'], unique=False)
+        batch_op.create_index(batch_op.f('ix_product_forecasts_units_30d'), ['units_30d'], unique=False)
+        batch_op.create_index(batch_op.f('ix_product_forecasts_velocity'), ['velocity'], unique=False)
+
+    # Run "flask stock forecast" after upgrading, then schedule it daily
+
+
+def downgrade():
+    with op.batch_alter_table('product_forecasts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_forecasts_velocity'))
+        batch_op.drop_index(batch_op.f('ix_product_forecasts_units_30d'))
+        batch_op.drop_index(batch_op.f('ix_product_forecasts_stock_quantity'))
+        batch_op.drop_index(batch_op.f('ix_product_forecasts_days_until_stockout'))
+
+    op.drop_table('product_forecasts')
@@ -0,0 +1,44 @@
+"""Add checkout_intents table
+
+Revision ID: 922b92b4aa3c
+Revises: c6618dcf0ee3
+Create Date: 2026-10-18 13:40:52.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '922b92b4aa3c'
+down_revision = 'c6618dcf0ee3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('checkout_intents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('payment_intent_id', sa.String(length=255), nullable=False),
+    sa.Column('client_secret', sa.String(length=255), nullable=False),
+    sa.Column('cart_hash', sa.String(length=64), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('payment_intent_id')
+    )
+    with op.batch_alter_table('checkout_intents', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_checkout_intents_updated_at'), ['updated_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_checkout_intents_user_id'), ['user_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('checkout_intents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_checkout_intents_user_id'))
+        batch_op.drop_index(batch_op.f('ix_checkout_intents_updated_at'))
+
+    op.drop_table('checkout_intents')
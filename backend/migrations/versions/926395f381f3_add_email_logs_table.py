@@ -0,0 +1,52 @@
+"""Add email_logs table
+
+Revision ID: 926395f381f3
+Revises: beb7f69f72a4
+Create Date: 2026-10-18 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '926395f381f3'
+down_revision = 'beb7f69f72a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('email_logs',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('recipient', sa.String(length=120), nullable=False),
+    sa.Column('template', sa.String(length=50), nullable=True),
+    sa.Column('subject', sa.String(length=255), nullable=True),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('appointment_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('SENT', 'FAILED', name='emailstatus'), nullable=False),
+    sa.Column('latency_ms', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_email_logs_appointment_id'), ['appointment_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_email_logs_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_email_logs_order_id'), ['order_id'], unique=False)
+        batch_op.create_index('ix_email_logs_recipient_id', ['recipient', 'id'], unique=False)
+        batch_op.create_index('ix_email_logs_status_id', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_logs_status_id')
+        batch_op.drop_index('ix_email_logs_recipient_id')
+        batch_op.drop_index(batch_op.f('ix_email_logs_order_id'))
+        batch_op.drop_index(batch_op.f('ix_email_logs_created_at'))
+        batch_op.drop_index(batch_op.f('ix_email_logs_appointment_id'))
+
+    op.drop_table('email_logs')
+    sa.Enum(name='emailstatus').drop(op.get_bind(), checkfirst=True)
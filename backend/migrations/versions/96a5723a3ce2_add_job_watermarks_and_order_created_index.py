@@ -0,0 +1,36 @@
+"""Add job_watermarks table and index orders by creation time
+
+Revision ID: 96a5723a3ce2
+Revises: 922b92b4aa3c
+Create Date: 2026-10-18 15:02:19.846021
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '96a5723a3ce2'
+down_revision = '922b92b4aa3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('position', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # Time-window scans (reconciliation, reporting) walk orders in creation order
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_created_at_id')
+
+    op.drop_table('job_watermarks')
@@ -0,0 +1,26 @@
+"""Add claimed_at to low_stock_products
+
+Revision ID: a3c5e7f90b12
+Revises: 6e2a94c1b7d8
+Create Date: 2026-10-20 09:14:37.502118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f90b12'
+down_revision = '6e2a94c1b7d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('low_stock_products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('low_stock_products', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
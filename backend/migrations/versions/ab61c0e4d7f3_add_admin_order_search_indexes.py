@@ -0,0 +1,50 @@
+"""Add indexes for admin order search
+
+Revision ID: ab61c0e4d7f3
+Revises: cf160b1eb89f
+Create Date: 2026-10-18 18:40:17.092554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ab61c0e4d7f3'
+down_revision = 'cf160b1eb89f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_status_created_at_id', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_customer_email_lower', 'orders', [sa.text('lower(customer_email)')], unique=False)
+
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('order_items', schema=None) as batch_op:
+            batch_op.create_index('ix_order_items_product_sku', ['product_sku'], unique=False)
+        return
+
+    # Substring (ILIKE '%...%') searches use trigram indexes; prefix LIKE needs pattern ops
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_orders_customer_email_trgm', 'orders', ['customer_email'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'customer_email': 'gin_trgm_ops'})
+    op.create_index('ix_orders_order_number_pattern', 'orders', ['order_number'], unique=False,
+                    postgresql_ops={'order_number': 'varchar_pattern_ops'})
+    op.create_index('ix_order_items_product_name_trgm', 'order_items', ['product_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'product_name': 'gin_trgm_ops'})
+    op.create_index('ix_order_items_product_sku', 'order_items', ['product_sku'], unique=False,
+                    postgresql_ops={'product_sku': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_order_items_product_sku', table_name='order_items')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_order_items_product_name_trgm', table_name='order_items')
+        op.drop_index('ix_orders_order_number_pattern', table_name='orders')
+        op.drop_index('ix_orders_customer_email_trgm', table_name='orders')
+
+    op.drop_index('ix_orders_customer_email_lower', table_name='orders')
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_status_created_at_id')
@@ -0,0 +1,27 @@
+"""Index order_items by order
+
+Revision ID: cf160b1eb89f
+Revises: fdfbf08e047a
+Create Date: 2026-10-18 18:02:51.774310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf160b1eb89f'
+down_revision = 'fdfbf08e047a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Items are loaded per order or per chunk of orders (exports, dashboards)
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_items_order_id'), ['order_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_items_order_id'))
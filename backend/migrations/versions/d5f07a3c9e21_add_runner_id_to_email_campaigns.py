@@ -0,0 +1,26 @@
+"""Add runner_id to email_campaigns
+
+Revision ID: d5f07a3c9e21
+Revises: 4b8d2e61f0c7
+Create Date: 2026-10-19 10:12:44.903615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f07a3c9e21'
+down_revision = '4b8d2e61f0c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('email_campaigns', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('runner_id', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('email_campaigns', schema=None) as batch_op:
+        batch_op.drop_column('runner_id')
@@ -0,0 +1,46 @@
+"""Add materialized low stock products table
+
+Revision ID: e3b81f6c2a90
+Revises: 5d2e9b7c41a8
+Create Date: 2026-10-18 21:04:17.338415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b81f6c2a90'
+down_revision = '5d2e9b7c41a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('low_stock_products',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('stock_quantity', sa.Integer(), nullable=False),
+    sa.Column('threshold', sa.Integer(), nullable=False),
+    sa.Column('since', sa.DateTime(), nullable=False),
+    sa.Column('alerted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    with op.batch_alter_table('low_stock_products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_low_stock_products_alerted_at'), ['alerted_at'], unique=False)
+        batch_op.create_index('ix_low_stock_products_stock', ['stock_quantity', 'product_id'], unique=False)
+
+    # Seed with products already low; they are marked alerted so the first digest only covers new crossings
+    op.execute(
+        "INSERT INTO low_stock_products (product_id, stock_quantity, threshold, since, alerted_at) "
+        "SELECT id, stock_quantity, low_stock_threshold, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM products "
+        "WHERE is_active AND track_inventory AND stock_quantity <= low_stock_threshold"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('low_stock_products', schema=None) as batch_op:
+        batch_op.drop_index('ix_low_stock_products_stock')
+        batch_op.drop_index(batch_op.f('ix_low_stock_products_alerted_at'))
+
+    op.drop_table('low_stock_products')
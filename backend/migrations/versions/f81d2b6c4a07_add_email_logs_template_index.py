@@ -0,0 +1,26 @@
+"""Add (template, id) index to email_logs
+
+Revision ID: f81d2b6c4a07
+Revises: a3c5e7f90b12
+Create Date: 2026-10-20 10:02:51.318640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f81d2b6c4a07'
+down_revision = 'a3c5e7f90b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_email_logs_template_id', ['template', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_logs_template_id')
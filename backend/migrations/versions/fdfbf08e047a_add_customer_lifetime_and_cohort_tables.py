@@ -0,0 +1,64 @@
+"""Add customer lifetime and cohort retention tables
+
+Revision ID: fdfbf08e047a
+Revises: 0a0d8f21f119
+Create Date: 2026-10-18 17:24:08.301642
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fdfbf08e047a'
+down_revision = '0a0d8f21f119'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('customer_lifetimes',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('cohort_month', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('first_order_at', sa.DateTime(), nullable=False),
+    sa.Column('last_order_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('customer_lifetimes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_customer_lifetimes_cohort_month'), ['cohort_month'], unique=False)
+
+    op.create_table('customer_active_months',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+    op.create_table('cohort_retention',
+    sa.Column('cohort_month', sa.Date(), nullable=False),
+    sa.Column('months_since', sa.Integer(), nullable=False),
+    sa.Column('customers', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('cohort_month', 'months_since')
+    )
+
+    # Incremental refreshes look for orders changed since the last run
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_updated_at')
+
+    op.drop_table('cohort_retention')
+    op.drop_table('customer_active_months')
+    with op.batch_alter_table('customer_lifetimes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_customer_lifetimes_cohort_month'))
+
+    op.drop_table('customer_lifetimes')
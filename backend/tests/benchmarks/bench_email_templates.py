@@ -0,0 +1,58 @@
+"""Render 10k order confirmation emails: per-call compile vs the template registry.
+
+    python tests/benchmarks/bench_email_templates.py [count]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask, render_template_string
+
+from app.services.email_templates import TEMPLATE_DIR, registry, strip_html_tags
+
+
+def make_orders(count):
+    orders = []
+    for i in range(count):
+        items = [
+            SimpleNamespace(product_name=f'Frame {i}-{j}', quantity=j + 1,
+                            unit_price=Decimal('49.99'), total_price=Decimal('49.99') * (j + 1))
+            for j in range(3)
+        ]
+        orders.append(SimpleNamespace(
+            id=i, order_number=f'ORD{i:08d}', created_at=datetime.utcnow(),
+            total_amount=sum(item.total_price for item in items), items=items
+        ))
+    return orders
+
+
+def report(label, count, elapsed):
+    print(f"{label:<40} {count:>6} emails  {elapsed:7.3f}s  {count / elapsed:9.1f} emails/s")
+
+
+def main(count=10000):
+    orders = make_orders(count)
+    with open(os.path.join(TEMPLATE_DIR, 'order_confirmation.html')) as f:
+        source = f.read()
+
+    app = Flask(__name__)
+    with app.app_context():
+        start = time.perf_counter()
+        for order in orders:
+            html_body = render_template_string(source, order=order, items=order.items)
+            strip_html_tags(html_body)
+        report('render_template_string + strip tags', count, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for order in orders:
+        registry.render('order_confirmation', order=order, items=order.items)
+    report('Precompiled registry (html + text)', count, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
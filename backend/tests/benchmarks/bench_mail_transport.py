@@ -0,0 +1,88 @@
+"""Messages per second: one SMTP session per email vs the pooled transport.
+
+Runs against a local aiosmtpd sink, so it measures connection overhead only:
+
+    python tests/benchmarks/bench_mail_transport.py [count]
+"""
+import os
+import sys
+import socket
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from aiosmtpd.controller import Controller
+from flask import Flask
+from flask_mail import Mail, Message
+
+from app.services.mail_transport import SMTPConnectionPool, MailTransport
+
+
+class CountingHandler:
+    def __init__(self):
+        self.count = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.count += 1
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_messages(count):
+    return [
+        Message(subject=f'Order Confirmation - BENCH{i}', recipients=[f'customer{i}@example.com'],
+                html='<p>Thank you for your order</p>', body='Thank you for your order',
+                sender='support.almahra@gmail.com')
+        for i in range(count)
+    ]
+
+
+def report(label, count, elapsed):
+    print(f"{label:<32} {count:>6} msgs  {elapsed:7.3f}s  {count / elapsed:9.1f} msgs/s")
+
+
+def main(count=500):
+    handler = CountingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+
+    app = Flask(__name__)
+    app.config.update(MAIL_SERVER=controller.hostname, MAIL_PORT=controller.port,
+                      MAIL_SUPPRESS_SEND=False)
+    mail = Mail(app)
+
+    try:
+        with app.app_context():
+            messages = make_messages(count)
+            start = time.perf_counter()
+            for message in messages:
+                mail.send(message)
+            report('Flask-Mail (session per email)', count, time.perf_counter() - start)
+
+            transport = MailTransport(SMTPConnectionPool(controller.hostname, controller.port, timeout=5))
+
+            messages = make_messages(count)
+            start = time.perf_counter()
+            for message in messages:
+                transport.send(message)
+            report('Pooled transport send()', count, time.perf_counter() - start)
+
+            messages = make_messages(count)
+            start = time.perf_counter()
+            transport.send_many(messages)
+            report('Pooled transport send_many()', count, time.perf_counter() - start)
+
+            transport.close()
+    finally:
+        controller.stop()
+
+    assert handler.count == count * 3
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,61 @@
+"""Checkout payment flows per second through the gateway, fully offline.
+
+Each flow is what one checkout costs in Stripe calls: create the intent,
+confirm it (done by Stripe.js in the browser), retrieve it in
+confirm-payment, then refund. Runs against the local stand-in with
+configurable latency and failure injection:
+
+    python tests/benchmarks/bench_payment_gateway.py [flows] [threads] [latency_ms] [failure_rate]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import stripe
+from flask import Flask
+
+from app.services.payment_gateway import init_payment_gateway
+from app.services.stripe_standin import start_standin_server
+
+
+def checkout_flow(gateway):
+    try:
+        intent = gateway.create_payment_intent(amount=12999, currency='usd', metadata={'user_id': '1'})
+        stripe.PaymentIntent.confirm(intent.id, payment_method='pm_card_visa')
+        assert gateway.retrieve_payment_intent(intent.id).status == 'succeeded'
+        gateway.create_refund(payment_intent=intent.id, reason='requested_by_customer')
+        return True
+    except stripe.error.StripeError:
+        return False
+
+
+def main(flows=500, threads=8, latency_ms=0.0, failure_rate=0.0):
+    server, base_url = start_standin_server(latency_ms=latency_ms, failure_rate=failure_rate)
+    app = Flask(__name__)
+    app.config.update(STRIPE_API_BASE=base_url, STRIPE_POOL_SIZE=threads, STRIPE_BREAKER_THRESHOLD=1000)
+    init_payment_gateway(app)
+    gateway = app.extensions['payment_gateway']
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(lambda _: checkout_flow(gateway), range(flows)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    failed = results.count(False)
+    print(f"{flows} flows x 4 calls, {threads} threads, {latency_ms:.0f}ms latency, "
+          f"{failure_rate:.0%} injected failures")
+    print(f"{elapsed:7.3f}s  {flows / elapsed:9.1f} flows/s  {failed} failed after retries")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 500,
+         int(args[1]) if len(args) > 1 else 8,
+         float(args[2]) if len(args) > 2 else 0.0,
+         float(args[3]) if len(args) > 3 else 0.0)
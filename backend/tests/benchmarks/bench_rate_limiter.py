@@ -0,0 +1,59 @@
+"""Per-request overhead of the rate limiter on a trivial endpoint.
+
+Posts to the same endpoint with the limiter disabled and enabled and
+reports the difference per request, for the in-memory store or Redis:
+
+    python tests/benchmarks/bench_rate_limiter.py [requests] [redis_url]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask, jsonify
+
+from app.services.rate_limiter import MemoryStore, RateLimiter, RedisStore
+from app.utils.rate_limit import rate_limit
+
+
+def make_app(store):
+    app = Flask(__name__)
+    app.extensions['rate_limiter'] = RateLimiter(store, {'ping': '1000000/minute per ip'})
+
+    @app.route('/ping', methods=['POST'])
+    @rate_limit('ping')
+    def ping():
+        return jsonify({'ok': True}), 201
+
+    return app
+
+
+def timed(client, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.post('/ping')
+    return time.perf_counter() - start
+
+
+def main(requests=5000, redis_url=None):
+    store = MemoryStore()
+    if redis_url:
+        import redis
+        store = RedisStore(redis.Redis.from_url(redis_url))
+    app = make_app(store)
+    client = app.test_client()
+    limiter = app.extensions['rate_limiter']
+
+    limiter.enabled = False
+    timed(client, 100)  # Warm up
+    baseline = timed(client, requests)
+    limiter.enabled = True
+    limited = timed(client, requests)
+
+    print(f"{type(store).__name__:<12} {requests} requests  baseline {baseline:7.3f}s  limited {limited:7.3f}s  "
+          f"overhead {(limited - baseline) / requests * 1e6:8.1f} us/request")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, sys.argv[2] if len(sys.argv) > 2 else None)
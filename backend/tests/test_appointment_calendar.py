@@ -0,0 +1,123 @@
+import os
+import sys
+from datetime import date, datetime
+from enum import Enum
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from app.services.appointment_calendar import (
+    Booking, Calendar, InvalidSlot, SlotUnavailable, add_booking, free_starts, remove_booking, slot_indexes
+)
+
+
+class AppointmentType(Enum):
+    EYE_EXAM = 'eye_exam'
+    CONTACT_LENS = 'contact_lens'
+
+
+HOURS = {day: '09:30-23:00' for day in ('mon', 'tue', 'wed', 'thu', 'sat', 'sun')}
+HOURS['fri'] = '15:00-23:00'
+
+MONDAY = date(2026, 10, 19)
+FRIDAY = date(2026, 10, 23)
+SUNDAY_MORNING = datetime(2026, 10, 18, 8, 0)
+
+
+def make_calendar(capacity=2):
+    return Calendar(HOURS, slot_minutes=30, durations={'EYE_EXAM': 30, 'CONTACT_LENS': 60}, capacity=capacity)
+
+
+def counts(layers, slots=48):
+    """Bookings per slot, decoded from the layers"""
+    return [sum(bool(layer >> i & 1) for layer in layers) for i in range(slots)]
+
+
+def test_opening_hours_match_the_booking_page():
+    calendar = make_calendar()
+    monday = [calendar.label(i) for i in slot_indexes(calendar.open_mask(MONDAY))]
+    friday = [calendar.label(i) for i in slot_indexes(calendar.open_mask(FRIDAY))]
+
+    assert monday[0] == '09:30 AM' and monday[-1] == '10:30 PM' and len(monday) == 27
+    assert friday[0] == '03:00 PM' and friday[-1] == '10:30 PM' and len(friday) == 16
+
+
+def test_times_are_parsed_onto_the_grid():
+    calendar = make_calendar()
+    assert calendar.slot_of('09:30 AM') == calendar.slot_of('9:30 am') == calendar.slot_of('09:30') == 19
+    assert calendar.label(calendar.slot_of('21:00')) == '09:00 PM'
+    with pytest.raises(InvalidSlot):
+        calendar.slot_of('09:45 AM')
+    with pytest.raises(InvalidSlot):
+        calendar.slot_of('soon')
+
+
+def test_layers_count_overlapping_bookings():
+    layers = []
+    for mask in (0b0110, 0b0011, 0b0010):
+        layers = add_booking(layers, mask)
+    assert counts(layers, 4) == [1, 3, 1, 0]
+
+    layers = remove_booking(layers, 0b0011)
+    assert counts(layers, 4) == [0, 2, 1, 0]
+    assert remove_booking(remove_booking(layers, 0b0110), 0b0010) == []
+
+
+def test_full_slots_are_refused():
+    layers = add_booking(add_booking([], 0b01, capacity=2), 0b11, capacity=2)
+    with pytest.raises(SlotUnavailable):
+        add_booking(layers, 0b01, capacity=2)
+    assert counts(add_booking(layers, 0b10, capacity=2), 2) == [2, 2]
+
+
+def test_free_starts_need_every_slot_of_the_appointment():
+    open_mask = 0b111110
+    layers = add_booking(add_booking([], 0b001000), 0b001000)  # Slot 3 full at capacity 2
+
+    assert list(slot_indexes(free_starts(open_mask, layers, 2, 1))) == [1, 2, 4, 5]
+    # Two-slot appointments can't cover slot 3 or run past closing
+    assert list(slot_indexes(free_starts(open_mask, layers, 2, 2))) == [1, 4]
+
+
+def test_longer_types_are_not_offered_at_closing_time():
+    calendar = make_calendar()
+    eye = calendar.available_labels(MONDAY, [], AppointmentType.EYE_EXAM, SUNDAY_MORNING)
+    lens = calendar.available_labels(MONDAY, [], AppointmentType.CONTACT_LENS, SUNDAY_MORNING)
+    assert eye[-1] == '10:30 PM'
+    assert lens[-1] == '10:00 PM'
+
+
+def test_capacity_is_shared_by_overlapping_types():
+    calendar = make_calendar(capacity=1)
+    layers = add_booking([], calendar.booking(MONDAY, '10:00 AM', AppointmentType.CONTACT_LENS).mask, 1)
+
+    free = calendar.available_labels(MONDAY, layers, AppointmentType.EYE_EXAM, SUNDAY_MORNING)
+    assert '09:30 AM' in free
+    assert '10:00 AM' not in free and '10:30 AM' not in free
+    # A one-hour booking at 09:30 would run into the 10:00 one
+    assert '09:30 AM' not in calendar.available_labels(MONDAY, layers, AppointmentType.CONTACT_LENS, SUNDAY_MORNING)
+
+
+def test_bookings_must_be_open_upcoming_and_within_the_window():
+    calendar = make_calendar()
+    calendar.validate(calendar.booking(MONDAY, '09:30 AM', AppointmentType.EYE_EXAM), SUNDAY_MORNING)
+
+    for booking in (
+        Booking(FRIDAY, calendar.slot_of('10:00 AM'), 1),  # Closed on Friday mornings
+        Booking(MONDAY, calendar.slot_of('10:30 PM'), 2),  # Runs past closing
+        Booking(date(2026, 10, 17), calendar.slot_of('10:00 AM'), 1),  # Yesterday
+        Booking(date(2027, 3, 1), calendar.slot_of('10:00 AM'), 1),  # Beyond the booking window
+    ):
+        with pytest.raises(InvalidSlot):
+            calendar.validate(booking, SUNDAY_MORNING)
+
+
+def test_todays_slots_that_have_started_are_not_offered():
+    calendar = make_calendar()
+    now = datetime(2026, 10, 19, 14, 10)
+    free = calendar.available_labels(MONDAY, [], AppointmentType.EYE_EXAM, now)
+    assert free[0] == '02:30 PM'
+    with pytest.raises(InvalidSlot):
+        calendar.validate(calendar.booking(MONDAY, '02:00 PM', AppointmentType.EYE_EXAM), now)
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask import Flask
+from flask_mail import Mail
+
+from app.services.campaign_service import (
+    Throttle, checkpoint_batch_size, deliver_slice, is_campaign_template, render_batch
+)
+from app.services.mail_transport import init_mail_transport
+from test_mail_transport import SinkHandler, free_port
+
+
+@pytest.fixture
+def smtp_sink():
+    handler = SinkHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def make_app(host, port):
+    app = Flask(__name__)
+    app.config.update(
+        MAIL_SERVER=host, MAIL_PORT=port, MAIL_TIMEOUT=2,
+        MAIL_USE_TLS=False, MAIL_DEFAULT_SENDER='support.almahra@gmail.com',
+        MAIL_SUPPRESS_SEND=False, EMAIL_LOG_ENABLED=False, MAIL_POOL_SIZE=2
+    )
+    Mail(app)
+    init_mail_transport(app)
+    return app
+
+
+@pytest.fixture
+def app(smtp_sink):
+    controller, _ = smtp_sink
+    return make_app(controller.hostname, controller.port)
+
+
+def make_emails(count):
+    return [{
+        'to_email': f'customer{i}@example.com',
+        'subject': f'Sale {i}',
+        'html_body': '<p>hello</p>',
+        'text_body': 'hello',
+        'template': 'campaign'
+    } for i in range(count)]
+
+
+def test_throttle_spaces_calls():
+    throttle = Throttle(200)
+    start = time.monotonic()
+    for _ in range(41):
+        throttle.wait()
+    assert time.monotonic() - start >= 0.19
+
+
+def test_deliver_slice_sends_throttled(app, smtp_sink):
+    _, handler = smtp_sink
+    start = time.monotonic()
+
+    sent, failed = deliver_slice(app, Throttle(100), make_emails(21))
+
+    assert (sent, failed) == (21, 0)
+    assert len(handler.messages) == 21
+    assert time.monotonic() - start >= 0.19
+    assert len(handler.peers) == 1
+
+
+def test_deliver_slice_counts_failures():
+    # Nothing listens on this port, so every message fails
+    app = make_app('127.0.0.1', free_port())
+
+    sent, failed = deliver_slice(app, Throttle(0), make_emails(3))
+
+    assert (sent, failed) == (0, 3)
+
+
+def test_batches_checkpoint_well_inside_the_stale_window():
+    # 500 recipients at 1/s would take longer than a 300 s takeover window
+    assert checkpoint_batch_size(500, 1, 300) == 100
+    assert checkpoint_batch_size(500, 50, 300) == 500
+    assert checkpoint_batch_size(500, 0.001, 300) == 1
+
+
+def test_only_campaign_templates_can_be_sent_in_bulk():
+    assert is_campaign_template('campaign')
+    assert not is_campaign_template('order_confirmation')
+    assert not is_campaign_template('campaign_missing')
+
+
+Recipient = namedtuple('Recipient', 'id email first_name last_name')
+
+
+def test_a_bad_render_fails_only_that_recipient():
+    campaign = SimpleNamespace(template='campaign')
+    rows = [Recipient(1, 'a@example.com', 'Amal', 'K'), Recipient(2, 'b@example.com', 'Badr', 'S')]
+
+    class Subject:
+        def render(self, user, **content):
+            if user.id == 2:
+                raise ValueError('bad subject')
+            return f'Hello {user.first_name}'
+
+    emails, failures = render_batch(campaign, rows, Subject(), {'message': 'Sale'})
+    assert [e['to_email'] for e in emails] == ['a@example.com']
+    assert emails[0]['subject'] == 'Hello Amal'
+    assert [(to, str(e)) for to, e in failures] == [('b@example.com', 'bad subject')]
@@ -0,0 +1,122 @@
+import os
+import sys
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+import stripe
+from flask import Flask
+from sqlalchemy import Column, Integer, Table
+
+from app import db
+from app.models.checkout_intent import CheckoutIntent
+from app.services import checkout_intents
+from app.services.checkout_intents import get_or_create_payment_intent
+from app.services.payment_gateway import init_payment_gateway
+from app.services.stripe_standin import start_standin_server
+
+# The user model isn't part of these tests; checkout_intents only needs its key to resolve
+Table('users', db.metadata, Column('id', Integer, primary_key=True), keep_existing=True)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    server, base_url = start_standin_server()
+    app = Flask(__name__)
+    # A file database, so a competing request can commit on its own connection
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'checkout.db'}",
+                      STRIPE_API_BASE=base_url, STRIPE_MAX_RETRIES=0)
+    db.init_app(app)
+    init_payment_gateway(app)
+
+    # Cart contents are stood in for by a per-user label
+    carts = {}
+    monkeypatch.setattr(checkout_intents, 'cart_fingerprint',
+                        lambda user_id, amount, currency: f'{carts.get(user_id)}:{amount}:{currency}')
+    app.carts = carts
+
+    with app.app_context():
+        CheckoutIntent.__table__.create(db.engine)  # SQLite doesn't enforce the users foreign key
+        yield app
+        db.session.remove()
+    server.shutdown()
+    stripe.api_base = stripe.DEFAULT_API_BASE
+
+
+@pytest.fixture
+def gateway(app):
+    """The app's gateway, counting the Stripe calls made through it"""
+    gateway = app.extensions['payment_gateway']
+    gateway.calls = []
+    call = gateway.call
+
+    def counted(func, *args, **kwargs):
+        gateway.calls.append(func.__name__)
+        return call(func, *args, **kwargs)
+
+    gateway.call = counted
+    return gateway
+
+
+def test_same_cart_reuses_the_stored_intent(app, gateway):
+    app.carts[1] = 'frames-x1'
+    first = get_or_create_payment_intent(1, 4999)
+    second = get_or_create_payment_intent(1, 4999)
+
+    assert first == second
+    assert gateway.calls == ['create']
+    assert CheckoutIntent.query.count() == 1
+
+
+def test_changed_cart_updates_the_intent_in_place(app, gateway):
+    app.carts[1] = 'frames-x1'
+    intent_id, _ = get_or_create_payment_intent(1, 4999)
+
+    app.carts[1] = 'frames-x2'
+    updated_id, _ = get_or_create_payment_intent(1, 9998)
+
+    assert updated_id == intent_id
+    assert gateway.calls == ['create', 'modify']
+    assert gateway.retrieve_payment_intent(intent_id).amount == 9998
+    row = CheckoutIntent.query.filter_by(user_id=1).one()
+    assert (row.amount, row.cart_hash) == (9998, 'frames-x2:9998:usd')
+
+
+def test_intent_stripe_will_not_modify_is_replaced(app, gateway):
+    app.carts[1] = 'frames-x1'
+    intent_id, _ = get_or_create_payment_intent(1, 4999)
+    gateway.cancel_payment_intent(intent_id, cancellation_reason='abandoned')
+
+    app.carts[1] = 'frames-x2'
+    new_id, client_secret = get_or_create_payment_intent(1, 9998)
+
+    assert new_id != intent_id and client_secret.startswith(new_id)
+    assert gateway.calls == ['create', 'cancel', 'modify', 'create']
+    assert [row.payment_intent_id for row in CheckoutIntent.query.all()] == [new_id]
+
+
+def test_concurrent_create_keeps_the_first_intent(app, gateway):
+    app.carts[1] = 'frames-x1'
+    create = gateway.create_payment_intent
+    winner = {}
+
+    def create_while_another_request_wins(**params):
+        # The other request creates and stores its intent between our lookup and our commit
+        other = create(**params)
+        with db.engine.begin() as connection:
+            connection.execute(CheckoutIntent.__table__.insert().values(
+                user_id=1, payment_intent_id=other.id, client_secret=other.client_secret,
+                cart_hash='frames-x1:4999:usd', amount=4999, currency='usd'
+            ))
+        winner['id'] = other.id
+        return create(**params)
+
+    gateway.create_payment_intent = create_while_another_request_wins
+    intent_id, _ = get_or_create_payment_intent(1, 4999)
+
+    assert intent_id == winner['id']
+    assert CheckoutIntent.query.count() == 1
+    # Ours was created second and cancelled as a duplicate
+    ours = [i for i in gateway.iter_payment_intents(0, 2 ** 31) if i.id != winner['id']]
+    assert [(i.status, i.cancellation_reason) for i in ours] == [('canceled', 'duplicate')]
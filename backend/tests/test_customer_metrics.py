@@ -0,0 +1,137 @@
+import os
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from flask import Flask
+from sqlalchemy import Column, DateTime, Integer, MetaData, Numeric, String, Table
+from sqlalchemy.schema import CreateTable
+
+from app import db
+from app.models.customer_metrics import CohortRetention, CustomerActiveMonth, CustomerLifetime
+from app.models.job_watermark import JobWatermark
+from app.services.customer_metrics import (
+    cohort_matrix, lifetime_ordering, months_between, refresh_customer_metrics
+)
+
+metadata = MetaData()
+orders = Table(
+    'orders', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer),
+    Column('status', String(20), nullable=False),
+    Column('payment_status', String(20), nullable=False),
+    Column('total_amount', Numeric(10, 2), nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime)
+)
+
+# The user model isn't part of these tests; the lifetime tables only need its key to resolve
+Table('users', db.metadata, Column('id', Integer, primary_key=True), keep_existing=True)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    with app.app_context():
+        metadata.create_all(db.engine)
+        for model in (CustomerLifetime, CustomerActiveMonth, CohortRetention, JobWatermark):
+            db.session.execute(CreateTable(model.__table__, include_foreign_key_constraints=[]))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def place(user_id, created_at, amount, status='DELIVERED', payment_status='COMPLETED'):
+    db.session.execute(orders.insert().values(
+        user_id=user_id, status=status, payment_status=payment_status,
+        total_amount=Decimal(amount), created_at=created_at, updated_at=created_at
+    ))
+    db.session.commit()
+
+
+def refresh(full=False):
+    return refresh_customer_metrics(full=full, orders=orders)
+
+
+def lifetimes(sort='total_spent'):
+    return [
+        (row.user_id, row.order_count, row.total_spent)
+        for row in CustomerLifetime.query.order_by(*lifetime_ordering(sort)).all()
+    ]
+
+
+def test_months_between_spans_years():
+    assert months_between(date(2025, 11, 1), date(2026, 2, 1)) == 3
+    assert months_between(date(2026, 1, 1), date(2026, 1, 1)) == 0
+
+
+def test_only_counted_orders_make_up_a_lifetime(app):
+    place(1, datetime(2026, 1, 5), '100')
+    place(1, datetime(2026, 1, 20), '50', status='CANCELLED')
+    place(1, datetime(2026, 3, 2), '30', payment_status='REFUNDED')
+    place(2, datetime(2026, 1, 9), '40')
+    place(2, datetime(2026, 2, 9), '90')
+    place(3, datetime(2026, 2, 1), '10', payment_status='FAILED')  # Never a customer
+    place(None, datetime(2026, 2, 1), '25')  # Guest checkout
+
+    assert refresh() == {'customers': 3, 'cohorts': 1}
+    assert lifetimes() == [(2, 2, Decimal('130.00')), (1, 1, Decimal('100.00'))]
+    assert lifetimes('order_count') == [(2, 2, Decimal('130.00')), (1, 1, Decimal('100.00'))]
+    assert db.session.get(CustomerLifetime, 2).cohort_month == date(2026, 1, 1)
+    with pytest.raises(ValueError):
+        lifetime_ordering('email')
+
+
+def test_cohort_matrix_counts_returning_customers_per_month(app):
+    # January cohort: three customers; two come back in February, one in April
+    place(1, datetime(2026, 1, 3), '10')
+    place(2, datetime(2026, 1, 15), '20')
+    place(3, datetime(2026, 1, 28), '30')
+    place(1, datetime(2026, 2, 2), '5')
+    place(2, datetime(2026, 2, 27), '15')
+    place(2, datetime(2026, 2, 28), '5')  # Two orders in one month count once
+    place(3, datetime(2026, 4, 30), '50')
+    # February cohort: one customer who never returns
+    place(4, datetime(2026, 2, 10), '70')
+
+    refresh()
+
+    assert cohort_matrix(date(2026, 1, 1)) == [
+        {'cohort': '2026-01', 'customers': 3, 'retention': [
+            {'months_since': 0, 'customers': 3, 'rate': 1.0, 'revenue': 60.0},
+            {'months_since': 1, 'customers': 2, 'rate': 0.6667, 'revenue': 25.0},
+            {'months_since': 3, 'customers': 1, 'rate': 0.3333, 'revenue': 50.0},
+        ]},
+        {'cohort': '2026-02', 'customers': 1, 'retention': [
+            {'months_since': 0, 'customers': 1, 'rate': 1.0, 'revenue': 70.0},
+        ]},
+    ]
+    assert [c['cohort'] for c in cohort_matrix(date(2026, 2, 1))] == ['2026-02']
+
+
+def test_incremental_refresh_only_recomputes_changed_customers(app):
+    place(1, datetime(2020, 1, 5), '100')
+    place(2, datetime(2020, 1, 6), '40')
+    refresh()
+    assert JobWatermark.get_position('customer_metrics') is not None
+
+    # A new order for customer 2 moves them to the top
+    place(2, datetime.utcnow(), '200')
+    assert refresh() == {'customers': 1, 'cohorts': 1}
+    assert lifetimes() == [(2, 2, Decimal('240.00')), (1, 1, Decimal('100.00'))]
+
+    # Cancelling customer 1's only order removes them from the cohort
+    db.session.execute(orders.update().where(orders.c.user_id == 1).values(
+        status='CANCELLED', updated_at=datetime.utcnow()
+    ))
+    db.session.commit()
+    refresh()
+    assert lifetimes() == [(2, 2, Decimal('240.00'))]
+    assert cohort_matrix(date(2020, 1, 1))[0]['customers'] == 1
@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.schema import CreateTable, DropTable
+
+from app import db
+from app.models.email_log import EmailLog, EmailStatus
+from app.services.email_log import EmailLogBuffer, keyset_page, record_email_attempt
+
+# The order and appointment tables aren't part of these tests
+CREATE_EMAIL_LOGS = CreateTable(EmailLog.__table__, include_foreign_key_constraints=[])
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', EMAIL_LOG_FLUSH_INTERVAL=60)
+    db.init_app(app)
+    with app.app_context():
+        db.session.execute(CREATE_EMAIL_LOGS)
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def inserts(app):
+    """Number of INSERT statements sent to the database"""
+    counter = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO email_logs'):
+            counter.append(executemany)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield counter
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def row(i, status=EmailStatus.SENT):
+    return {
+        'recipient': f'customer{i}@example.com', 'template': 'welcome', 'subject': 'Welcome',
+        'order_id': None, 'appointment_id': None, 'status': status,
+        'latency_ms': 12, 'error': None, 'created_at': datetime(2026, 10, 1)
+    }
+
+
+def stored():
+    return db.session.scalars(db.select(EmailLog.recipient).order_by(EmailLog.id)).all()
+
+
+def test_attempts_are_buffered_until_flushed(app):
+    record_email_attempt('Customer@Example.com', EmailStatus.SENT, subject='Hi', template='welcome')
+    buffer = app.extensions['email_log']
+
+    assert stored() == []
+    buffer.flush()
+    assert stored() == ['customer@example.com']
+
+
+def test_flush_writes_in_batches(app, inserts):
+    buffer = EmailLogBuffer(app, batch_size=2, flush_interval=60)
+    for i in range(5):
+        buffer._rows.append(row(i))  # Without waking the writer thread
+
+    buffer.flush()
+
+    assert stored() == [f'customer{i}@example.com' for i in range(5)]
+    assert inserts == [True, True, False]  # Two executemany batches of two, then the last row
+
+
+def test_a_full_batch_wakes_the_writer(app):
+    buffer = EmailLogBuffer(app, batch_size=3, flush_interval=60)
+    for i in range(3):
+        buffer.record(row(i))
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and len(stored()) < 3:
+        time.sleep(0.02)
+        db.session.remove()
+    assert len(stored()) == 3
+
+
+def test_failed_writes_are_retried_then_logged(app, caplog):
+    buffer = EmailLogBuffer(app, batch_size=10, flush_interval=60, max_retries=1)
+    buffer._rows.extend([row(1), row(2, EmailStatus.FAILED)])
+
+    db.session.execute(DropTable(EmailLog.__table__))
+    db.session.commit()
+    buffer.flush()
+    assert len(buffer._rows) == 2  # Back in the buffer, oldest first
+
+    db.session.execute(CREATE_EMAIL_LOGS)
+    db.session.commit()
+    buffer.flush()
+    assert stored() == ['customer1@example.com', 'customer2@example.com']
+
+    # A batch that keeps failing is written to the application log instead
+    buffer._rows.append(row(3))
+    db.session.execute(DropTable(EmailLog.__table__))
+    db.session.commit()
+    buffer.flush()
+    buffer.flush()
+    assert not buffer._rows
+    assert 'Unwritten email log: 2026-10-01T00:00:00 SENT to=customer3@example.com' in caplog.text
+
+
+def test_keyset_pages_walk_back_through_every_log(app):
+    db.session.execute(EmailLog.__table__.insert(), [row(i) for i in range(1, 8)])
+    db.session.commit()
+
+    pages, cursor = [], None
+    while True:
+        logs, cursor = keyset_page(EmailLog.query, 3, cursor)
+        pages.append([log.id for log in logs])
+        if cursor is None:
+            break
+
+    assert pages == [[7, 6, 5], [4, 3, 2], [1]]
+    filtered, cursor = keyset_page(EmailLog.query.filter(EmailLog.id.in_([2, 4, 6])), 2)
+    assert [log.id for log in filtered] == [6, 4] and cursor == 4
+    assert [log.id for log in keyset_page(EmailLog.query, 3, 4)[0]] == [3, 2, 1]
+
+
+@pytest.mark.parametrize('column, value', [
+    ('status', 'FAILED'), ('recipient', 'customer1@example.com'), ('template', 'welcome')
+])
+def test_filtered_pages_walk_an_index_newest_first(app, column, value):
+    for index in EmailLog.__table__.indexes:
+        index.create(db.engine)
+
+    plan = ' '.join(row[-1] for row in db.session.execute(db.text(
+        f'EXPLAIN QUERY PLAN SELECT * FROM email_logs WHERE {column} = :value ORDER BY id DESC LIMIT 50'
+    ), {'value': value}))
+
+    assert f'USING INDEX ix_email_logs_{column}_id' in plan
+    assert 'TEMP B-TREE' not in plan  # No sort step
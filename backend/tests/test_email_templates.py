@@ -0,0 +1,53 @@
+import os
+import sys
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.email_templates import EmailTemplateRegistry, inline_css
+
+STYLE = """<style type="text/css">
+    p { color: #333; margin: 0 }
+    .button, .link { color: #fff; }
+    td a { color: red }
+</style>"""
+
+
+def test_tag_and_class_selectors_are_inlined():
+    html = inline_css(
+        '<html><head>' + STYLE + '</head><body>'
+        '<P>Hello</P><a class="primary button" href="/pay">Pay</a><span class="other">x</span>'
+        '<br/></body></html>'
+    )
+
+    assert '<P style="color: #333; margin: 0">Hello</P>' in html
+    assert '<a class="primary button" href="/pay" style="color: #fff">Pay</a>' in html
+    # Unmatched elements and descendant selectors are left alone
+    assert '<span class="other">x</span>' in html
+    assert '<br/>' in html
+
+
+def test_existing_inline_styles_win():
+    html = inline_css(STYLE + '<p style="color: #000;" class="link">Total</p>')
+
+    # Later declarations take precedence, so the element's own style goes last
+    assert html == '<p style="color: #333; margin: 0; color: #fff; color: #000" class="link">Total</p>'
+
+
+def test_style_block_is_removed():
+    html = inline_css('<head>' + STYLE + '</head><body><div>Order</div></body>')
+
+    assert '<style' not in html and 'margin' not in html
+    assert html == '<head></head><body><div>Order</div></body>'
+    assert inline_css('<p>No styles</p>') == '<p>No styles</p>'
+
+
+def test_loader_inlines_html_templates_only(tmp_path):
+    (tmp_path / 'receipt.html').write_text(STYLE + '<p>Thanks {{ customer }}</p>')
+    (tmp_path / 'receipt.txt').write_text('<style>p { color: red }</style>Thanks {{ customer }}')
+    registry = EmailTemplateRegistry(str(tmp_path))
+
+    html_body, text_body = registry.render('receipt', customer='Ada')
+
+    assert html_body == '<p style="color: #333; margin: 0">Thanks Ada</p>'
+    assert text_body == '<style>p { color: red }</style>Thanks Ada'
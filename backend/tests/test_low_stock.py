@@ -0,0 +1,271 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from flask import Flask
+from sqlalchemy import Boolean, Column, Integer, MetaData, String, Table, event
+from sqlalchemy.orm import registry
+from sqlalchemy.schema import CreateTable
+
+from app import db
+from app.models.low_stock import LowStockProduct
+from app.services import email_service, low_stock
+from app.services.email_templates import EmailTemplateRegistry
+from app.services.low_stock import DigestNotSent, is_low_stock, plan_changes, send_low_stock_digest
+
+# Just the product columns the low-stock set reads
+metadata = MetaData()
+products = Table(
+    'products', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('sku', String(50)),
+    Column('is_active', Boolean, nullable=False, default=True),
+    Column('track_inventory', Boolean, nullable=False, default=True),
+    Column('stock_quantity', Integer, nullable=False),
+    Column('low_stock_threshold', Integer, nullable=False, default=5)
+)
+
+
+class Product:
+    def __init__(self, **columns):
+        for name, value in columns.items():
+            setattr(self, name, value)
+
+
+registry().map_imperatively(Product, products)
+
+LISTENERS = [
+    ('after_flush', low_stock._after_flush),
+    ('after_commit', low_stock._after_commit),
+    ('after_rollback', low_stock._after_rollback),
+]
+RECIPIENTS = ['stock@example.com', 'buyer@example.com']
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', LOW_STOCK_ALERT_EMAILS=RECIPIENTS)
+    db.init_app(app)
+    monkeypatch.setattr(low_stock, '_product_model', lambda: Product)
+    app.scheduled = []
+    monkeypatch.setattr(low_stock, 'schedule_digest', app.scheduled.append)
+    with app.app_context():
+        metadata.create_all(db.engine)
+        db.session.execute(CreateTable(LowStockProduct.__table__, include_foreign_key_constraints=[]))
+        db.session.commit()
+        # Only for these tests; other test modules flush sessions without a products table
+        for name, listener in LISTENERS:
+            event.listen(db.session, name, listener)
+        yield app
+        for name, listener in LISTENERS:
+            event.remove(db.session, name, listener)
+        db.session.remove()
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    """Digests handed to the mail sender; ``delivered`` is what each recipient's send returns"""
+    class Outbox(list):
+        delivered = [True] * len(RECIPIENTS)
+
+    sent = Outbox()
+
+    def send_email_batch(emails):
+        # The rows are claimed and committed before any mail server is contacted
+        sent.append({'emails': emails, 'in_transaction': db.session().in_transaction()})
+        if isinstance(sent.delivered, Exception):
+            raise sent.delivered
+        return sent.delivered
+
+    monkeypatch.setattr(email_service, 'send_email_batch', send_email_batch)
+    return sent
+
+
+def stock(product_id, quantity):
+    db.session.execute(products.update().where(products.c.id == product_id).values(stock_quantity=quantity))
+
+
+def pending_set():
+    """{product_id: (stock, threshold, alerted, claimed)} for every member"""
+    return {
+        row.product_id: (row.stock_quantity, row.threshold, row.alerted_at is not None, row.claimed_at is not None)
+        for row in LowStockProduct.query.all()
+    }
+
+
+def low_products(*quantities):
+    for i, quantity in enumerate(quantities, start=1):
+        db.session.add(Product(id=i, name=f'Frame {i}', sku=f'FR-{i}', is_active=True, track_inventory=True,
+                               stock_quantity=quantity, low_stock_threshold=5))
+    db.session.commit()
+
+
+def test_only_active_tracked_products_at_or_below_threshold_are_low():
+    assert is_low_stock(True, True, 5, 5)
+    assert is_low_stock(True, True, 0, 10)
+    assert not is_low_stock(True, True, 6, 5)
+    assert not is_low_stock(False, True, 0, 5)
+    assert not is_low_stock(True, False, 0, 5)
+    assert not is_low_stock(True, True, None, 5)
+
+
+def test_plan_changes_splits_entered_refreshed_and_left():
+    products = {
+        1: (True, True, 2, 5),    # newly low
+        2: (True, True, 3, 5),    # still low, stock moved
+        3: (True, True, 4, 5),    # still low, unchanged
+        4: (True, True, 9, 5),    # restocked
+        5: (False, True, 0, 5),   # deactivated
+        6: (True, True, 50, 5),   # never low
+    }
+    members = {2: (4, 5), 3: (4, 5), 4: (1, 5), 5: (0, 5), 7: (0, 5)}  # 7 was deleted
+
+    entered, refreshed, left = plan_changes(products, members)
+
+    assert entered == {1: (2, 5)}
+    assert refreshed == {2: (3, 5)}
+    assert left == {4, 5, 7}
+
+
+def test_threshold_change_refreshes_a_member():
+    entered, refreshed, left = plan_changes({1: (True, True, 3, 10)}, {1: (3, 5)})
+    assert (entered, refreshed, left) == ({}, {1: (3, 10)}, set())
+
+
+def test_digest_lists_every_product():
+    items = [
+        {'name': 'Aviator Gold', 'sku': 'AV-1', 'stock_quantity': 0, 'threshold': 5},
+        {'name': 'Round Tortoise', 'sku': 'RT-2', 'stock_quantity': 3, 'threshold': 5}
+    ]
+    html_body, text_body = EmailTemplateRegistry().render('low_stock_digest', items=items)
+
+    assert '2 products dropped' in text_body
+    assert 'Aviator Gold (AV-1): 0 in stock, threshold 5' in text_body
+    assert 'Round Tortoise' in html_body and 'style=' in html_body
+
+
+def test_a_digest_nobody_received_is_retried(monkeypatch):
+    def undeliverable():
+        raise low_stock.DigestNotSent('SMTP is down')
+
+    scheduled = []
+    monkeypatch.setattr(low_stock, 'send_low_stock_digest', undeliverable)
+    monkeypatch.setattr(low_stock, 'schedule_digest', scheduled.append)
+
+    app = Flask(__name__)
+    low_stock._run_digest(app)
+    assert scheduled == [app]
+
+
+def test_delivered_digest_marks_its_products_alerted(app, outbox):
+    low_products(0, 3)
+    outbox.delivered = [True, False]  # One recipient is enough
+
+    assert send_low_stock_digest() == 2
+
+    assert outbox[0]['in_transaction'] is False
+    assert [email['to_email'] for email in outbox[0]['emails']] == RECIPIENTS
+    assert outbox[0]['emails'][0]['subject'] == 'Low stock: 2 products at or below threshold'
+    assert pending_set() == {1: (0, 5, True, False), 2: (3, 5, True, False)}
+    # Already reported; the next digest has nothing to send
+    assert send_low_stock_digest() == 0
+    assert len(outbox) == 1
+
+
+@pytest.mark.parametrize('failure', [[False, False], OSError('SMTP connection refused')])
+def test_undelivered_digest_releases_its_claim(app, outbox, failure):
+    low_products(0)
+    outbox.delivered = failure
+
+    with pytest.raises((DigestNotSent, OSError)):
+        send_low_stock_digest()
+    assert pending_set() == {1: (0, 5, False, False)}
+
+    outbox.delivered = [True, True]
+    assert send_low_stock_digest() == 1
+    assert pending_set() == {1: (0, 5, True, False)}
+
+
+def test_rows_claimed_by_another_sender_are_skipped_until_the_claim_expires(app, outbox):
+    low_products(0)
+    db.session.execute(LowStockProduct.__table__.update().values(claimed_at=datetime.utcnow()))
+    db.session.commit()
+    assert send_low_stock_digest() == 0
+
+    # That sender died mid-send
+    db.session.execute(LowStockProduct.__table__.update().values(
+        claimed_at=datetime.utcnow() - timedelta(seconds=app.config.get('LOW_STOCK_CLAIM_TIMEOUT', 900) + 1)
+    ))
+    db.session.commit()
+    assert send_low_stock_digest() == 1
+    assert pending_set() == {1: (0, 5, True, False)}
+
+
+def test_orm_stock_changes_enter_refresh_and_leave_the_set(app):
+    low_products(10)
+    assert pending_set() == {} and app.scheduled == []
+
+    product = db.session.get(Product, 1)
+    product.stock_quantity = 3  # A sale through the ORM
+    db.session.commit()
+    assert pending_set() == {1: (3, 5, False, False)}
+    assert app.scheduled == [app]  # Crossing the threshold queues a digest
+
+    product.stock_quantity = 1
+    db.session.commit()
+    assert pending_set() == {1: (1, 5, False, False)}
+    assert app.scheduled == [app]  # Already a member; nothing new to report
+
+    product.stock_quantity = 40  # Restocked
+    db.session.commit()
+    assert pending_set() == {}
+
+
+def test_untracked_inactive_and_deleted_products_leave_the_set(app):
+    low_products(0, 1, 2)
+    assert set(pending_set()) == {1, 2, 3}
+
+    db.session.get(Product, 1).track_inventory = False
+    db.session.get(Product, 2).is_active = False
+    db.session.delete(db.session.get(Product, 3))
+    db.session.commit()
+    assert pending_set() == {}
+
+
+def test_rolled_back_changes_leave_the_set_alone(app):
+    low_products(10)
+    db.session.get(Product, 1).stock_quantity = 0
+    db.session.flush()
+    db.session.rollback()
+
+    assert pending_set() == {} and app.scheduled == []
+
+
+def test_bulk_updates_are_recorded_explicitly(app):
+    low_products(10, 20, 2)
+    app.scheduled.clear()
+
+    # A bulk UPDATE bypasses the ORM flush, so the caller reports what it touched
+    stock(1, 0)
+    stock(3, 30)
+    low_stock.record_stock_changes(db.session, [1, 2, 3])
+    db.session.commit()
+
+    assert pending_set() == {1: (0, 5, False, False)}
+    assert app.scheduled == [app]
+
+
+def test_rebuild_recovers_a_set_that_drifted(app):
+    low_products(0, 20)
+    stock(2, 1)  # Changed without telling the set
+    db.session.execute(LowStockProduct.__table__.delete().where(LowStockProduct.product_id == 1))
+    db.session.commit()
+
+    assert low_stock.rebuild_low_stock() == (2, 2)
+    assert pending_set() == {1: (0, 5, False, False), 2: (1, 5, False, False)}
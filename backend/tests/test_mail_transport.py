@@ -0,0 +1,112 @@
+import os
+import sys
+import socket
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask import Flask
+from flask_mail import Mail, Message
+
+from app.services.mail_transport import SMTPConnectionPool, MailTransport
+
+
+class SinkHandler:
+    """Collects every message and the client address it arrived from"""
+
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.peers.add(session.peer)
+        return '250 Message accepted for delivery'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_sink():
+    handler = SinkHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(MAIL_DEFAULT_SENDER='support.almahra@gmail.com', MAIL_SUPPRESS_SEND=False)
+    Mail(app)
+    with app.app_context():
+        yield app
+
+
+def make_transport(controller, size=2):
+    pool = SMTPConnectionPool(controller.hostname, controller.port, timeout=5, size=size)
+    return MailTransport(pool)
+
+
+def make_message(i):
+    return Message(subject=f'Test {i}', recipients=[f'customer{i}@example.com'],
+                   body='hello', sender='support.almahra@gmail.com')
+
+
+def test_messages_reuse_one_connection(app, smtp_sink):
+    controller, handler = smtp_sink
+    transport = make_transport(controller)
+
+    for i in range(5):
+        transport.send(make_message(i))
+    transport.close()
+
+    assert len(handler.messages) == 5
+    assert transport.pool.connections_opened == 1
+    assert len(handler.peers) == 1
+
+
+def test_send_many_uses_one_session(app, smtp_sink):
+    controller, handler = smtp_sink
+    transport = make_transport(controller)
+
+    errors = transport.send_many([make_message(i) for i in range(20)])
+    transport.close()
+
+    assert errors == [None] * 20
+    assert [e.rcpt_tos for e in handler.messages] == [[f'customer{i}@example.com'] for i in range(20)]
+    assert len(handler.peers) == 1
+
+
+def test_reconnects_after_server_drops_connection(app, smtp_sink):
+    controller, handler = smtp_sink
+    transport = make_transport(controller)
+
+    transport.send(make_message(0))
+    # Simulate the server hanging up on the idle pooled connection
+    connection, _ = transport.pool._idle.queue[0]
+    connection.close()
+
+    transport.send(make_message(1))
+    transport.close()
+
+    assert len(handler.messages) == 2
+    assert transport.pool.connections_opened == 2
+
+
+def test_suppressed_transport_records_without_connecting(app):
+    pool = SMTPConnectionPool('127.0.0.1', free_port(), timeout=1)
+    transport = MailTransport(pool, suppress=True)
+
+    with app.extensions['mail'].record_messages() as outbox:
+        transport.send(make_message(0))
+
+    assert len(outbox) == 1
+    assert pool.connections_opened == 0
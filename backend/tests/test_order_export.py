@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+import os
+import sys
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.order_export import ORDER_FIELDS, generate_csv, generate_ndjson
+
+
+def make_order(number, **values):
+    order = dict.fromkeys(ORDER_FIELDS)
+    order.update(order_number=number, **values)
+    return order
+
+
+def batches():
+    yield [
+        (make_order('ORD-1', total_amount='120.00'), [
+            {'product_sku': 'RB-1', 'product_name': 'Aviator, Gold', 'quantity': 1,
+             'unit_price': '100.00', 'total_price': '100.00'},
+            {'product_sku': 'CL-2', 'product_name': 'Cleaning kit', 'quantity': 2,
+             'unit_price': '10.00', 'total_price': '20.00'}
+        ])
+    ]
+    yield [(make_order('ORD-2', total_amount='0.00'), [])]
+
+
+def test_csv_has_one_row_per_item_and_one_chunk_per_batch():
+    chunks = list(generate_csv(batches()))
+    assert len(chunks) == 3  # header + two batches
+
+    rows = list(csv.DictReader(io.StringIO(''.join(chunks))))
+    assert [(r['order_number'], r['item_product_sku']) for r in rows] == [
+        ('ORD-1', 'RB-1'), ('ORD-1', 'CL-2'), ('ORD-2', '')
+    ]
+    assert rows[0]['item_product_name'] == 'Aviator, Gold'
+
+
+def test_ndjson_has_one_order_per_line():
+    lines = ''.join(generate_ndjson(batches())).splitlines()
+    orders = [json.loads(line) for line in lines]
+    assert [o['order_number'] for o in orders] == ['ORD-1', 'ORD-2']
+    assert [i['quantity'] for i in orders[0]['items']] == [1, 2]
+    assert orders[1]['items'] == []
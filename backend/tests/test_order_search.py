@@ -0,0 +1,158 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from enum import Enum
+from types import SimpleNamespace
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from flask import Flask
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from sqlalchemy import Enum as EnumType
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import registry
+
+from app import db
+from app.services import order_search
+from app.services.order_search import (
+    SearchError, _like_escape, build_order_search, decode_cursor, encode_cursor, search_orders
+)
+
+
+class Status(Enum):
+    PENDING = 'PENDING'
+    SHIPPED = 'SHIPPED'
+
+
+# Just the columns the search reads
+metadata = MetaData()
+orders = Table(
+    'orders', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_number', String(50), nullable=False),
+    Column('customer_email', String(120), nullable=False),
+    Column('status', EnumType(Status), nullable=False),
+    Column('created_at', DateTime, nullable=False)
+)
+order_items = Table(
+    'order_items', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_id', Integer, nullable=False),
+    Column('product_name', String(200), nullable=False),
+    Column('product_sku', String(50))
+)
+
+
+class Order:
+    pass
+
+
+class OrderItem:
+    pass
+
+
+mapper_registry = registry()
+mapper_registry.map_imperatively(Order, orders)
+mapper_registry.map_imperatively(OrderItem, order_items)
+
+DAY = datetime(2026, 10, 1)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    monkeypatch.setattr(order_search, '_search_models', lambda: (Order, OrderItem))
+    with app.app_context():
+        metadata.create_all(db.engine)
+        yield app
+        db.session.remove()
+
+
+def place(order_id, email='ada@example.com', status=Status.PENDING, created_at=DAY, items=()):
+    db.session.execute(orders.insert().values(
+        id=order_id, order_number=f'ORD-2026-{order_id:04d}', customer_email=email,
+        status=status, created_at=created_at
+    ))
+    for name, sku in items:
+        db.session.execute(order_items.insert().values(order_id=order_id, product_name=name, product_sku=sku))
+    db.session.commit()
+
+
+def ids(**filters):
+    return [order.id for order in search_orders(per_page=100, **filters)[0]]
+
+
+def postgres_sql(**filters):
+    return str(build_order_search(**filters).compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trips_created_at_and_id():
+    order = SimpleNamespace(created_at=datetime(2026, 10, 18, 9, 30, 5, 120000), id=4521)
+    assert decode_cursor(encode_cursor(order)) == (order.created_at, 4521)
+
+
+@pytest.mark.parametrize('cursor', ['', 'nonsense', '2026-10-18T09:30:05_abc'])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises(SearchError):
+        decode_cursor(cursor)
+
+
+def test_like_wildcards_in_search_terms_are_literal():
+    assert _like_escape('50%_off\\') == '50\\%\\_off\\\\'
+
+
+def test_full_addresses_use_the_expression_index_and_parts_the_trigram_index(monkeypatch):
+    monkeypatch.setattr(order_search, '_search_models', lambda: (Order, OrderItem))
+
+    assert 'lower(orders.customer_email) = %(lower_1)s' in postgres_sql(email='Ada@Example.com')
+    partial = postgres_sql(email='example')
+    assert 'orders.customer_email ILIKE %(customer_email_1)s' in partial and 'lower(' not in partial
+    # Product names use the trigram index, SKUs the prefix index
+    product = postgres_sql(product='frame')
+    assert 'order_items.product_name ILIKE' in product and 'order_items.product_sku LIKE' in product
+    with pytest.raises(SearchError):
+        build_order_search(email='ex')
+    with pytest.raises(SearchError):
+        build_order_search(product='fr')
+
+
+def test_each_filter_narrows_the_results(app):
+    place(1, email='Ada@Example.com', items=[('Round Frames', 'FR-100')])
+    place(2, email='grace@example.org', status=Status.SHIPPED, created_at=DAY + timedelta(days=2),
+          items=[('Blue Lenses', 'LN-200')])
+    place(3, email='ada.l@example.com', created_at=DAY + timedelta(days=5), items=[('Lens Cloth', 'AC-1')])
+    place(12, email='linus@example.net', items=[('Frame Case', 'FR-101')])
+
+    assert ids(email='ADA@example.com') == [1]
+    assert ids(email='ada') == [3, 1]
+    assert ids(order_number='ORD-2026-000') == [3, 2, 1]
+    assert ids(order_number='ORD-2026-001') == [12]
+    assert ids(order_number='ORD_2026') == []  # Wildcards are literal
+    assert ids(product='frame') == [12, 1]
+    assert ids(product='FR-1') == [12, 1]
+    assert ids(product='lens') == [3, 2]
+    assert ids(status=Status.SHIPPED) == [2]
+    assert ids(start=DAY + timedelta(days=1), end=DAY + timedelta(days=5)) == [2]
+    assert ids(email='ada', product='cloth') == [3]
+
+
+def test_keyset_pages_walk_every_order_newest_first(app):
+    # Orders 1-3 share a timestamp, so the id breaks the tie
+    for order_id in range(1, 8):
+        place(order_id, created_at=DAY + timedelta(hours=max(order_id, 3)))
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = search_orders(per_page=3, cursor=cursor)
+        pages.append([order.id for order in page])
+        if cursor is None:
+            break
+
+    assert pages == [[7, 6, 5], [4, 3, 2], [1]]
+    assert search_orders(per_page=2, email='ada', cursor=encode_cursor(SimpleNamespace(
+        created_at=DAY + timedelta(hours=3), id=3
+    )))[0][0].id == 2
@@ -0,0 +1,219 @@
+import logging
+import os
+import sys
+from enum import Enum
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from flask import Flask
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table, Text, event, select
+from sqlalchemy import Enum as EnumType
+from sqlalchemy.orm import registry
+
+from app import db
+from app.services import low_stock, order_workflow
+from app.services.order_workflow import (
+    ALLOWED_TRANSITIONS, STOCK_HELD, bulk_transition, can_transition, stock_direction, transition_orders
+)
+
+
+class Status(Enum):
+    """Same names as OrderStatus; the workflow only looks at names"""
+    PENDING = 'PENDING'
+    CONFIRMED = 'CONFIRMED'
+    PROCESSING = 'PROCESSING'
+    SHIPPED = 'SHIPPED'
+    OUT_FOR_DELIVERY = 'OUT_FOR_DELIVERY'
+    DELIVERED = 'DELIVERED'
+    CANCELLED = 'CANCELLED'
+    RETURNED = 'RETURNED'
+
+
+# Just the columns the workflow touches
+metadata = MetaData()
+orders = Table(
+    'orders', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('status', EnumType(Status), nullable=False),
+    Column('tracking_number', String(100)),
+    Column('shipping_method', String(50)),
+    Column('shipped_at', DateTime),
+    Column('delivered_at', DateTime),
+    Column('admin_notes', Text)
+)
+order_items = Table(
+    'order_items', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_id', Integer, nullable=False),
+    Column('product_id', Integer, nullable=False),
+    Column('quantity', Integer, nullable=False)
+)
+products = Table(
+    'products', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('stock_quantity', Integer, nullable=False),
+    Column('track_inventory', Boolean, nullable=False, default=True)
+)
+
+
+class Order:
+    pass
+
+
+registry().map_imperatively(Order, orders)
+
+
+def test_every_status_has_an_entry_and_targets_are_known():
+    assert set(ALLOWED_TRANSITIONS) == {status.name for status in Status}
+    for targets in ALLOWED_TRANSITIONS.values():
+        assert targets <= set(ALLOWED_TRANSITIONS)
+
+
+@pytest.mark.parametrize('old, new', [
+    (Status.PENDING, Status.CONFIRMED),
+    (Status.CONFIRMED, Status.SHIPPED),
+    (Status.SHIPPED, Status.DELIVERED),
+    (Status.DELIVERED, Status.RETURNED),
+    (Status.PROCESSING, Status.CANCELLED),
+])
+def test_forward_moves_are_allowed(old, new):
+    assert can_transition(old, new)
+
+
+@pytest.mark.parametrize('old, new', [
+    (Status.DELIVERED, Status.PENDING),
+    (Status.CANCELLED, Status.CONFIRMED),
+    (Status.SHIPPED, Status.CANCELLED),
+    (Status.PENDING, Status.DELIVERED),
+    (Status.RETURNED, Status.SHIPPED),
+])
+def test_backward_and_skipping_moves_are_rejected(old, new):
+    assert not can_transition(old, new)
+
+
+def test_final_statuses_go_nowhere():
+    for status in Status:
+        assert not can_transition(Status.CANCELLED, status)
+        assert not can_transition(Status.RETURNED, status)
+
+
+def test_stock_is_taken_once_and_returned_once():
+    assert stock_direction(Status.PENDING, Status.CONFIRMED) == -1
+    assert stock_direction(Status.CONFIRMED, Status.SHIPPED) == 0
+    assert stock_direction(Status.SHIPPED, Status.RETURNED) == 1
+    assert stock_direction(Status.PROCESSING, Status.CANCELLED) == 1
+    assert stock_direction(Status.PENDING, Status.CANCELLED) == 0
+
+
+def test_every_path_to_a_final_status_balances_stock():
+    def walk(status, taken):
+        targets = ALLOWED_TRANSITIONS[status.name]
+        if not targets:
+            assert taken == 0, status
+            return
+        for target in targets:
+            walk(Status[target], taken - stock_direction(status, Status[target]))
+
+    walk(Status.PENDING, 0)
+    assert 'PENDING' not in STOCK_HELD
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    monkeypatch.setattr(order_workflow, '_stock_tables', lambda: (order_items, products))
+    monkeypatch.setattr(order_workflow, '_order_model', lambda: Order)
+    app.low_stock_checks = []
+    monkeypatch.setattr(low_stock, 'record_stock_changes',
+                        lambda session, product_ids: app.low_stock_checks.append(set(product_ids)))
+    with app.app_context():
+        metadata.create_all(db.engine)
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def product_updates(app):
+    """UPDATE statements sent to the products table"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE products'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def place(order_id, status, *lines):
+    db.session.execute(orders.insert().values(id=order_id, status=status))
+    for product_id, quantity in lines:
+        db.session.execute(order_items.insert().values(order_id=order_id, product_id=product_id, quantity=quantity))
+
+
+def stock():
+    return dict(db.session.execute(select(products.c.id, products.c.stock_quantity)).all())
+
+
+def load(*order_ids):
+    return db.session.scalars(select(Order).where(Order.id.in_(order_ids)).order_by(Order.id)).all()
+
+
+def test_batch_stock_moves_in_one_update_per_direction(app, product_updates, caplog):
+    db.session.execute(products.insert(), [
+        {'id': 1, 'stock_quantity': 10, 'track_inventory': True},
+        {'id': 2, 'stock_quantity': 1, 'track_inventory': True},
+        {'id': 3, 'stock_quantity': 0, 'track_inventory': False},
+    ])
+    place(1, Status.PENDING, (1, 2), (2, 1))
+    place(2, Status.PENDING, (1, 3), (2, 1))
+    place(3, Status.PENDING, (3, 5))
+    db.session.commit()
+
+    with caplog.at_level(logging.WARNING):
+        changed, _, _ = transition_orders(load(1, 2, 3), Status.CONFIRMED)
+    db.session.commit()
+
+    assert len(changed) == 3
+    # Product 2 only covers order 1; order 2 is confirmed without it, and untracked stock is left alone
+    assert stock() == {1: 5, 2: 0, 3: 0}
+    assert 'Insufficient stock for product 2 on order 2: requested 1, available 0' in caplog.text
+    assert len(product_updates) == 1
+    assert app.low_stock_checks == [{1, 2, 3}]
+
+    transition_orders(load(1, 2, 3), Status.CANCELLED)
+    db.session.commit()
+
+    # Nothing records the unit order 2 never took, so cancelling puts it back too
+    assert stock() == {1: 10, 2: 2, 3: 0}
+    assert len(product_updates) == 2
+
+
+def test_bulk_transition_reports_each_order(app):
+    db.session.execute(products.insert().values(id=1, stock_quantity=5, track_inventory=True))
+    place(1, Status.CONFIRMED, (1, 1))
+    place(2, Status.SHIPPED, (1, 1))
+    place(3, Status.DELIVERED, (1, 1))
+    place(4, Status.PROCESSING, (1, 1))
+    db.session.commit()
+
+    summary = bulk_transition([1, 2, 3, 4, 99], Status.SHIPPED, tracking_number='1Z999', notes='Batch pickup')
+    db.session.commit()
+
+    assert summary == {
+        'updated': [1, 4],
+        'unchanged': [2],
+        'rejected': [{'id': 3, 'error': 'Cannot change status from DELIVERED to SHIPPED'}],
+        'not_found': [99]
+    }
+    shipped = load(1, 4)
+    assert [order.status for order in shipped] == [Status.SHIPPED, Status.SHIPPED]
+    assert all(order.tracking_number == '1Z999' and order.shipped_at for order in shipped)
+    assert 'Status changed from CONFIRMED to SHIPPED. Batch pickup' in shipped[0].admin_notes
+    assert load(3)[0].status == Status.DELIVERED
+    assert stock() == {1: 5}  # Shipping doesn't move stock
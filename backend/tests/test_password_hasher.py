@@ -0,0 +1,66 @@
+import os
+import sys
+import threading
+import time
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import bcrypt
+import pytest
+
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy, hash_rounds
+
+
+def test_hash_rounds():
+    assert hash_rounds(bcrypt.hashpw(b'secret', bcrypt.gensalt(5)).decode()) == 5
+    assert hash_rounds('pbkdf2:sha256:600000$salt$hash') is None
+    assert hash_rounds(None) is None
+
+
+def test_verify_once_at_the_current_cost():
+    hasher = PasswordHasher(rounds=4, workers=2)
+    password_hash = hasher.hash('Secret123!')
+
+    assert hash_rounds(password_hash) == 4
+    assert hasher.verify('Secret123!', password_hash) == (True, False)
+    assert hasher.verify('wrong', password_hash) == (False, False)
+
+
+def test_cost_change_asks_for_a_rehash_of_correct_passwords_only():
+    old_hash = PasswordHasher(rounds=5, workers=1).hash('Secret123!')
+    hasher = PasswordHasher(rounds=4, workers=1)
+
+    assert hasher.verify('Secret123!', old_hash) == (True, True)
+    assert hasher.verify('wrong', old_hash) == (False, False)
+
+
+def test_non_bcrypt_hashes_use_the_fallback_and_are_upgraded():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    legacy = lambda password: password == 'Secret123!'
+
+    assert hasher.verify('Secret123!', 'pbkdf2:sha256:1$a$b', fallback=legacy) == (True, True)
+    assert hasher.verify('wrong', 'pbkdf2:sha256:1$a$b', fallback=legacy) == (False, False)
+    assert hasher.verify('Secret123!', 'pbkdf2:sha256:1$a$b') == (False, False)
+    assert hasher.verify('Secret123!', '$2b$04$malformed') == (False, False)
+
+
+def test_full_queue_is_rejected_after_the_wait():
+    hasher = PasswordHasher(rounds=4, workers=1, queue_size=1, wait=0.05)
+    release = threading.Event()
+    blocked = [threading.Thread(target=hasher._run, args=(release.wait,)) for _ in range(2)]
+    for thread in blocked:
+        thread.start()
+    while hasher._slots._value:  # One running, one queued
+        time.sleep(0.001)
+
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('Secret123!')
+    finally:
+        release.set()
+        for thread in blocked:
+            thread.join()
+
+    # Places are given back once the queued work finishes
+    assert hasher.verify('Secret123!', hasher.hash('Secret123!')) == (True, False)
@@ -0,0 +1,198 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+import stripe
+from flask import Flask, request
+from werkzeug.serving import make_server
+
+from app.services.payment_gateway import (
+    CircuitBreaker, PaymentGateway, PaymentGatewayUnavailable, init_payment_gateway
+)
+from app.services.payment_reconciliation import IntentWindow, to_timestamp
+from app.services.stripe_standin import create_standin_app, start_standin_server
+from test_mail_transport import free_port
+
+
+@pytest.fixture
+def standin():
+    server = make_server('127.0.0.1', free_port(), create_standin_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def gateway(standin):
+    app = Flask(__name__)
+    app.config.update(STRIPE_SECRET_KEY='sk_test_standin', STRIPE_API_BASE=standin,
+                      STRIPE_MAX_RETRIES=0, STRIPE_BREAKER_THRESHOLD=2, STRIPE_BREAKER_RESET=60)
+    init_payment_gateway(app)
+    yield app.extensions['payment_gateway']
+    stripe.api_base = stripe.DEFAULT_API_BASE
+
+
+def test_breaker_opens_after_threshold_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+
+    with pytest.raises(PaymentGatewayUnavailable):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()  # half-open trial
+    with pytest.raises(PaymentGatewayUnavailable):
+        breaker.before_call()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unexpected_errors_release_the_trial():
+    def broken():
+        raise KeyError('client_secret')
+
+    gateway = PaymentGateway(CircuitBreaker(failure_threshold=1, reset_timeout=0.05))
+    gateway.breaker.record_failure()
+    time.sleep(0.06)
+
+    with pytest.raises(KeyError):
+        gateway.call(broken)  # The half-open trial
+    assert gateway.call(lambda: 'ok') == 'ok'
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_declines_do_not_trip_breaker():
+    def decline():
+        raise stripe.error.CardError('Your card was declined', None, 'card_declined')
+
+    gateway = PaymentGateway(CircuitBreaker(failure_threshold=1))
+    for _ in range(3):
+        with pytest.raises(stripe.error.CardError):
+            gateway.call(decline)
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_payment_flow_against_standin(gateway):
+    intent = gateway.create_payment_intent(amount=4999, currency='usd', metadata={'user_id': '7'})
+    assert intent.client_secret.startswith(intent.id)
+    assert intent.metadata['user_id'] == '7'
+
+    assert gateway.retrieve_payment_intent(intent.id).status == 'requires_payment_method'
+    refund = gateway.create_refund(payment_intent=intent.id, amount=1000)
+    assert refund.amount == 1000
+
+    with pytest.raises(stripe.error.InvalidRequestError):
+        gateway.retrieve_payment_intent('pi_missing')
+
+
+def test_intent_updated_in_place_then_cancelled(gateway):
+    intent = gateway.create_payment_intent(amount=4999, currency='usd')
+
+    updated = gateway.update_payment_intent(intent.id, amount=5999)
+    assert (updated.id, updated.amount) == (intent.id, 5999)
+
+    cancelled = gateway.cancel_payment_intent(intent.id, cancellation_reason='abandoned')
+    assert cancelled.status == 'canceled'
+    with pytest.raises(stripe.error.InvalidRequestError):
+        gateway.update_payment_intent(intent.id, amount=100)
+
+
+def test_unreachable_stripe_fails_fast(gateway):
+    stripe.api_base = f'http://127.0.0.1:{free_port()}'
+
+    for _ in range(2):
+        with pytest.raises(stripe.error.APIConnectionError):
+            gateway.retrieve_payment_intent('pi_123')
+    with pytest.raises(PaymentGatewayUnavailable):
+        gateway.retrieve_payment_intent('pi_123')
+
+
+def test_intents_listed_page_by_page(gateway):
+    created = {gateway.create_payment_intent(amount=100 + i, currency='usd').id for i in range(25)}
+    now = int(time.time())
+
+    listed = [i.id for i in gateway.iter_payment_intents(now - 60, now + 60, page_size=10)]
+
+    assert len(listed) == 25 and set(listed) == created
+    assert list(gateway.iter_payment_intents(now + 60, now + 120)) == []
+
+
+def test_intent_window_fetches_each_range_once(gateway):
+    calls = []
+    original = gateway.iter_payment_intents
+    gateway.iter_payment_intents = lambda **kw: calls.append(kw) or original(**kw)
+    intent = gateway.create_payment_intent(amount=100, currency='usd')
+
+    window = IntentWindow(gateway, lookback=timedelta(hours=1))
+    now = datetime.utcnow()
+    window.advance(now - timedelta(minutes=10), now + timedelta(minutes=1))
+    window.advance(now + timedelta(minutes=1), now + timedelta(minutes=2))
+
+    assert intent.id in window.intents
+    assert calls[1]['created_gte'] == calls[0]['created_lt'] == to_timestamp(now + timedelta(minutes=1))
+
+
+def test_standin_selected_through_config():
+    app = Flask(__name__)
+    app.config.update(STRIPE_STANDIN=True, STRIPE_MAX_RETRIES=0)
+    init_payment_gateway(app)
+    try:
+        intent = app.extensions['payment_gateway'].create_payment_intent(amount=1500, currency='usd')
+        assert intent.id.startswith('pi_standin')
+    finally:
+        app.extensions['stripe_standin'].shutdown()
+        stripe.api_base = stripe.DEFAULT_API_BASE
+
+
+def test_injected_failures_trip_breaker(gateway):
+    server, base_url = start_standin_server(failure_rate=1.0)
+    stripe.api_base = base_url
+    try:
+        for _ in range(2):
+            with pytest.raises(stripe.error.APIError):
+                gateway.create_payment_intent(amount=100, currency='usd')
+        with pytest.raises(PaymentGatewayUnavailable):
+            gateway.create_payment_intent(amount=100, currency='usd')
+    finally:
+        server.shutdown()
+
+
+def test_webhooks_are_signed_and_delivered():
+    received = []
+    receiver = Flask(__name__)
+
+    @receiver.route('/webhook', methods=['POST'])
+    def webhook():
+        event = stripe.Webhook.construct_event(request.get_data(), request.headers['Stripe-Signature'],
+                                               'whsec_test')
+        received.append(event['type'])
+        return '', 200
+
+    receiver_server = make_server('127.0.0.1', free_port(), receiver, threaded=True)
+    threading.Thread(target=receiver_server.serve_forever, daemon=True).start()
+    server, base_url = start_standin_server(
+        webhook_url=f'http://127.0.0.1:{receiver_server.server_port}/webhook', webhook_secret='whsec_test'
+    )
+    try:
+        client = stripe.StripeClient('sk_test_standin', base_addresses={'api': base_url})
+        intent = client.v1.payment_intents.create({'amount': 2500, 'currency': 'usd'})
+        client.v1.payment_intents.confirm(intent.id, {'payment_method': 'pm_card_visa'})
+        with pytest.raises(stripe.error.CardError):
+            declined = client.v1.payment_intents.create({'amount': 2500, 'currency': 'usd'})
+            client.v1.payment_intents.confirm(declined.id, {'payment_method': 'pm_card_chargeDeclined'})
+
+        server.app.extensions['stripe_standin'].webhooks.join()
+        assert received == ['payment_intent.created', 'payment_intent.succeeded',
+                            'payment_intent.created', 'payment_intent.payment_failed']
+    finally:
+        server.shutdown()
+        receiver_server.shutdown()
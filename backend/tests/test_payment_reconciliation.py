@@ -0,0 +1,161 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+import stripe
+from flask import Flask
+from sqlalchemy import Column, DateTime, Integer, MetaData, Numeric, String, Table, select
+from sqlalchemy.schema import CreateTable
+
+from app import db
+from app.models.job_watermark import JobWatermark
+from app.models.rollups import DailyOrderStats
+from app.services.payment_gateway import init_payment_gateway
+from app.services.payment_reconciliation import (
+    WATERMARK_NAME, expected_change, is_discrepancy, reconcile_payments
+)
+from app.services.stripe_standin import start_standin_server
+
+metadata = MetaData()
+orders = Table(
+    'orders', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_number', String(20), nullable=False),
+    Column('payment_intent_id', String(255)),
+    Column('payment_status', String(20), nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('total_amount', Numeric(10, 2), nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime)
+)
+
+
+@pytest.fixture
+def app():
+    server, base_url = start_standin_server()
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', STRIPE_API_BASE=base_url, STRIPE_MAX_RETRIES=0)
+    db.init_app(app)
+    init_payment_gateway(app)
+    with app.app_context():
+        metadata.create_all(db.engine)
+        for model in (JobWatermark, DailyOrderStats):
+            db.session.execute(CreateTable(model.__table__, include_foreign_key_constraints=[]))
+        db.session.commit()
+        yield app
+        db.session.remove()
+    server.shutdown()
+    stripe.api_base = stripe.DEFAULT_API_BASE
+
+
+def intent(payment_method=None, cancel=False):
+    """A stand-in PaymentIntent, optionally confirmed with ``payment_method`` or cancelled"""
+    created = stripe.PaymentIntent.create(amount=1000, currency='usd')
+    if cancel:
+        stripe.PaymentIntent.cancel(created.id)
+    elif payment_method:
+        try:
+            stripe.PaymentIntent.confirm(created.id, payment_method=payment_method)
+        except stripe.error.CardError:
+            pass
+    return created.id
+
+
+def place(order_number, payment_intent_id, payment_status='PENDING', status='PENDING', created_at=None):
+    db.session.execute(orders.insert().values(
+        order_number=order_number, payment_intent_id=payment_intent_id, payment_status=payment_status,
+        status=status, total_amount=Decimal('10.00'), created_at=created_at or datetime.utcnow()
+    ))
+    db.session.commit()
+
+
+def statuses():
+    return {
+        row.order_number: (row.payment_status, row.status)
+        for row in db.session.execute(select(orders.c.order_number, orders.c.payment_status, orders.c.status))
+    }
+
+
+@pytest.mark.parametrize('stripe_intent, payment_status, order_status, change', [
+    ({'status': 'succeeded'}, 'PENDING', 'PENDING', ('COMPLETED', 'CONFIRMED')),
+    ({'status': 'succeeded'}, 'FAILED', 'CANCELLED', ('COMPLETED', 'CONFIRMED')),
+    ({'status': 'succeeded'}, 'PENDING', 'SHIPPED', ('COMPLETED', 'SHIPPED')),
+    ({'status': 'succeeded'}, 'COMPLETED', 'CONFIRMED', None),
+    ({'status': 'succeeded'}, 'REFUNDED', 'RETURNED', None),
+    ({'status': 'canceled'}, 'PENDING', 'PENDING', ('FAILED', 'CANCELLED')),
+    ({'status': 'requires_payment_method', 'last_payment_error': {'code': 'card_declined'}},
+     'PENDING', 'PENDING', ('FAILED', 'CANCELLED')),
+    ({'status': 'requires_payment_method', 'last_payment_error': None}, 'PENDING', 'PENDING', None),
+    ({'status': 'processing'}, 'PENDING', 'PENDING', None),
+    ({'status': 'canceled'}, 'COMPLETED', 'DELIVERED', None),
+])
+def test_expected_change_follows_the_webhooks(stripe_intent, payment_status, order_status, change):
+    assert expected_change(stripe_intent, payment_status, order_status) == change
+
+
+def test_paid_orders_without_a_successful_intent_are_only_reported():
+    assert is_discrepancy({'status': 'canceled'}, 'COMPLETED')
+    assert not is_discrepancy({'status': 'succeeded'}, 'COMPLETED')
+    assert not is_discrepancy({'status': 'canceled'}, 'PENDING')
+
+
+def test_orders_are_corrected_in_bulk_and_the_watermark_advances(app):
+    abandoned = intent(cancel=True)
+    place('paid', intent('pm_card_visa'))
+    place('paid-late', intent('pm_card_visa'), payment_status='FAILED', status='CANCELLED')
+    place('paid-shipped', intent('pm_card_visa'), status='SHIPPED')
+    place('declined', intent('pm_card_chargeDeclined'))
+    place('abandoned', abandoned)
+    place('open', intent())
+    place('disputed', abandoned, payment_status='COMPLETED', status='PROCESSING')
+    place('lost', 'pi_missing')
+    until = datetime.utcnow() + timedelta(minutes=1)
+
+    totals = reconcile_payments(orders=orders, until=until)
+
+    assert totals == {'windows': 1, 'checked': 8, 'corrected': 5, 'missing': 1, 'discrepancies': 1}
+    assert statuses() == {
+        'paid': ('COMPLETED', 'CONFIRMED'),
+        'paid-late': ('COMPLETED', 'CONFIRMED'),
+        'paid-shipped': ('COMPLETED', 'SHIPPED'),
+        'declined': ('FAILED', 'CANCELLED'),
+        'abandoned': ('FAILED', 'CANCELLED'),
+        'open': ('PENDING', 'PENDING'),
+        'disputed': ('COMPLETED', 'PROCESSING'),
+        'lost': ('PENDING', 'PENDING'),
+    }
+    assert JobWatermark.get_position(WATERMARK_NAME) == until
+    # The bulk UPDATEs bypass the ORM, so the rollups are adjusted alongside them
+    assert {row.status: row.order_count for row in DailyOrderStats.query.all()} == {
+        'PENDING': -3, 'CANCELLED': 1, 'CONFIRMED': 2
+    }
+
+
+def test_the_next_run_resumes_from_the_watermark_with_a_lookback(app):
+    place('first', intent('pm_card_visa'))
+    # An intent created before the watermark, whose order is only placed after it
+    paid_earlier = intent('pm_card_visa')
+    first_until = datetime.utcnow() + timedelta(seconds=5)
+    reconcile_payments(orders=orders, until=first_until)
+    assert JobWatermark.get_position(WATERMARK_NAME) == first_until
+
+    place('second', paid_earlier, created_at=first_until + timedelta(seconds=1))
+    until = first_until + timedelta(minutes=1)
+
+    # Without looking back far enough the intent is not found; a dry run changes nothing
+    dry = reconcile_payments(orders=orders, until=until, lookback=timedelta(seconds=1), dry_run=True)
+    assert dry == {'windows': 1, 'checked': 1, 'corrected': 0, 'missing': 1, 'discrepancies': 0}
+    assert JobWatermark.get_position(WATERMARK_NAME) == first_until
+
+    totals = reconcile_payments(orders=orders, until=until)
+    assert totals == {'windows': 1, 'checked': 1, 'corrected': 1, 'missing': 0, 'discrepancies': 0}
+    assert statuses()['second'] == ('COMPLETED', 'CONFIRMED')
+    assert JobWatermark.get_position(WATERMARK_NAME) == until
+
+    # Nothing left to do until time moves on
+    assert reconcile_payments(orders=orders, until=until)['windows'] == 0
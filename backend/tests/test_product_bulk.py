@@ -0,0 +1,199 @@
+import os
+import sys
+from decimal import Decimal
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from flask import Flask
+from sqlalchemy import Boolean, Column, Integer, MetaData, Numeric, String, Table, event, select
+from sqlalchemy.orm import registry
+
+from app import db
+from app.services import low_stock, product_bulk
+from app.services.product_bulk import (
+    BulkUpdateError, SkuConflict, bulk_update_products, duplicate_values, normalize_rows
+)
+
+# Just the product columns a bulk update can change
+metadata = MetaData()
+products = Table(
+    'products', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('sku', String(50), unique=True, nullable=False),
+    Column('price', Numeric(10, 2), nullable=False),
+    Column('compare_price', Numeric(10, 2)),
+    Column('cost_price', Numeric(10, 2)),
+    Column('stock_quantity', Integer, nullable=False, default=0),
+    Column('low_stock_threshold', Integer, nullable=False, default=5),
+    Column('is_active', Boolean, nullable=False, default=True),
+    Column('is_featured', Boolean, nullable=False, default=False),
+    Column('track_inventory', Boolean, nullable=False, default=True)
+)
+
+
+class Product:
+    pass
+
+
+registry().map_imperatively(Product, products)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    monkeypatch.setattr(product_bulk, '_product_model', lambda: Product)
+    app.stock_changes = []
+    monkeypatch.setattr(low_stock, 'record_stock_changes',
+                        lambda session, product_ids: app.stock_changes.append(sorted(product_ids)))
+    with app.app_context():
+        metadata.create_all(db.engine)
+        db.session.execute(products.insert(), [
+            {'id': 1, 'sku': 'AV-100', 'price': Decimal('120.00'), 'stock_quantity': 10},
+            {'id': 2, 'sku': 'RT-200', 'price': Decimal('90.00'), 'stock_quantity': 4},
+            {'id': 3, 'sku': 'CE-300', 'price': Decimal('150.00'), 'stock_quantity': 0},
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def statements(app):
+    """(statement, executemany) for every SQL statement sent"""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append((statement.split()[0], executemany))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield sent
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def catalog():
+    return {
+        row.id: (row.sku, row.price, row.stock_quantity, row.is_active)
+        for row in db.session.execute(select(products)).all()
+    }
+
+
+def test_rows_are_keyed_by_id_or_sku():
+    rows = normalize_rows([
+        {'id': '7', 'price': '19.99', 'stock_quantity': 4},
+        {'sku': 'AV-100', 'is_active': False, 'compare_price': 25}
+    ])
+    assert rows == [
+        (('id', 7), {'price': Decimal('19.99'), 'stock_quantity': 4}),
+        (('sku', 'AV-100'), {'is_active': False, 'compare_price': Decimal('25')})
+    ]
+
+
+def test_sku_next_to_an_id_renames_the_product():
+    assert normalize_rows([{'id': 3, 'sku': ' NEW-3 '}]) == [(('id', 3), {'sku': 'NEW-3'})]
+
+
+def test_unknown_fields_are_ignored_but_a_row_must_change_something():
+    with pytest.raises(BulkUpdateError) as excinfo:
+        normalize_rows([{'id': 1, 'name': 'Renamed'}])
+    assert excinfo.value.errors == ['Row 0: nothing to update']
+
+
+def test_every_bad_row_is_reported_at_once():
+    with pytest.raises(BulkUpdateError) as excinfo:
+        normalize_rows([
+            {'price': 10},
+            {'id': 2, 'price': 0},
+            {'id': 3, 'stock_quantity': -1},
+            {'id': 4, 'stock_quantity': 2.5},
+            {'id': 5, 'is_active': 'yes'},
+            {'id': 6, 'sku': 'bad sku'},
+            {'id': 7, 'compare_price': 'NaN'},
+            'not a row'
+        ])
+    assert excinfo.value.errors == [
+        'Row 0: id or sku is required',
+        'Row 1: price must be greater than 0',
+        'Row 2: stock_quantity cannot be negative',
+        'Row 3: stock_quantity must be a valid integer',
+        'Row 4: is_active must be true or false',
+        'Row 5: SKU can only contain letters, numbers, hyphens, and underscores',
+        'Row 6: compare_price must be a valid number',
+        'Row 7: must be an object'
+    ]
+
+
+def test_body_must_be_a_list():
+    with pytest.raises(BulkUpdateError):
+        normalize_rows({'id': 1})
+
+
+def test_duplicate_values():
+    assert duplicate_values(['A', 'B', 'A', 'C', 'B', 'A']) == {'A', 'B'}
+    assert duplicate_values([]) == set()
+
+
+def test_batch_resolves_ids_and_skus_and_updates_in_one_executemany(app, statements):
+    updated, unresolved = bulk_update_products([
+        {'id': 1, 'price': '99.50'},
+        {'sku': 'RT-200', 'stock_quantity': 12, 'is_active': False},
+        {'id': 3, 'sku': 'CE-301'},
+    ])
+    db.session.commit()
+
+    assert (updated, unresolved) == ([1, 2, 3], [])
+    assert catalog() == {
+        1: ('AV-100', Decimal('99.50'), 10, True),
+        2: ('RT-200', Decimal('90.00'), 12, False),
+        3: ('CE-301', Decimal('150.00'), 0, True),
+    }
+    # Resolve, check the new SKU, then every row's different columns in one UPDATE statement
+    assert [kind for kind, _ in statements[:2]] == ['SELECT', 'SELECT']
+    assert [s for s in statements if s[0] == 'UPDATE'] == [('UPDATE', True)]
+    assert app.stock_changes == [[2]]  # Only the row that touched stock or flags
+
+
+def test_later_rows_for_a_product_merge_field_by_field(app):
+    updated, _ = bulk_update_products([
+        {'id': 2, 'price': '80', 'stock_quantity': 1},
+        {'sku': 'RT-200', 'price': '85'},
+    ])
+    db.session.commit()
+
+    assert updated == [2]
+    assert catalog()[2] == ('RT-200', Decimal('85.00'), 1, True)
+
+
+def test_unknown_products_are_reported_and_the_rest_applied(app):
+    updated, unresolved = bulk_update_products([
+        {'id': 1, 'stock_quantity': 3},
+        {'id': 404, 'stock_quantity': 3},
+        {'sku': 'NOPE-1', 'price': 10},
+    ])
+
+    assert updated == [1]
+    assert unresolved == [{'id': 404}, {'sku': 'NOPE-1'}]
+
+
+@pytest.mark.parametrize('rows, errors', [
+    ([{'id': 1, 'sku': 'RT-200'}], ['SKU RT-200 already exists']),
+    ([{'id': 1, 'sku': 'NEW-1'}, {'id': 2, 'sku': 'NEW-1'}], ['SKU NEW-1 is used more than once']),
+    # A swap would trip the unique index partway through the UPDATE, so it is refused too
+    ([{'id': 1, 'sku': 'RT-200'}, {'id': 2, 'sku': 'AV-100'}],
+     ['SKU AV-100 already exists', 'SKU RT-200 already exists']),
+])
+def test_sku_conflicts_write_nothing(app, statements, rows, errors):
+    before = catalog()
+    with pytest.raises(SkuConflict) as excinfo:
+        bulk_update_products(rows)
+
+    assert excinfo.value.errors == errors
+    assert not [s for s in statements if s[0] == 'UPDATE']
+    assert catalog() == before
+
+
+def test_keeping_a_products_own_sku_is_not_a_conflict(app):
+    assert bulk_update_products([{'id': 1, 'sku': 'AV-100', 'price': 100}]) == ([1], [])
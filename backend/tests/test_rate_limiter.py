@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import fakeredis
+import pytest
+import redis
+from flask import Flask, jsonify
+
+from app.services.rate_limiter import Limit, MemoryStore, RateLimiter, RedisStore, parse_policy
+from app.utils.rate_limit import rate_limit
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class DownRedis:
+    def pipeline(self, transaction=True):
+        return self
+
+    def incr(self, key):
+        pass
+
+    def expire(self, key, seconds):
+        pass
+
+    def get(self, key):
+        pass
+
+    def execute(self):
+        raise redis.ConnectionError('Connection refused')
+
+
+def test_parse_policy():
+    assert parse_policy('10/minute per ip; 5/15 minutes per account') == [
+        Limit(10, 60, 'ip'), Limit(5, 900, 'account')
+    ]
+    with pytest.raises(ValueError):
+        parse_policy('10 per minute')
+    with pytest.raises(ValueError):
+        parse_policy('10/minute per session')
+
+
+def test_token_bucket_allows_a_burst_then_refills_steadily():
+    clock = Clock()
+    store = MemoryStore(clock=clock)
+
+    decisions = [store.hit('k', 5, 60) for _ in range(6)]
+    assert [d.allowed for d in decisions] == [True] * 5 + [False]
+    assert [d.remaining for d in decisions[:5]] == [4, 3, 2, 1, 0]
+    assert decisions[5].retry_after == pytest.approx(12)
+
+    clock.now += 12
+    assert store.hit('k', 5, 60).allowed
+    assert not store.hit('k', 5, 60).allowed
+    assert store.hit('other', 5, 60).allowed
+
+
+def test_refused_hits_cost_nothing_in_memory_but_count_in_redis():
+    clock = Clock(6000.0)
+    memory = MemoryStore(clock=clock)
+    shared = RedisStore(fakeredis.FakeRedis(), clock=clock)
+    for store in (memory, shared):
+        for _ in range(4):
+            store.hit('k', 2, 60)
+
+    # Halfway into the next window: the memory bucket has refilled, while half of
+    # the previous window's four hits (two of them refused) still count in Redis
+    clock.now += 90
+    assert memory.hit('k', 2, 60).allowed
+    assert not shared.hit('k', 2, 60).allowed
+
+
+def test_memory_store_stays_bounded():
+    clock = Clock()
+    store = MemoryStore(max_entries=100, clock=clock)
+    for i in range(1000):
+        store.hit(f'ip-{i}', 5, 60)
+    assert len(store._tat) <= 100
+
+    # Keys that have fully refilled are dropped first
+    clock.now += 60
+    for i in range(100):
+        store.hit(f'new-{i}', 5, 60)
+    assert sorted(store._tat) == sorted(f'new-{i}' for i in range(100))
+
+
+def test_redis_store_is_shared_between_nodes():
+    server = fakeredis.FakeServer()
+    clock = Clock(6000.0)  # Start of a window
+    first = RedisStore(fakeredis.FakeRedis(server=server), clock=clock)
+    second = RedisStore(fakeredis.FakeRedis(server=server), clock=clock)
+
+    assert first.hit('k', 3, 60).remaining == 2
+    assert second.hit('k', 3, 60).remaining == 1
+    assert first.hit('k', 3, 60).allowed
+    refused = second.hit('k', 3, 60)
+    assert not refused.allowed
+    assert refused.retry_after == pytest.approx(60)
+
+
+def test_redis_store_slides_the_previous_window_out():
+    clock = Clock(6000.0)
+    store = RedisStore(fakeredis.FakeRedis(), clock=clock)
+    for _ in range(4):
+        store.hit('k', 4, 60)
+
+    # A quarter into the next window, three quarters of the last one still count
+    clock.now += 75
+    assert store.hit('k', 4, 60).allowed  # 3 + 1
+    refused = store.hit('k', 4, 60)  # 3 + 2
+    assert not refused.allowed
+    assert refused.retry_after == pytest.approx(15)
+
+
+def test_redis_errors_fall_back_to_the_local_store():
+    store = RedisStore(DownRedis(), fallback=MemoryStore(), retry_interval=60)
+    assert store.hit('k', 1, 60).allowed
+    assert not store.hit('k', 1, 60).allowed
+    assert store._down_until > time.monotonic()
+
+
+def test_every_limit_must_allow_and_missing_identities_are_skipped():
+    limiter = RateLimiter(MemoryStore(), {'login': '10/minute per ip; 2/minute per account'})
+    identities = {'ip': '1.2.3.4', 'account': 'a'}
+    identify = identities.get
+
+    assert limiter.check('login', identify).remaining == 1
+    assert limiter.check('login', identify).remaining == 0
+    assert not limiter.check('login', identify).allowed
+
+    # Same address, another account
+    identities['account'] = 'b'
+    assert limiter.check('login', identify).allowed
+    identities['account'] = None
+    assert limiter.check('login', identify).limit == 10
+    assert limiter.check('unknown', identify) is None
+
+
+def make_app(spec='2/minute per ip'):
+    app = Flask(__name__)
+    app.extensions['rate_limiter'] = RateLimiter(MemoryStore(), {'ping': spec})
+
+    @app.route('/ping', methods=['POST'])
+    @rate_limit('ping')
+    def ping():
+        return jsonify({'ok': True}), 201
+
+    return app
+
+
+def test_decorator_sets_headers_and_refuses_with_429():
+    client = make_app().test_client()
+
+    response = client.post('/ping')
+    assert response.status_code == 201
+    assert response.headers['RateLimit-Limit'] == '2'
+    assert response.headers['RateLimit-Remaining'] == '1'
+    client.post('/ping')
+
+    refused = client.post('/ping')
+    assert refused.status_code == 429
+    assert refused.headers['Retry-After'] == '30'
+    assert refused.get_json()['retry_after'] == 30
+
+    other = client.post('/ping', environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    assert other.status_code == 201
+
+
+def test_account_scope_reads_the_email_from_the_body():
+    client = make_app('1/minute per account').test_client()
+    assert client.post('/ping', json={'email': 'A@x.com'}).status_code == 201
+    assert client.post('/ping', json={'email': ' a@x.com '}).status_code == 429
+    assert client.post('/ping', json={'email': 'b@x.com'}).status_code == 201
+    assert client.post('/ping').status_code == 201  # No account, no limit
+
@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+import time
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from app.services.response_cache import SingleFlightCache
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = SingleFlightCache(ttl=5)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return {'total': 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'total': 42}] * 8
+
+
+def test_entries_expire_and_errors_are_not_cached():
+    cache = SingleFlightCache(ttl=0.05)
+    counter = iter(range(10))
+    assert cache.get_or_compute('k', lambda: next(counter)) == 0
+    assert cache.get_or_compute('k', lambda: next(counter)) == 0
+    time.sleep(0.06)
+    assert cache.get_or_compute('k', lambda: next(counter)) == 1
+
+    def fail():
+        raise RuntimeError('database down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('other', fail)
+    assert cache.get_or_compute('other', lambda: 'ok') == 'ok'
+
+
+def test_invalidation_during_a_computation_is_not_overwritten():
+    cache = SingleFlightCache(ttl=5)
+    started, release = threading.Event(), threading.Event()
+    values = iter(['before update', 'after update'])
+
+    def compute():
+        value = next(values)
+        if value == 'before update':
+            started.set()
+            release.wait(2)
+        return value
+
+    results = []
+    stale = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    stale.start()
+    started.wait(2)
+    # The change commits while the first computation is still reading
+    cache.invalidate('k')
+    assert cache.get_or_compute('k', compute) == 'after update'
+    release.set()
+    stale.join()
+
+    assert results == ['before update']
+    assert cache.get_or_compute('k', lambda: 'recomputed') == 'after update'
+
+
+def test_invalidating_everything_covers_running_computations():
+    cache = SingleFlightCache(ttl=5)
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(2)
+        return 'stale'
+
+    stale = threading.Thread(target=lambda: cache.get_or_compute('dashboard', compute))
+    stale.start()
+    started.wait(2)
+    cache.invalidate()
+    release.set()
+    stale.join()
+
+    assert cache.get_or_compute('dashboard', lambda: 'fresh') == 'fresh'
@@ -0,0 +1,56 @@
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from sqlalchemy import Column, Date, Integer, MetaData, Numeric, String, Table, create_engine, select
+
+from app.services.rollups import _upsert
+
+metadata = MetaData()
+stats = Table(
+    'daily_order_stats', metadata,
+    Column('day', Date, primary_key=True),
+    Column('status', String(20), primary_key=True),
+    Column('order_count', Integer, nullable=False),
+    Column('revenue', Numeric(14, 2), nullable=False)
+)
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        yield connection
+
+
+def rows(connection):
+    return connection.execute(select(stats).order_by(stats.c.day, stats.c.status)).all()
+
+
+def test_upsert_creates_then_increments(connection):
+    day = date(2026, 10, 1)
+    _upsert(connection, stats, {'day': day, 'status': 'pending'}, {'order_count': 1, 'revenue': Decimal('10.50')})
+    _upsert(connection, stats, {'day': day, 'status': 'pending'}, {'order_count': 2, 'revenue': Decimal('4.50')})
+    _upsert(connection, stats, {'day': day, 'status': 'delivered'}, {'order_count': 1, 'revenue': Decimal('3')})
+
+    assert [(r.status, r.order_count, r.revenue) for r in rows(connection)] == [
+        ('delivered', 1, Decimal('3.00')),
+        ('pending', 3, Decimal('15.00')),
+    ]
+
+
+def test_upsert_applies_negative_deltas_for_status_moves(connection):
+    day = date(2026, 10, 2)
+    _upsert(connection, stats, {'day': day, 'status': 'pending'}, {'order_count': 2, 'revenue': Decimal('20')})
+    # One order moves pending -> delivered
+    _upsert(connection, stats, {'day': day, 'status': 'pending'}, {'order_count': -1, 'revenue': Decimal('-8')})
+    _upsert(connection, stats, {'day': day, 'status': 'delivered'}, {'order_count': 1, 'revenue': Decimal('8')})
+
+    totals = {r.status: (r.order_count, r.revenue) for r in rows(connection)}
+    assert totals == {'pending': (1, Decimal('12.00')), 'delivered': (1, Decimal('8.00'))}
@@ -0,0 +1,46 @@
+import os
+import sys
+from datetime import date
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+
+from app.services.sales_analytics import aggregate, factorize, format_series, period_range, period_starts
+
+
+def test_period_starts_for_weeks_and_months():
+    days = np.array(['2026-10-18', '2026-10-19', '2026-02-28'], dtype='datetime64[D]')
+    # 2026-10-18 is a Sunday; weeks start on Monday
+    assert [str(d) for d in period_starts(days, 'week')] == ['2026-10-12', '2026-10-19', '2026-02-23']
+    assert [str(d) for d in period_starts(days, 'month')] == ['2026-10-01', '2026-10-01', '2026-02-01']
+    assert len(period_range(date(2026, 1, 1), date(2026, 12, 31), 'month')) == 12
+
+
+def test_split_counts_each_order_once_per_group_and_period():
+    periods = period_range(date(2026, 10, 1), date(2026, 10, 3), 'day')
+    days = np.array(['2026-10-01', '2026-10-01', '2026-10-01', '2026-10-03'], dtype='datetime64[D]')
+    codes = {}
+    group_codes = factorize(['Ray-Ban', 'Ray-Ban', 'Oakley', 'Ray-Ban'], codes)
+    labels, metrics = aggregate(
+        periods, days, 'day', group_codes=group_codes, labels=sorted(codes, key=codes.get),
+        order_ids=[7, 7, 7, 9], units=[1, 2, 1, 1], revenue=[100, 50, 80, 120]
+    )
+    split = {group['name']: group for group in format_series(periods, labels, metrics)}
+
+    assert split['Ray-Ban']['totals'] == {'revenue': 270.0, 'orders': 2, 'units': 4, 'average_order_value': 135.0}
+    assert split['Oakley']['totals']['orders'] == 1
+    assert [p['orders'] for p in split['Ray-Ban']['series']] == [1, 0, 1]
+
+
+def test_store_wide_series_sums_rollup_rows_into_buckets():
+    periods = period_range(date(2026, 9, 28), date(2026, 10, 11), 'week')
+    days = np.arange(np.datetime64('2026-09-28'), np.datetime64('2026-10-12'))
+    labels, metrics = aggregate(periods, days, 'week', revenue=np.full(14, 10.0),
+                                units=np.full(14, 2.0), orders=np.ones(14))
+    series = format_series(periods, labels, metrics)[0]['series']
+    assert [(p['period'], p['orders'], p['units'], p['revenue']) for p in series] == [
+        ('2026-09-28', 7, 14, 70.0), ('2026-10-05', 7, 14, 70.0)
+    ]
+
@@ -0,0 +1,60 @@
+import os
+import sys
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+
+from app.services.stock_forecast import days_until_stockout, recent_units, sales_velocity
+
+
+def dense_velocity(series, half_life):
+    """Reference: EW mean over a dense daily series, oldest day first, from the first sale on"""
+    decay = 0.5 ** (1.0 / half_life)
+    sold = np.nonzero(series)[0]
+    if not len(sold):
+        return 0.0
+    window = series[sold[0]:]
+    weights = decay ** np.arange(len(window))[::-1]
+    return float((window * weights).sum() / weights.sum())
+
+
+def test_matches_a_dense_exponentially_weighted_mean():
+    rng = np.random.default_rng(7)
+    products, days = 40, 120
+    dense = rng.integers(0, 4, size=(products, days)) * (rng.random((products, days)) < 0.3)
+    dense[5] = 0  # never sold
+    dense[6, :100] = 0  # launched recently
+
+    codes, positions = np.nonzero(dense)
+    ages = days - 1 - positions
+    velocity = sales_velocity(codes, ages, dense[codes, positions], products, half_life=10)
+
+    expected = [dense_velocity(row, 10) for row in dense]
+    np.testing.assert_allclose(velocity, expected)
+    assert velocity[5] == 0
+
+
+def test_new_product_is_not_diluted_by_days_before_its_first_sale():
+    # Two units a day for the last five days and nothing before
+    velocity = sales_velocity([0] * 5, range(5), [2] * 5, 1, half_life=14)
+    assert velocity[0] == 2.0
+
+
+def test_recent_sales_weigh_more():
+    early = sales_velocity([0], [60], [10], 1, half_life=7)
+    late = sales_velocity([0, 0], [60, 0], [1, 10], 1, half_life=7)
+    assert late[0] > early[0]
+
+
+def test_recent_units_counts_the_last_thirty_days():
+    assert recent_units([0, 0, 1, 1], [0, 29, 30, 3], [2, 3, 4, 5], 3).tolist() == [5, 5, 0]
+
+
+def test_days_until_stockout():
+    result = days_until_stockout([10, 10, -3, 0], np.array([2.0, 0.0, 1.0, 0.5]))
+    assert result[0] == 5
+    assert np.isnan(result[1])
+    assert result[2] == 0 and result[3] == 0
+
@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.models.stripe_event import StripeEvent
+from app.services import stripe_events
+from app.services.stripe_events import drain_events, process_pending_events, record_stripe_event
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    with app.app_context():
+        StripeEvent.__table__.create(db.engine)
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Record handler calls instead of touching orders; events listed in ``failing`` raise"""
+    class Calls(list):
+        failing = set()
+
+    calls = Calls()
+    failing = calls.failing
+
+    def handler(event, obj, order):
+        if event.event_id in failing:
+            raise RuntimeError(f'cannot apply {event.event_id}')
+        calls.append((event.event_id, order))
+
+    monkeypatch.setattr(stripe_events, 'EVENT_HANDLERS', {
+        'payment_intent.succeeded': handler,
+        'charge.refunded': handler,
+    })
+    return calls
+
+
+def load_orders(intent_ids):
+    return {intent_id: f'order-{intent_id}' for intent_id in intent_ids}
+
+
+def store(event_id, event_type, intent_id, created):
+    obj = {'id': intent_id} if event_type.startswith('payment_intent.') else {'id': 'ch_1', 'payment_intent': intent_id}
+    event = {'id': event_id, 'type': event_type, 'created': created, 'data': {'object': obj}}
+    return record_stripe_event(event, json.dumps(event).encode('utf-8'))
+
+
+def row(event_id):
+    return StripeEvent.query.filter_by(event_id=event_id).one()
+
+
+def test_redelivered_events_are_stored_once(app):
+    assert store('evt_1', 'payment_intent.succeeded', 'pi_1', 100)
+    assert not store('evt_1', 'payment_intent.succeeded', 'pi_1', 100)
+    assert StripeEvent.query.count() == 1
+    assert row('evt_1').payment_intent_id == 'pi_1'
+
+
+def test_events_are_applied_in_the_order_stripe_created_them(app, applied):
+    store('evt_refund', 'charge.refunded', 'pi_1', 200)
+    store('evt_paid', 'payment_intent.succeeded', 'pi_1', 100)
+    store('evt_other', 'payment_intent.succeeded', 'pi_2', 150)
+
+    assert drain_events(load_orders=load_orders) == 3
+    assert applied == [('evt_paid', 'order-pi_1'), ('evt_other', 'order-pi_2'), ('evt_refund', 'order-pi_1')]
+    assert all(e.processed_at for e in StripeEvent.query.all())
+
+
+def test_a_failure_is_kept_for_retry_and_holds_back_its_intent(app, applied):
+    store('evt_paid', 'payment_intent.succeeded', 'pi_1', 100)
+    store('evt_refund', 'charge.refunded', 'pi_1', 200)
+    store('evt_other', 'payment_intent.succeeded', 'pi_2', 150)
+    applied.failing.add('evt_paid')
+
+    assert drain_events(retry_backoff=30, load_orders=load_orders) == 1
+    assert applied == [('evt_other', 'order-pi_2')]
+
+    paid = row('evt_paid')
+    assert paid.processed_at is None and paid.attempts == 1
+    assert paid.error == 'cannot apply evt_paid'
+    assert paid.next_attempt_at > datetime.utcnow() + timedelta(seconds=25)
+    # The refund must not be applied before the payment it refunds
+    assert row('evt_refund').attempts == 0
+
+    # Once the backoff has passed and the handler recovers, both apply in order
+    applied.failing.clear()
+    paid.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert drain_events(load_orders=load_orders) == 2
+    assert applied[1:] == [('evt_paid', 'order-pi_1'), ('evt_refund', 'order-pi_1')]
+    assert row('evt_paid').attempts == 2 and row('evt_paid').error is None
+
+
+def test_retries_back_off_exponentially(app, applied):
+    store('evt_paid', 'payment_intent.succeeded', 'pi_1', 100)
+    applied.failing.add('evt_paid')
+
+    delays = []
+    for _ in range(3):
+        before = datetime.utcnow()
+        assert process_pending_events(retry_backoff=10, load_orders=load_orders) == (0, 1)
+        # Not due again until the backoff passes
+        assert process_pending_events(retry_backoff=10, load_orders=load_orders) == (0, 0)
+        paid = row('evt_paid')
+        delays.append(round((paid.next_attempt_at - before).total_seconds()))
+        paid.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+    assert delays == [10, 20, 40]
+
+
+def test_events_are_abandoned_after_max_attempts(app, applied):
+    store('evt_paid', 'payment_intent.succeeded', 'pi_1', 100)
+    store('evt_refund', 'charge.refunded', 'pi_1', 200)
+    applied.failing.add('evt_paid')
+
+    # Without a backoff every retry is due at once
+    assert drain_events(max_attempts=3, retry_backoff=0, load_orders=load_orders) == 1
+
+    paid = row('evt_paid')
+    assert paid.attempts == 3 and paid.processed_at is None
+    # An abandoned event is not retried and no longer blocks the rest of its intent
+    assert applied == [('evt_refund', 'order-pi_1')]
+    assert process_pending_events(max_attempts=3, retry_backoff=0, load_orders=load_orders) == (0, 0)
+    assert row('evt_paid').attempts == 3
@@ -0,0 +1,147 @@
+import os
+import sys
+import uuid
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import fakeredis
+import redis
+
+from app.services.token_blocklist import BLOOM_KEY, BloomFilter, TokenBlocklist, user_key
+
+
+class Table:
+    """Stands in for revoked_tokens: the keys it holds and how often it is read"""
+
+    def __init__(self, keys=()):
+        self.keys = list(keys)
+        self.reads = 0
+
+    def __call__(self, since=None):
+        self.reads += 1
+        return list(self.keys)
+
+
+class DownRedis:
+    """A Redis client whose server is unreachable"""
+
+    def get(self, key):
+        raise redis.ConnectionError('Connection refused')
+
+    def pipeline(self):
+        return self
+
+    def setbit(self, key, position, value):
+        pass
+
+    def incr(self, key):
+        pass
+
+    def execute(self):
+        raise redis.ConnectionError('Connection refused')
+
+
+def make_blocklist(server, table=None, **kwargs):
+    return TokenBlocklist(fakeredis.FakeRedis(server=server), table or Table(), capacity=1000, **kwargs)
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    revoked = [str(uuid.uuid4()) for _ in range(10000)]
+    for jti in revoked:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in revoked)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def test_bit_layout_matches_redis():
+    client = fakeredis.FakeRedis()
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    for position in bloom.add('some-jti'):
+        client.setbit(BLOOM_KEY, position, 1)
+    # SETBIT only grows the string up to the highest bit set
+    stored = client.get(BLOOM_KEY).ljust(len(bloom.bits), b'\0')
+
+    assert stored == bytes(bloom.bits)
+    assert 'some-jti' in BloomFilter(capacity=100, error_rate=0.01, bits=stored)
+
+
+def test_first_worker_builds_the_shared_filter_from_the_table():
+    server = fakeredis.FakeServer()
+    table = Table(['jti-1', user_key(7)])
+    first = make_blocklist(server, table)
+
+    assert first.might_contain('jti-1')
+    assert first.might_contain(user_key(7))
+    assert not first.might_contain('jti-2')
+
+    # A second worker loads the bitset instead of reading the table
+    reads = table.reads
+    second = make_blocklist(server, table)
+    assert second.might_contain('jti-1')
+    assert table.reads == reads
+
+
+def test_revocations_reach_other_workers_on_their_next_sync():
+    server = fakeredis.FakeServer()
+    first = make_blocklist(server, sync_interval=60)
+    second = make_blocklist(server, sync_interval=60)
+    assert not first.might_contain('jti-1')
+    assert not second.might_contain('jti-1')
+
+    first.add(['jti-1'])
+    assert first.might_contain('jti-1')
+    assert not second.might_contain('jti-1')  # Not due for a sync yet
+
+    second.sync(force=True)
+    assert second.might_contain('jti-1')
+
+
+def test_own_additions_do_not_force_a_reload():
+    server = fakeredis.FakeServer()
+    blocklist = make_blocklist(server, sync_interval=60)
+    blocklist.sync()
+    version = blocklist.version
+
+    blocklist.add(['jti-1'])
+    assert int(blocklist.version) == int(version) + 1
+    assert blocklist._next_sync > 0
+
+
+def test_unreachable_redis_sends_every_token_to_the_table():
+    blocklist = TokenBlocklist(DownRedis(), Table(), capacity=1000)
+    assert blocklist.might_contain('anything')
+    assert blocklist.stale
+
+
+def test_revocations_made_while_redis_is_down_are_published_later():
+    server = fakeredis.FakeServer()
+    blocklist = make_blocklist(server, sync_interval=60)
+    blocklist.sync()
+
+    healthy = blocklist.redis
+    blocklist.redis = DownRedis()
+    blocklist.add(['jti-1'])
+    assert blocklist.stale
+
+    blocklist.redis = healthy
+    blocklist.sync(force=True)
+    assert not blocklist.stale
+
+    other = make_blocklist(server)
+    assert other.might_contain('jti-1')
+
+
+def test_rebuild_drops_keys_no_longer_in_the_table():
+    server = fakeredis.FakeServer()
+    table = Table(['jti-1'])
+    blocklist = make_blocklist(server, table)
+    assert blocklist.might_contain('jti-1')
+
+    table.keys = []
+    blocklist.rebuild()
+    assert not blocklist.might_contain('jti-1')
+    assert not make_blocklist(server, table).might_contain('jti-1')
@@ -0,0 +1,125 @@
+import os
+import sys
+import threading
+from datetime import datetime
+from enum import Enum
+from types import SimpleNamespace
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+
+from app.services.response_cache import SingleFlightCache
+from app.services.user_cache import (
+    CHANGED_KEY, Principal, _after_commit, resolve_principal, token_claims, user_version
+)
+
+
+class Role(Enum):
+    CUSTOMER = 'customer'
+    ADMIN = 'admin'
+
+
+class Loader:
+    """Stands in for the users table: returns the current row and counts reads"""
+
+    def __init__(self, principals=None):
+        self.principals = principals or {}
+        self.calls = 0
+
+    def __call__(self, user_id):
+        self.calls += 1
+        return self.principals.get(user_id)
+
+
+def test_version_is_milliseconds_of_updated_at():
+    assert user_version(None) == 0
+    assert user_version(datetime(1970, 1, 1, 0, 0, 1, 500000)) == 1500
+    assert user_version(datetime(2026, 10, 18, 12)) < user_version(datetime(2026, 10, 18, 12, 0, 0, 1000))
+
+
+def test_token_claims_carry_role_name_and_version():
+    user = SimpleNamespace(role=Role.ADMIN, updated_at=datetime(1970, 1, 1, 0, 0, 2))
+    assert token_claims(user) == {'role': 'ADMIN', 'ver': 2000}
+
+
+def test_roles():
+    assert Principal(1, 'a@x.com', 'SUPER_ADMIN', 0).is_admin
+    assert Principal(1, 'a@x.com', 'SUPER_ADMIN', 0).is_super_admin
+    assert Principal(1, 'a@x.com', 'ADMIN', 0).is_admin
+    assert not Principal(1, 'a@x.com', 'ADMIN', 0).is_super_admin
+    assert not Principal(1, 'a@x.com', 'CUSTOMER', 0).is_admin
+
+
+def test_principal_is_loaded_once_per_ttl():
+    cache = SingleFlightCache(ttl=60)
+    load = Loader({7: Principal(7, 'a@x.com', 'ADMIN', 100)})
+
+    for _ in range(5):
+        assert resolve_principal(7, {'ver': 100}, cache=cache, load=load).role == 'ADMIN'
+    assert load.calls == 1
+
+
+def test_newer_token_forces_a_reload():
+    cache = SingleFlightCache(ttl=60)
+    load = Loader({7: Principal(7, 'a@x.com', 'ADMIN', 100)})
+    resolve_principal(7, {'ver': 100}, cache=cache, load=load)
+
+    # Demoted in another process, which then issued this user a fresh token
+    load.principals[7] = Principal(7, 'a@x.com', 'CUSTOMER', 200)
+    assert resolve_principal(7, {'ver': 200}, cache=cache, load=load).role == 'CUSTOMER'
+    assert load.calls == 2
+
+
+def test_older_tokens_and_missing_claims_use_the_cache():
+    cache = SingleFlightCache(ttl=60)
+    load = Loader({7: Principal(7, 'a@x.com', 'ADMIN', 200)})
+    resolve_principal(7, {'ver': 200}, cache=cache, load=load)
+
+    resolve_principal(7, {'ver': 100}, cache=cache, load=load)
+    resolve_principal(7, {}, cache=cache, load=load)
+    assert load.calls == 1
+
+
+def test_missing_users_are_cached_too():
+    cache = SingleFlightCache(ttl=60)
+    load = Loader()
+    assert resolve_principal(9, {'ver': 1}, cache=cache, load=load) is None
+    assert resolve_principal(9, {'ver': 1}, cache=cache, load=load) is None
+    assert load.calls == 1
+
+
+def test_invalidation_reloads():
+    cache = SingleFlightCache(ttl=60)
+    load = Loader({7: Principal(7, 'a@x.com', 'ADMIN', 100)})
+    resolve_principal(7, {}, cache=cache, load=load)
+    cache.invalidate(('user', 7))
+    resolve_principal(7, {}, cache=cache, load=load)
+    assert load.calls == 2
+
+
+def test_demotion_committed_during_a_load_is_not_undone():
+    app = Flask(__name__)
+    cache = app.extensions['user_cache'] = SingleFlightCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def load(user_id):
+        # The first read sees the row before the demotion commits
+        if not started.is_set():
+            started.set()
+            release.wait(2)
+            return Principal(7, 'a@x.com', 'ADMIN', 100)
+        return Principal(7, 'a@x.com', 'CUSTOMER', 200)
+
+    results = []
+    request = threading.Thread(target=lambda: results.append(resolve_principal(7, {}, cache=cache, load=load)))
+    request.start()
+    started.wait(2)
+    with app.app_context():
+        _after_commit(SimpleNamespace(info={CHANGED_KEY: {7}}))
+    release.set()
+    request.join()
+
+    assert results[0].role == 'ADMIN'  # That request was already in flight
+    assert resolve_principal(7, {}, cache=cache, load=load).role == 'CUSTOMER'
@@ -0,0 +1,81 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ensure backend package is importable when running tests from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine
+
+from app.services import user_search
+from app.services.user_search import UserSearchError, install_sqlite_search, list_users
+
+metadata = MetaData()
+users = Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('email', String(120), nullable=False),
+    Column('first_name', String(50), nullable=False),
+    Column('last_name', String(50), nullable=False),
+    Column('phone', String(20)),
+    Column('role', String(20), nullable=False),
+    Column('created_at', DateTime)
+)
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        install_sqlite_search(connection)
+        start = datetime(2026, 1, 1)
+        connection.execute(users.insert(), [
+            {'email': f'customer{i}@example.com', 'first_name': 'Aisha' if i % 10 == 0 else 'Omar',
+             'last_name': f'Rahman{i}', 'phone': f'+97150{i:07d}', 'role': 'CUSTOMER',
+             'created_at': start + timedelta(minutes=i // 2)}  # Pairs share a timestamp
+            for i in range(1, 101)
+        ])
+        yield connection
+
+
+def collect_pages(connection, **filters):
+    ids, cursor = [], None
+    while True:
+        rows, cursor, _ = list_users(connection, users, per_page=7, cursor=cursor, **filters)
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+
+
+def test_keyset_pages_cover_every_user_once_newest_first(connection):
+    ids = collect_pages(connection)
+    assert len(ids) == 100 and len(set(ids)) == 100
+    assert ids[:3] == [100, 99, 98]
+
+
+def test_substring_search_matches_any_column_case_insensitively(connection):
+    assert sorted(collect_pages(connection, term='aISHa')) == list(range(10, 101, 10))
+    assert collect_pages(connection, term='rahman42') == [42]
+    assert collect_pages(connection, term='0000077') == [77]
+
+
+def test_search_index_follows_updates(connection):
+    connection.execute(users.update().where(users.c.id == 5).values(last_name='Zubair'))
+    assert collect_pages(connection, term='zubair') == [5]
+    assert collect_pages(connection, term='rahman5@') == []
+
+
+def test_first_page_total_is_capped(connection, monkeypatch):
+    _, _, total = list_users(connection, users, term='omar')
+    assert total == (90, False)
+
+    monkeypatch.setattr(user_search, 'COUNT_CAP', 50)
+    _, _, total = list_users(connection, users)
+    assert total == (50, True)
+
+
+def test_short_terms_are_rejected(connection):
+    with pytest.raises(UserSearchError):
+        list_users(connection, users, term='om')
@@ -0,0 +1,117 @@
+"""Login throughput benchmark.
+
+Against a running server, sends concurrent ``POST /api/auth/login`` requests
+for one account and reports logins per second, latency percentiles, and how
+many were turned away with 503 while the bcrypt pool was full:
+
+    python tools/login_benchmark.py --url http://127.0.0.1:5000 \\
+        --email admin@almahra.com --password 'Admin123!' --concurrency 32 --requests 500
+
+Without ``--url`` it measures the password check alone, in-process: the old
+login path (two ``checkpw`` calls on every request thread) against one
+verification through ``PasswordHasher``:
+
+    python tools/login_benchmark.py --rounds 12 --concurrency 32 --requests 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(attempt, concurrency, total):
+    """Call ``attempt()`` ``total`` times from ``concurrency`` threads; returns (seconds, latencies, results)"""
+    latencies, results = [], Counter()
+    lock = threading.Lock()
+
+    def timed(_):
+        start = time.perf_counter()
+        result = attempt()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            results[result] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(total)))
+    return time.perf_counter() - start, latencies, results
+
+
+def report(label, seconds, latencies, results):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label}: {len(latencies) / seconds:.1f} logins/s, "
+          f"p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, results {dict(results)}")
+
+
+def benchmark_server(args):
+    import requests
+
+    session_local = threading.local()
+
+    def attempt():
+        if not hasattr(session_local, 'session'):
+            session_local.session = requests.Session()
+        response = session_local.session.post(
+            f"{args.url.rstrip('/')}/api/auth/login",
+            json={'email': args.email, 'password': args.password},
+            timeout=30
+        )
+        return response.status_code
+
+    attempt()  # Warm up connections and the user cache
+    report('server', *run(attempt, args.concurrency, args.requests))
+
+
+def benchmark_in_process(args):
+    import bcrypt
+
+    from app.services.password_hasher import PasswordHasher
+
+    password = 'Benchmark123!'
+    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(args.rounds)).decode()
+
+    def before():
+        # What login used to do: check once for a debug log line, then again for real
+        bcrypt.checkpw(password.encode(), password_hash.encode())
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers, wait=30)
+
+    def after():
+        return hasher.verify(password, password_hash)[0]
+
+    print(f"bcrypt cost {args.rounds}, {args.concurrency} concurrent requests, {hasher.workers} hashing thread(s)")
+    report('before (2 checks on the request thread)', *run(before, args.concurrency, args.requests))
+    report('after (1 check in the bounded pool)', *run(after, args.concurrency, args.requests))
+    hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', help='Base URL of a running server; omit to benchmark in-process')
+    parser.add_argument('--email')
+    parser.add_argument('--password')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost (in-process only)')
+    parser.add_argument('--workers', type=int, default=None, help='Hashing threads (in-process only; default CPU count)')
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.email or not args.password:
+            parser.error('--url needs --email and --password')
+        benchmark_server(args)
+    else:
+        benchmark_in_process(args)
+
+
+if __name__ == '__main__':
+    main()